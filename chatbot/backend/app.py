@@ -2,14 +2,16 @@
 # 実行: python app.py
 # Flask を採用: 軽量で最小構成に適しているため
 
+import hmac
 import logging
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g
 from flask_cors import CORS
 
 from config import config
 from content_repo import content_repo, ContentValidationError
 from chat_engine import chat_engine
 from search import search_engine
+from content_reload import content_reloader
 
 # ロギング設定
 logging.basicConfig(
@@ -31,12 +33,24 @@ CORS(app, origins=config.CORS_ORIGINS)
 def initialize():
     """アプリケーション初期化"""
     try:
-        content_repo.load()
-        search_engine.initialize()
+        content_reloader.initialize()
         logger.info("Application initialized successfully")
     except ContentValidationError as e:
         logger.error(f"Content validation failed: {e}")
         raise
+    if config.CONTENT_RELOAD.lower() == "watch":
+        content_reloader.start_watcher()
+
+
+@app.before_request
+def pin_contents():
+    """リクエスト処理中に読むコンテンツ・検索の状態を固定（処理中に再ロードされても切り替わらない）"""
+    g.content_pins = content_reloader.pin()
+
+
+@app.teardown_request
+def unpin_contents(error=None):
+    content_reloader.unpin(g.pop("content_pins", None))
 
 
 # === API エンドポイント ===
@@ -80,7 +94,8 @@ def step_chat():
             "session_id": "uuid",
             "action": "navigate|show_content|back|reset|search|free_text",
             "target": "state_id or content_id",
-            "query": "search query (for action=search or free_text)"
+            "query": "search query (for action=search or free_text)",
+            "explain": false  // optional: per-phase timings and score breakdown
         }
     
     Response:
@@ -93,6 +108,7 @@ def step_chat():
         action = data.get("action", "")
         target = data.get("target", "")
         query = data.get("query", "")
+        explain = data.get("explain") is True
         
         if not session_id:
             return jsonify({
@@ -112,7 +128,7 @@ def step_chat():
                 }
             }), 400
         
-        response = chat_engine.step(session_id, action, target, query)
+        response = chat_engine.step(session_id, action, target, query, explain)
         
         # セッション切れの場合は 410 を返す
         if not response.success and "SESSION" in response.message:
@@ -131,12 +147,182 @@ def step_chat():
         }), 500
 
 
+@app.route(f"{config.API_PREFIX}/search/batch", methods=["POST"])
+def search_batch():
+    """
+    一括検索（セッション不要）
+    
+    Request:
+        {
+            "queries": [{"query": "エクスポート", "screen_id": "yield_admin"}, ...],
+            "max_results": 5
+        }
+    
+    Response:
+        {"success": true, "results": [{"query", "screen_id", "results": [...]}, ...]}
+    """
+    try:
+        data = request.get_json() or {}
+        queries = data.get("queries")
+        max_results = data.get("max_results", config.SEARCH_MAX_RESULTS)
+        
+        if not isinstance(queries, list) or not queries:
+            return jsonify({
+                "success": False,
+                "error": {
+                    "code": "MISSING_QUERIES",
+                    "message": "queries is required"
+                }
+            }), 400
+        
+        if len(queries) > config.SEARCH_BATCH_MAX:
+            return jsonify({
+                "success": False,
+                "error": {
+                    "code": "BATCH_TOO_LARGE",
+                    "message": f"queries must not exceed {config.SEARCH_BATCH_MAX} items"
+                }
+            }), 400
+        
+        # bool は int のサブクラスのため明示的に除外する
+        if (
+            not isinstance(max_results, int) or isinstance(max_results, bool)
+            or not 1 <= max_results <= config.SEARCH_BATCH_MAX_RESULTS
+        ):
+            return jsonify({
+                "success": False,
+                "error": {
+                    "code": "INVALID_MAX_RESULTS",
+                    "message": f"max_results must be an integer between 1 and {config.SEARCH_BATCH_MAX_RESULTS}"
+                }
+            }), 400
+        
+        pairs = []
+        for entry in queries:
+            entry = entry if isinstance(entry, dict) else {}
+            query = str(entry.get("query") or "")
+            screen_id = entry.get("screen_id")
+            # 画面IDはセッション開始時と同様に検証（不明なら global）
+            if screen_id:
+                screen_id = content_repo.resolve_screen_id(screen_id)
+            pairs.append((query, screen_id))
+        
+        batch_results = search_engine.search_batch(pairs, max_results)
+        
+        return jsonify({
+            "success": True,
+            "results": [
+                {"query": query, "screen_id": screen_id, "results": results}
+                for (query, screen_id), results in zip(pairs, batch_results)
+            ]
+        })
+    
+    except Exception as e:
+        logger.exception("Error in search_batch")
+        return jsonify({
+            "success": False,
+            "error": {
+                "code": "INTERNAL_ERROR",
+                "message": content_repo.get_system_message("error") or "エラーが発生しました"
+            }
+        }), 500
+
+
+@app.route(f"{config.API_PREFIX}/suggest", methods=["GET"])
+def suggest():
+    """
+    入力補完（検索ボックスの1文字入力ごとに呼ばれる）
+    
+    Query:
+        q: 入力途中の文字列
+        screen_id: 画面ID（任意）
+        limit: 最大件数（任意）
+    
+    Response:
+        {"success": true, "query": "エク", "suggestions": [{"text", "type", "priority", "id"?}, ...]}
+    """
+    try:
+        query = request.args.get("q", "")
+        screen_id = request.args.get("screen_id") or None
+        try:
+            limit = int(request.args.get("limit", config.SUGGEST_MAX_RESULTS))
+        except ValueError:
+            limit = config.SUGGEST_MAX_RESULTS
+        limit = max(0, min(limit, config.SUGGEST_MAX_RESULTS))
+        
+        return jsonify({
+            "success": True,
+            "query": query,
+            "suggestions": search_engine.suggest(query, screen_id, limit)
+        })
+    
+    except Exception as e:
+        logger.exception("Error in suggest")
+        return jsonify({
+            "success": False,
+            "error": {
+                "code": "INTERNAL_ERROR",
+                "message": content_repo.get_system_message("error") or "エラーが発生しました"
+            }
+        }), 500
+
+
+@app.route(f"{config.API_PREFIX}/admin/reload", methods=["POST"])
+def reload_contents():
+    """
+    コンテンツの再ロード（再起動せずに新しいコンテンツ・検索インデックスへ差し替える）
+    
+    Headers:
+        X-Admin-Token: ADMIN_TOKEN と同じ値（ADMIN_TOKEN が未設定なら常に 403）
+    
+    Response:
+        {"success": true, "version", "previous_version", "elapsed_ms"}
+        検証エラー時は 422（現在のコンテンツのまま動き続ける）
+    """
+    token = request.headers.get("X-Admin-Token", "")
+    if not config.ADMIN_TOKEN or not hmac.compare_digest(token, config.ADMIN_TOKEN):
+        return jsonify({
+            "success": False,
+            "error": {
+                "code": "FORBIDDEN",
+                "message": "valid X-Admin-Token is required"
+            }
+        }), 403
+    
+    try:
+        result = content_reloader.reload()
+        return jsonify({"success": True, **result})
+    
+    except ContentValidationError as e:
+        logger.error(f"Content reload failed: {e}")
+        return jsonify({
+            "success": False,
+            "error": {
+                "code": "CONTENT_VALIDATION_FAILED",
+                "message": str(e)
+            }
+        }), 422
+    
+    except Exception as e:
+        logger.exception("Error in reload_contents")
+        return jsonify({
+            "success": False,
+            "error": {
+                "code": "INTERNAL_ERROR",
+                "message": str(e)
+            }
+        }), 500
+
+
 @app.route(f"{config.API_PREFIX}/health", methods=["GET"])
 def health_check():
     """ヘルスチェック"""
     return jsonify({
         "status": "ok",
-        "version": content_repo._data.get("meta", {}).get("version", "unknown")
+        "version": content_repo.get_version(),
+        "search_cache": search_engine.cache_stats(),
+        "search_top_k": search_engine.top_k_stats(),
+        "content_reload": content_reloader.stats()
     })
 
 
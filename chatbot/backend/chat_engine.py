@@ -11,6 +11,7 @@ from models import (
 from session_store import Session, session_store
 from content_repo import content_repo
 from search import search_engine
+from config import config
 
 logger = logging.getLogger(__name__)
 
@@ -50,7 +51,8 @@ class ChatEngine:
         session_id: str, 
         action: str, 
         target: str = "",
-        query: str = ""
+        query: str = "",
+        explain: bool = False
     ) -> ChatResponse:
         """
         状態遷移
@@ -60,6 +62,7 @@ class ChatEngine:
             action: アクション種別
             target: 遷移先
             query: 検索クエリ（action=search時）
+            explain: 検索の内訳をレスポンスに含める（action=search / free_text時）
         
         Returns:
             遷移後のレスポンス
@@ -80,9 +83,10 @@ class ChatEngine:
         elif action == "reset":
             return self._handle_reset(session)
         elif action == "search":
-            return self._handle_search(session, query)
+            # 「もしかして」の選択肢は target に補正後のクエリを持つ
+            return self._handle_search(session, query or target, explain)
         elif action == "free_text":
-            return self._handle_free_text(session, query)
+            return self._handle_free_text(session, query, explain)
         else:
             return self._error_response(session.session_id, "INVALID_ACTION",
                 content_repo.get_system_message("error"))
@@ -120,8 +124,16 @@ class ChatEngine:
         session.reset_to_home()
         return self._build_home_response(session, session.screen_id)
     
-    def _handle_search(self, session: Session, query: str) -> ChatResponse:
+    def _handle_search(self, session: Session, query: str, explain: bool = False) -> ChatResponse:
         """検索処理"""
+        response = self._search_response(session, query)
+        if explain and config.SEARCH_EXPLAIN_ENABLED and query and len(query.strip()) >= 2:
+            # 調査用: 通常の検索とは別に計測付きで検索し直す（通常の検索には計測を入れない）
+            response.explain = search_engine.explain(query, session.screen_id)
+        return response
+    
+    def _search_response(self, session: Session, query: str) -> ChatResponse:
+        """検索結果のレスポンス作成"""
         if not query or len(query.strip()) < 2:
             # クエリ短すぎ → 検索入力状態に留まる
             state_id = f"search:{session.screen_id}"
@@ -133,13 +145,22 @@ class ChatEngine:
         results = search_engine.search(query, session.screen_id)
         
         if not results:
+            # 表記ゆれ補正（「もしかして」）
+            suggestions = search_engine.did_you_mean(query, session.screen_id)
+            if suggestions and config.SEARCH_FUZZY.lower() == "correct":
+                # 最有力の補正語で検索し、残りの候補も選択肢に出す
+                corrected = suggestions[0]
+                results = search_engine.search(corrected, session.screen_id)
+                return self._build_search_results_response(
+                    session, query, results, corrected, suggestions[1:]
+                )
             # 該当なし
-            return self._build_no_result_response(session, query)
+            return self._build_no_result_response(session, query, suggestions)
         
         # 検索結果を返す
         return self._build_search_results_response(session, query, results)
     
-    def _handle_free_text(self, session: Session, query: str) -> ChatResponse:
+    def _handle_free_text(self, session: Session, query: str, explain: bool = False) -> ChatResponse:
         """
         自由入力処理
         重要: search:{screen_id} 状態のみ受け付ける
@@ -148,7 +169,7 @@ class ChatEngine:
         
         # 検索状態の場合のみ処理
         if current.startswith("search:"):
-            return self._handle_search(session, query)
+            return self._handle_search(session, query, explain)
         
         # それ以外は誘導メッセージ
         # 生成禁止: 必ず固定文言を返す
@@ -306,15 +327,13 @@ class ChatEngine:
         
         # 関連コンテンツがあれば選択肢に
         options = []
-        for related_id in item.get("related", [])[:3]:
-            related = content_repo.get_content(related_id)
-            if related:
-                options.append(OptionItem(
-                    id=f"opt_{related_id}",
-                    label=f"関連: {related['title']}",
-                    action="show_content",
-                    target=f"ans:{related_id}"
-                ))
+        for related in content_repo.get_related(content_id, limit=3):
+            options.append(OptionItem(
+                id=f"opt_{related['id']}",
+                label=f"関連: {related['title']}",
+                action="show_content",
+                target=f"ans:{related['id']}"
+            ))
         
         # 戻ると最初に戻る
         options.append(OptionItem(
@@ -375,10 +394,18 @@ class ChatEngine:
         self, 
         session: Session, 
         query: str, 
-        results: List[dict]
+        results: List[dict],
+        corrected: Optional[str] = None,
+        suggestions: Optional[List[str]] = None
     ) -> ChatResponse:
-        """検索結果レスポンス"""
-        message = content_repo.get_system_message("search_results").format(query=query, count=len(results))
+        """検索結果レスポンス（corrected: 表記ゆれ補正後のクエリ）"""
+        if corrected:
+            message = (
+                content_repo.get_system_message("search_corrected")
+                or "「{query}」に該当する項目がなかったため、「{corrected}」の検索結果を表示しています（{count}件）。"
+            ).format(query=query, corrected=corrected, count=len(results))
+        else:
+            message = content_repo.get_system_message("search_results").format(query=query, count=len(results))
         
         options = []
         for r in results:
@@ -388,6 +415,7 @@ class ChatEngine:
                 action="show_content",
                 target=f"ans:{r['id']}"
             ))
+        options.extend(self._did_you_mean_options(suggestions or []))
         
         # 再検索と戻る
         options.append(OptionItem(
@@ -412,11 +440,16 @@ class ChatEngine:
             input_mode=InputMode(free_text=False)
         )
     
-    def _build_no_result_response(self, session: Session, query: str) -> ChatResponse:
-        """検索結果なしレスポンス"""
+    def _build_no_result_response(
+        self,
+        session: Session,
+        query: str,
+        suggestions: Optional[List[str]] = None
+    ) -> ChatResponse:
+        """検索結果なしレスポンス（suggestions: 「もしかして」の補正後クエリ）"""
         message = content_repo.get_system_message("search_no_result").format(query=query)
         
-        options = [
+        options = self._did_you_mean_options(suggestions or []) + [
             OptionItem(
                 id="opt_retry",
                 label="別のキーワードで検索",
@@ -440,6 +473,19 @@ class ChatEngine:
             input_mode=InputMode(free_text=True, placeholder="別のキーワード...")
         )
     
+    def _did_you_mean_options(self, suggestions: List[str]) -> List[OptionItem]:
+        """「もしかして」の選択肢（選ぶと補正後のクエリで再検索）"""
+        template = content_repo.get_system_message("search_did_you_mean") or "もしかして「{query}」"
+        return [
+            OptionItem(
+                id=f"opt_dym_{i}",
+                label=template.format(query=suggestion),
+                action="search",
+                target=suggestion
+            )
+            for i, suggestion in enumerate(suggestions)
+        ]
+    
     def _build_not_found_response(self, session: Session) -> ChatResponse:
         """該当なしレスポンス（検索誘導）"""
         state_id = f"nf:{session.screen_id}"
@@ -12,8 +12,23 @@ class Config:
     BASE_DIR = Path(__file__).parent.parent
     CONTENT_PATH = os.getenv("CONTENT_PATH", str(BASE_DIR / "contents" / "contents.json"))
     SCHEMA_PATH = os.getenv("SCHEMA_PATH", str(BASE_DIR / "contents" / "contents.schema.json"))
-    CONTENT_SOURCE = os.getenv("CONTENT_SOURCE", "json")  # "json" or "csv"
+    CONTENT_SOURCE = os.getenv("CONTENT_SOURCE", "json")  # "json" / "csv" / "sqlite"
     CONTENT_CSV_DIR = os.getenv("CONTENT_CSV_DIR", str(BASE_DIR / "contents" / "csv"))
+    # CSV ファイルを並行に読み込むスレッド数（1 で順番に読み込む、省略時は CPU 数・最大4）
+    CONTENT_CSV_WORKERS = int(os.getenv("CONTENT_CSV_WORKERS", str(min(4, os.cpu_count() or 1))))
+    # コンパイル済みコンテンツ（compile_snapshot.py で作成、読み込み元のハッシュが一致すれば解析・検証を省く）
+    CONTENT_SNAPSHOT_PATH = os.getenv("CONTENT_SNAPSHOT_PATH", str(Path(CONTENT_PATH).with_suffix(".snapshot")))
+    CONTENT_SNAPSHOT_MODE = os.getenv("CONTENT_SNAPSHOT_MODE", "auto")  # "auto"（あれば読み込む）or "off"
+    # 状態グラフの検証（到達できないメニュー・行き止まり・循環）: "warn"（ログに出す）or "strict"（読み込みを失敗させる）
+    CONTENT_GRAPH_CHECK = os.getenv("CONTENT_GRAPH_CHECK", "warn")
+    # SQLite コンテンツ（build_sqlite.py で作成、CONTENT_SOURCE=sqlite・SEARCH_ENGINE=fts5 で使用）
+    CONTENT_SQLITE_PATH = os.getenv("CONTENT_SQLITE_PATH", str(Path(CONTENT_PATH).with_suffix(".db")))
+    # 保存済み検索インデックス（build_search_index.py で作成、省略時は CONTENT_PATH と同じ場所）
+    SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", str(Path(CONTENT_PATH).with_suffix(".idx")))
+    SEARCH_INDEX_MODE = os.getenv("SEARCH_INDEX_MODE", "auto")  # "auto"（あれば読み込む）or "off"
+    # コンテンツの再ロード（再起動なしで差し替え）
+    CONTENT_RELOAD = os.getenv("CONTENT_RELOAD", "off")  # "off" or "watch"（読み込み元ファイルの更新を監視）
+    CONTENT_RELOAD_INTERVAL = float(os.getenv("CONTENT_RELOAD_INTERVAL", "5"))  # 監視間隔（秒）
     
     # セッション設定
     SESSION_TTL = int(os.getenv("SESSION_TTL", "1800"))  # 30分
@@ -22,6 +37,18 @@ class Config:
     # 検索設定
     SEARCH_MAX_RESULTS = int(os.getenv("SEARCH_MAX_RESULTS", "5"))
     SEARCH_MIN_QUERY_LEN = int(os.getenv("SEARCH_MIN_QUERY_LEN", "2"))
+    SEARCH_ENGINE = os.getenv("SEARCH_ENGINE", "python")  # "python" / "numpy" / "fts5"
+    SEARCH_TOPK_MODE = os.getenv("SEARCH_TOPK_MODE", "maxscore")  # "maxscore" or "full"
+    SEARCH_TOPK_STATS = os.getenv("SEARCH_TOPK_STATS", "0") == "1"  # スキップ件数を集計
+    SEARCH_BATCH_MAX = int(os.getenv("SEARCH_BATCH_MAX", "1000"))  # 一括検索の最大クエリ数
+    SEARCH_BATCH_MAX_RESULTS = int(os.getenv("SEARCH_BATCH_MAX_RESULTS", "50"))  # 一括検索の max_results の上限
+    SEARCH_PROXIMITY_WEIGHT = float(os.getenv("SEARCH_PROXIMITY_WEIGHT", "1.0"))  # 0 で近接ボーナスなし
+    SEARCH_FUZZY = os.getenv("SEARCH_FUZZY", "correct")  # "correct" / "suggest" / "off"
+    SEARCH_FUZZY_SUGGESTIONS = int(os.getenv("SEARCH_FUZZY_SUGGESTIONS", "3"))  # 「もしかして」の最大件数
+    SEARCH_EXPLAIN_ENABLED = os.getenv("SEARCH_EXPLAIN_ENABLED", "0") == "1"  # explain 指定を受け付ける（既定は無効）
+    SUGGEST_MAX_RESULTS = int(os.getenv("SUGGEST_MAX_RESULTS", "8"))
+    SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "256"))  # 0 で無効
+    SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "300"))  # 秒（0 で無期限）
     
     # ログ設定
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -32,6 +59,8 @@ class Config:
     
     # API設定
     API_PREFIX = "/api/v1/helpchat"
+    # 管理 API（コンテンツの再ロード）のトークン（未設定なら管理 API は使えない）
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
 
 
 config = Config()
@@ -0,0 +1,206 @@
+# コンテンツの状態グラフの検証
+# メニューの選択肢（home / menu / cat / ans への遷移）・ホームのフォールバック・関連コンテンツを辺とする
+# グラフを1回だけ作り、参照切れ・到達できないメニュー・行き止まり・メニューの循環を O(V+E) で検出する
+#
+# 参照切れのうち home / menu / ans は errors（読み込みを失敗させる）、
+# それ以外の指摘は warnings（CONTENT_GRAPH_CHECK=strict の場合のみ失敗させる）
+
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Set
+
+# 画面のホームメニューがない場合に表示するメニュー（ChatEngine._build_home_response）
+HOME_FALLBACK = "home:global"
+
+
+@dataclass
+class GraphReport:
+    """状態グラフの検証結果"""
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    # 状態数・辺数・到達できるメニュー / コンテンツ数・所要時間
+    stats: Dict[str, Any] = field(default_factory=dict)
+
+
+def analyze_graph(data: Dict[str, Any]) -> GraphReport:
+    """
+    状態グラフを作成して検証する
+
+    Args:
+        data: screen_registry・menus・content_items を含むコンテンツ
+            （content_items は related / related_auto のみ参照する）
+
+    Returns:
+        GraphReport（errors・warnings はメニュー・コンテンツの定義順）
+    """
+    start = time.perf_counter()
+    report = GraphReport()
+    errors, warnings = report.errors, report.warnings
+    screens = set(data["screen_registry"].keys())
+    screens.add("global")  # フォールバック用
+    menus = data["menus"]
+    items = data["content_items"]
+
+    def resolve(menu_id: str, next_state: str) -> Optional[str]:
+        """選択肢の遷移先をグラフの状態に解決する（参照切れ・遷移先を持たない状態は None）"""
+        kind, _, rest = next_state.partition(":")
+        if kind == "home":
+            screen = rest.split(":")[0]
+            if screen not in screens:
+                errors.append(f"Menu '{menu_id}' references unknown screen: {screen}")
+                return None
+            return f"home:{screen}"
+        if kind == "menu":
+            if next_state in menus:
+                return next_state
+            if rest in menus:
+                # 読み込みは通るが、ChatEngine は "menu:" 付きの ID で探すため実行時にはホームに戻る
+                warnings.append(
+                    f"Menu '{menu_id}' references {next_state}, but the menu is defined as '{rest}'"
+                )
+                return rest
+            errors.append(f"Menu '{menu_id}' references unknown menu: {next_state}")
+            return None
+        if kind == "ans":
+            if rest in items:
+                return next_state
+            errors.append(f"Menu '{menu_id}' references unknown content: {rest}")
+            return None
+        if kind == "cat":
+            parts = next_state.split(":")
+            if len(parts) < 3 or not parts[1] or not parts[2]:
+                warnings.append(f"Menu '{menu_id}' references malformed category state: {next_state}")
+                return None
+            if next_state not in menus:
+                # ChatEngine は category_empty を表示する（検索と戻る以外の選択肢がない）
+                warnings.append(f"Menu '{menu_id}' references category without menu: {next_state}")
+                return None
+            return next_state
+        if kind in ("search", "nf"):
+            return None
+        warnings.append(f"Menu '{menu_id}' references unknown state: {next_state}")
+        return None
+
+    # 状態 → 遷移先の状態
+    edges: Dict[str, List[str]] = {}
+    n_edges = 0
+    for menu_id, menu in menus.items():
+        options = menu.get("options", [])
+        if not options:
+            warnings.append(f"Menu '{menu_id}' has no options")
+        targets = []
+        for opt in options:
+            target = resolve(menu_id, opt.get("next_state", ""))
+            if target is not None:
+                targets.append(target)
+        edges[menu_id] = targets
+        n_edges += len(targets)
+
+    # ホームメニューのない画面・不明な画面は global のホームメニューを表示する
+    roots = [f"home:{screen}" for screen in screens]
+    without_home = sorted(root for root in roots if root not in menus and root != HOME_FALLBACK)
+    if HOME_FALLBACK in menus:
+        for root in without_home:
+            edges[root] = [HOME_FALLBACK]
+        n_edges += len(without_home)
+    else:
+        fallback_for = ", ".join(["unknown screens"] + without_home)
+        warnings.append(f"Missing {HOME_FALLBACK} menu (fallback for {fallback_for})")
+
+    # 関連コンテンツ（コンテンツ間の辺、コンテンツからメニューへの辺はない）
+    for item_id, item in items.items():
+        for key in ("related", "related_auto"):
+            related = item.get(key)
+            if not related:
+                continue
+            n_edges += len(related)
+            for related_id in related:
+                if related_id not in items:
+                    warnings.append(f"Content '{item_id}' references unknown related content: {related_id}")
+
+    # 到達可能性（全画面のホームからメニューを幅優先探索し、たどり着いたコンテンツから関連コンテンツをたどる）
+    reachable = set(roots)
+    reachable_items: Set[str] = set()
+    queue = deque(roots)
+    while queue:
+        for target in edges.get(queue.popleft(), ()):
+            if target.startswith("ans:"):
+                reachable_items.add(target[4:])
+            elif target not in reachable:
+                reachable.add(target)
+                queue.append(target)
+    stack = list(reachable_items)
+    while stack:
+        item = items[stack.pop()]
+        for key in ("related", "related_auto"):
+            for related_id in item.get(key) or ():
+                if related_id in items and related_id not in reachable_items:
+                    reachable_items.add(related_id)
+                    stack.append(related_id)
+    for menu_id in menus:
+        if menu_id not in reachable:
+            warnings.append(f"Unreachable menu: {menu_id}")
+
+    # ホームを経由しないメニューの循環（ホームへ戻る選択肢による循環は想定どおり）
+    submenus = [menu_id for menu_id in menus if not menu_id.startswith("home:")]
+    for component in _cycles(submenus, edges):
+        warnings.append(f"Menus form a cycle: {', '.join(component)}")
+
+    report.stats = {
+        "states": len(menus.keys() | set(roots)) + len(items),
+        "edges": n_edges,
+        "menus": len(menus),
+        "reachable_menus": sum(1 for menu_id in menus if menu_id in reachable),
+        "contents": len(items),
+        # メニュー・関連コンテンツからたどれないコンテンツは検索からのみ表示される
+        "reachable_contents": len(reachable_items),
+        "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+    }
+    return report
+
+
+def _cycles(nodes: List[str], edges: Dict[str, List[str]]) -> List[List[str]]:
+    """nodes 内の辺だけで循環する強連結成分（Tarjan、再帰を使わない、nodes の順に探索）"""
+    members = set(nodes)
+    index: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    stack: List[str] = []
+    on_stack: Set[str] = set()
+    cycles = []
+    for root in nodes:
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work = [(root, iter(edges.get(root, ())))]
+        while work:
+            node, targets = work[-1]
+            for target in targets:
+                if target not in members:
+                    continue
+                if target not in index:
+                    index[target] = low[target] = len(index)
+                    stack.append(target)
+                    on_stack.add(target)
+                    work.append((target, iter(edges.get(target, ()))))
+                    break
+                if target in on_stack:
+                    low[node] = min(low[node], index[target])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in edges.get(node, ()):
+                        cycles.append(component[::-1])
+    return cycles
@@ -0,0 +1,193 @@
+# コンテンツの再ロード（プロセスを再起動せずに差し替え）
+# 新しいコンテンツと検索の状態をリクエスト処理の外で構築・検証し、参照の代入1回で差し替える
+# セッション（session_store）はプロセス内に残るため、再ロードをまたいで会話を続けられる
+
+import time
+import logging
+import threading
+from contextvars import Token
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Tuple
+
+from config import config
+from content_repo import content_repo, ContentValidationError
+from search import search_engine
+
+logger = logging.getLogger(__name__)
+
+# (コンテンツのスナップショット, 検索の状態)
+Generation = Tuple[Any, Any]
+# ファイルごとの (パス, 更新時刻, サイズ)
+SourceSignature = Tuple[Tuple[str, int, int], ...]
+
+
+def source_signature(paths: List[Path]) -> SourceSignature:
+    """読み込み元ファイルの更新時刻とサイズ（存在しないファイルは含めない）"""
+    signature = []
+    for path in paths:
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+class ContentReloader:
+    """
+    コンテンツと検索の状態の組を管理する
+
+    リクエストは開始時点の組を pin() で固定し、処理中に再ロードされても同じ組を読む。
+    読み取り側はロックを取らない（再ロード同士のみ排他）。
+    """
+
+    def __init__(self):
+        self._generation: Optional[Generation] = None
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._signature: SourceSignature = ()
+        self._loaded_at = 0.0
+        self._reloads = 0
+        self._failures = 0
+        self._last_error = ""
+
+    def initialize(self) -> None:
+        """起動時の読み込み（検証エラーは例外を送出）"""
+        with self._reload_lock:
+            self._signature = source_signature(content_repo.source_paths())
+            self._install(self._build())
+
+    def reload(self) -> Dict[str, Any]:
+        """
+        コンテンツと検索の状態を作り直して差し替える
+
+        構築・検証に失敗した場合は例外を送出し、現在の組のまま動き続ける。
+
+        Returns:
+            {"version", "previous_version", "elapsed_ms"}
+        """
+        with self._reload_lock:
+            previous = self.version()
+            signature = source_signature(content_repo.source_paths())
+            start = time.perf_counter()
+            try:
+                generation = self._build()
+            except Exception as e:
+                self._failures += 1
+                self._last_error = str(e)
+                raise
+            self._install(generation)
+            self._signature = signature
+            self._reloads += 1
+            elapsed_ms = round((time.perf_counter() - start) * 1000, 1)
+            version = self.version()
+        logger.info(f"Contents reloaded: {previous} -> {version} ({elapsed_ms} ms)")
+        return {"version": version, "previous_version": previous, "elapsed_ms": elapsed_ms}
+
+    def _build(self) -> Generation:
+        """新しい組を作成（検索の状態は新しいコンテンツを pin() した上で構築する）"""
+        snapshot = content_repo.build_snapshot()
+        token = content_repo.pin(snapshot)
+        try:
+            state = search_engine.build_state()
+        finally:
+            content_repo.unpin(token)
+        return snapshot, state
+
+    def _install(self, generation: Generation) -> None:
+        """組を差し替える（リクエストは self._generation の1回の参照で組を取得する）"""
+        snapshot, state = generation
+        content_repo.swap(snapshot)
+        search_engine.swap(state)
+        self._generation = generation
+        self._loaded_at = time.time()
+        self._last_error = ""
+
+    def version(self) -> str:
+        """現在の組のコンテンツバージョン（リクエストで固定中の組ではなく最新の組）"""
+        generation = self._generation
+        return generation[1].version if generation is not None else ""
+
+    def pin(self) -> Optional[Tuple[Token, Token]]:
+        """
+        現在の組をこのコンテキスト（リクエスト処理）に固定する
+
+        Returns:
+            unpin() に渡すトークン（未初期化の場合は None）
+        """
+        generation = self._generation
+        if generation is None:
+            return None
+        snapshot, state = generation
+        return content_repo.pin(snapshot), search_engine.pin(state)
+
+    def unpin(self, tokens: Optional[Tuple[Token, Token]]) -> None:
+        """pin() の固定を解除する"""
+        if tokens is None:
+            return
+        content_token, search_token = tokens
+        search_engine.unpin(search_token)
+        content_repo.unpin(content_token)
+
+    # === ファイル監視 ===
+
+    def start_watcher(self, interval: float = None) -> None:
+        """
+        読み込み元ファイルの更新を監視し、変更されたら再ロードする（デーモンスレッド）
+
+        書き込み途中のファイルを読まないよう、変更後に1回分の間隔だけ変化がないことを
+        確認してから再ロードする。失敗したファイルは次に変更されるまで再試行しない。
+        """
+        if self._watcher is not None:
+            return
+        interval = interval or config.CONTENT_RELOAD_INTERVAL
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, args=(interval,), name="content-reload", daemon=True)
+        self._watcher.start()
+        logger.info(f"Watching contents for changes every {interval}s")
+
+    def stop_watcher(self) -> None:
+        """ファイル監視を止める"""
+        watcher = self._watcher
+        if watcher is None:
+            return
+        self._stop.set()
+        watcher.join()
+        self._watcher = None
+
+    def _watch(self, interval: float) -> None:
+        pending: Optional[SourceSignature] = None
+        failed: Optional[SourceSignature] = None
+        while not self._stop.wait(interval):
+            signature = source_signature(content_repo.source_paths())
+            if signature == self._signature or signature == failed:
+                pending = None
+                continue
+            if signature != pending:
+                # 変更を検出（次の確認でも変化がなければ再ロード）
+                pending = signature
+                continue
+            pending = None
+            try:
+                self.reload()
+            except ContentValidationError as e:
+                failed = signature
+                logger.error(f"Content reload failed, keeping version {self.version()}: {e}")
+            except Exception:
+                failed = signature
+                logger.exception("Content reload failed")
+
+    def stats(self) -> Dict[str, Any]:
+        """再ロードの状況（ヘルスチェック用）"""
+        return {
+            "mode": config.CONTENT_RELOAD,
+            "loaded_at": round(self._loaded_at, 3),
+            "reloads": self._reloads,
+            "failures": self._failures,
+            "last_error": self._last_error,
+        }
+
+
+# シングルトンインスタンス
+content_reloader = ContentReloader()
@@ -4,236 +4,217 @@
 import csv
 import json
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar, Token
+from operator import itemgetter
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, Iterator, List, Optional, Any, Tuple
 
 from config import config
+from content_graph import analyze_graph
+from content_schema import SchemaError, get_validator, schema_hash
+from content_snapshot import open_snapshot, source_hash
 
 logger = logging.getLogger(__name__)
 
+# ログに出す状態グラフの指摘の上限（全件は contents/check_graph.py で確認する）
+MAX_GRAPH_WARNINGS = 20
+# エラーメッセージに含めるスキーマ違反の上限
+MAX_SCHEMA_ERRORS = 50
+
 
 class ContentValidationError(Exception):
     """コンテンツ検証エラー"""
     pass
 
 
+class ContentSnapshot:
+    """
+    読み込み・検証済みのコンテンツ（作成後は変更しない）
+    
+    再ロードでは新しいスナップショットを作ってから参照を差し替えるため、
+    差し替え前に読み始めた処理は古いスナップショットを最後まで読める。
+    """
+    
+    def __init__(self, data: Dict[str, Any], screen_contents: Dict[str, List[str]], unscoped_contents: List[str]):
+        self.data = data
+        # 画面ID → 表示対象のコンテンツID（定義順、画面指定なしのコンテンツを含む）
+        self.screen_contents = screen_contents
+        self.unscoped_contents = unscoped_contents
+
+
 class ContentRepository:
     """コンテンツリポジトリ"""
     
     def __init__(self, content_path: str = None):
         self.content_path = Path(content_path or config.CONTENT_PATH)
-        self._data: Dict[str, Any] = {}
-        self._loaded = False
+        self._snapshot: Optional[ContentSnapshot] = None
+        # pin() で固定したスナップショット（リクエスト処理中は再ロードの影響を受けない）
+        self._pinned: ContextVar = ContextVar(f"content_snapshot_{id(self)}", default=None)
     
     def load(self) -> None:
-        """コンテンツを読み込み、検証する"""
+        """コンテンツを読み込み、検証する（再ロード時も再実行）"""
+        self.swap(self.build_snapshot())
+    
+    def build_snapshot(self) -> ContentSnapshot:
+        """
+        コンテンツを読み込み、検証したスナップショットを作成する
+        
+        現在のスナップショットは変更しない（検証エラー時は例外を送出し、現在の内容で動き続ける）
+        読み込み元と一致するコンパイル済みスナップショット（compile_snapshot.py で作成）があれば、
+        解析・検証を省いてそれを使う。
+        """
+        compiled = self._open_compiled()
+        if compiled is not None:
+            logger.info(f"Loaded contents from snapshot {config.CONTENT_SNAPSHOT_PATH}")
+            return ContentSnapshot(*compiled)
+        
         if config.CONTENT_SOURCE.lower() == "csv":
-            self._data = self._load_from_csv()
+            data = self._load_from_csv()
         else:
             if not self.content_path.exists():
                 raise ContentValidationError(f"Content file not found: {self.content_path}")
-            with open(self.content_path, "r", encoding="utf-8") as f:
-                self._data = json.load(f)
+            try:
+                with open(self.content_path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except ValueError as e:
+                raise ContentValidationError(f"Invalid content file {self.content_path}: {e}")
         
-        self._validate()
-        self._loaded = True
+        self._validate(data)
+        screen_contents, unscoped = self._build_screen_lookup(data)
         logger.info(f"Loaded contents from {self.content_path}")
+        return ContentSnapshot(data, screen_contents, unscoped)
+    
+    def snapshot_meta(self) -> Dict[str, Any]:
+        """コンパイル済みスナップショットと一致すべきメタ情報（読み込み元の種類・ハッシュ、スキーマのハッシュ）"""
+        schema_path = Path(config.SCHEMA_PATH)
+        return {
+            "source": config.CONTENT_SOURCE.lower(),
+            "source_hash": source_hash(self.source_paths()),
+            "schema_hash": schema_hash(schema_path) if schema_path.exists() else "",
+        }
+    
+    def _open_compiled(self) -> Optional[tuple]:
+        """CONTENT_SNAPSHOT_MODE=auto の場合、読み込み元と一致するスナップショットを開く"""
+        if config.CONTENT_SNAPSHOT_MODE.lower() != "auto":
+            return None
+        path = Path(config.CONTENT_SNAPSHOT_PATH)
+        if not path.exists():
+            return None
+        try:
+            expected = self.snapshot_meta()
+        except OSError as e:
+            # 読み込み元がない場合は通常の読み込みで同じエラーを報告する
+            logger.warning(f"Content snapshot {path} ignored: {e}")
+            return None
+        return open_snapshot(path, expected)
+    
+    def swap(self, snapshot: ContentSnapshot) -> None:
+        """スナップショットを差し替える（参照の代入1回のため、読み取り側はロック不要）"""
+        self._snapshot = snapshot
+    
+    def snapshot(self) -> ContentSnapshot:
+        """現在のスナップショット（pin() 中は固定したもの、未読み込みなら読み込む）"""
+        snapshot = self._pinned.get()
+        if snapshot is None:
+            snapshot = self._snapshot
+            if snapshot is None:
+                self.load()
+                snapshot = self._snapshot
+        return snapshot
+    
+    def pin(self, snapshot: ContentSnapshot) -> Token:
+        """現在のコンテキスト（リクエスト処理）で読むスナップショットを固定する"""
+        return self._pinned.set(snapshot)
+    
+    def unpin(self, token: Token) -> None:
+        """pin() の固定を解除する"""
+        self._pinned.reset(token)
+    
+    def source_paths(self) -> List[Path]:
+        """コンテンツの読み込み元ファイル（再ロードの更新監視用）"""
+        if config.CONTENT_SOURCE.lower() == "csv":
+            return sorted(Path(config.CONTENT_CSV_DIR).glob("*.csv"))
+        return [self.content_path]
 
     def _load_from_csv(self) -> Dict[str, Any]:
-        """CSV からコンテンツを読み込む"""
+        """
+        CSV からコンテンツを読み込む
+        
+        各ファイルは1行ずつ読みながら目的の構造に組み立て（行の一覧は作らない）、
+        ファイル同士は CONTENT_CSV_WORKERS のスレッドで並行に読み込む。
+        選択肢・リンク・関連コンテンツの並び順は、ファイルごとに1回の安定ソートで決める。
+        """
         base_dir = Path(config.CONTENT_CSV_DIR)
         if not base_dir.exists():
             raise ContentValidationError(f"CSV directory not found: {base_dir}")
-
-        def read_rows(filename: str) -> List[Dict[str, str]]:
+        
+        parsers = {
+            "meta": (_parse_meta, "meta.csv", True),
+            "system_messages": (_parse_system_messages, "system_messages.csv", True),
+            "screen_registry": (_parse_screens, "screens.csv", True),
+            "menus": (_parse_menus, "menus.csv", True),
+            "content_items": (_parse_content_items, "content_items.csv", True),
+            "links": (_parse_links, "content_links.csv", False),
+            "related": (_parse_related, "content_related.csv", False),
+        }
+        jobs = {}
+        for key, (parse, filename, required) in parsers.items():
             path = base_dir / filename
-            if not path.exists():
+            if path.exists():
+                jobs[key] = (parse, path)
+            elif required:
                 raise ContentValidationError(f"CSV file not found: {path}")
-            with open(path, "r", encoding="utf-8-sig", newline="") as f:
-                return list(csv.DictReader(f))
-
-        def split_list(value: str) -> List[str]:
-            if not value:
-                return []
-            return [v.strip() for v in value.split("|") if v.strip()]
-
-        # meta
-        meta_rows = read_rows("meta.csv")
-        meta = {}
-        for row in meta_rows:
-            key = (row.get("key") or "").strip()
-            val = (row.get("value") or "").strip()
-            if key:
-                meta[key] = val
-
-        # system_messages
-        sys_rows = read_rows("system_messages.csv")
-        system_messages = {}
-        for row in sys_rows:
-            key = (row.get("key") or "").strip()
-            val = row.get("value") or ""
-            if key:
-                system_messages[key] = val
-
-        # screen_registry
-        screen_rows = read_rows("screens.csv")
-        screen_registry = {}
-        for row in screen_rows:
-            screen_id = (row.get("screen_id") or "").strip()
-            if not screen_id:
-                continue
-            name = row.get("name") or ""
-            routes = split_list(row.get("routes") or "")
-            group = (row.get("group") or "").strip()
-            screen_registry[screen_id] = {
-                "name": name,
-                "routes": routes,
-                "group": group
-            }
-
-        # menus + options
-        menu_rows = read_rows("menus.csv")
-        menus = {}
-        temp_options = {}
-        for row in menu_rows:
-            menu_id = (row.get("menu_id") or "").strip()
-            if not menu_id:
-                continue
-            message = row.get("message") or ""
-            option_label = (row.get("option_label") or "").strip()
-            option_next = (row.get("option_next_state") or "").strip()
-            order_raw = (row.get("option_order") or "").strip()
-            try:
-                order = int(order_raw) if order_raw else 0
-            except ValueError:
-                order = 0
-
-            menu = menus.setdefault(menu_id, {"message": "", "options": []})
-            if message and not menu.get("message"):
-                menu["message"] = message
-
-            if option_label and option_next:
-                temp_options.setdefault(menu_id, []).append((order, {
-                    "label": option_label,
-                    "next_state": option_next
-                }))
-
-        for menu_id, opts in temp_options.items():
-            opts_sorted = sorted(opts, key=lambda x: x[0])
-            menus[menu_id]["options"] = [opt for _, opt in opts_sorted]
-
-        # content_items
-        content_rows = read_rows("content_items.csv")
-        content_items = {}
-        for row in content_rows:
-            item_id = (row.get("id") or "").strip()
-            if not item_id:
-                continue
-            title = row.get("title") or ""
-            body = row.get("body") or ""
-            category = (row.get("category") or "").strip()
-            screens = split_list(row.get("screens") or "")
-            keywords = split_list(row.get("keywords") or "")
-            priority_raw = (row.get("priority") or "").strip()
-            try:
-                priority = int(priority_raw) if priority_raw else 0
-            except ValueError:
-                priority = 0
-
-            content_items[item_id] = {
-                "title": title,
-                "body": body,
-                "category": category,
-                "screens": screens,
-                "keywords": keywords,
-                "links": [],
-                "related": [],
-                "priority": priority
-            }
-
-        # content_links (optional)
-        links_path = base_dir / "content_links.csv"
-        if links_path.exists():
-            link_rows = read_rows("content_links.csv")
-            for row in link_rows:
-                content_id = (row.get("content_id") or "").strip()
-                label = row.get("label") or ""
-                url = row.get("url") or ""
-                order_raw = (row.get("order") or "").strip()
-                try:
-                    order = int(order_raw) if order_raw else 0
-                except ValueError:
-                    order = 0
-                if content_id in content_items and label and url:
-                    content_items[content_id]["links"].append((order, {
-                        "label": label,
-                        "url": url
-                    }))
-            for item in content_items.values():
-                item["links"] = [l for _, l in sorted(item["links"], key=lambda x: x[0])]
-
-        # content_related (optional)
-        related_path = base_dir / "content_related.csv"
-        if related_path.exists():
-            related_rows = read_rows("content_related.csv")
-            for row in related_rows:
-                content_id = (row.get("content_id") or "").strip()
-                related_id = (row.get("related_id") or "").strip()
-                order_raw = (row.get("order") or "").strip()
-                try:
-                    order = int(order_raw) if order_raw else 0
-                except ValueError:
-                    order = 0
-                if content_id in content_items and related_id:
-                    content_items[content_id]["related"].append((order, related_id))
-            for item in content_items.values():
-                item["related"] = [rid for _, rid in sorted(item["related"], key=lambda x: x[0])]
-
+        
+        workers = max(1, min(config.CONTENT_CSV_WORKERS, len(jobs)))
+        if workers == 1:
+            parsed = {key: parse(path) for key, (parse, path) in jobs.items()}
+        else:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="content-csv") as pool:
+                futures = {key: pool.submit(parse, path) for key, (parse, path) in jobs.items()}
+                parsed = {key: future.result() for key, future in futures.items()}
+        
+        # リンク・関連コンテンツは order でソート済み（存在しないコンテンツへの行は捨てる）
+        content_items = parsed["content_items"]
+        for content_id, link in parsed.get("links", []):
+            item = content_items.get(content_id)
+            if item is not None:
+                item["links"].append(link)
+        for content_id, related_id in parsed.get("related", []):
+            item = content_items.get(content_id)
+            if item is not None:
+                item["related"].append(related_id)
+        
         return {
-            "meta": meta,
-            "screen_registry": screen_registry,
-            "system_messages": system_messages,
-            "menus": menus,
+            "meta": parsed["meta"],
+            "screen_registry": parsed["screen_registry"],
+            "system_messages": parsed["system_messages"],
+            "menus": parsed["menus"],
             "content_items": content_items
         }
     
-    def _validate(self) -> None:
+    def _validate(self, data: Dict[str, Any]) -> None:
         """参照整合性チェック"""
         errors = []
         
         # 必須セクションチェック
         required = ["screen_registry", "menus", "content_items", "system_messages"]
         for key in required:
-            if key not in self._data:
+            if key not in data:
                 errors.append(f"Missing required section: {key}")
         
         if errors:
             raise ContentValidationError("\n".join(errors))
         
-        # screen_registry の検証
-        valid_screens = set(self._data["screen_registry"].keys())
-        valid_screens.add("global")  # フォールバック用
+        # スキーマ検証（構造が正しいことを前提に以降の検証を行うため、違反があればここで失敗させる）
+        self._check_schema(data)
         
-        # menus の参照検証
-        valid_menus = set(self._data["menus"].keys())
-        for menu_id, menu in self._data["menus"].items():
-            for opt in menu.get("options", []):
-                next_state = opt.get("next_state", "")
-                if next_state.startswith("home:"):
-                    screen = next_state.split(":")[1]
-                    if screen not in valid_screens:
-                        errors.append(f"Menu '{menu_id}' references unknown screen: {screen}")
-                elif next_state.startswith("menu:"):
-                    ref_menu = next_state[5:]  # "menu:" を除去
-                    if f"menu:{ref_menu}" not in valid_menus and ref_menu not in valid_menus:
-                        errors.append(f"Menu '{menu_id}' references unknown menu: {next_state}")
-                elif next_state.startswith("ans:"):
-                    content_id = next_state[4:]  # "ans:" を除去
-                    if content_id not in self._data["content_items"]:
-                        errors.append(f"Menu '{menu_id}' references unknown content: {content_id}")
+        # menus の参照検証と状態グラフの検証
+        self._check_graph(data, errors)
         
         # content_items の検証
-        for item_id, item in self._data["content_items"].items():
+        for item_id, item in data["content_items"].items():
             if not item.get("title"):
                 errors.append(f"Content '{item_id}' missing title")
             if not item.get("body"):
@@ -244,26 +225,92 @@ class ContentRepository:
         
         logger.info("Content validation passed")
     
-    def _ensure_loaded(self) -> None:
-        if not self._loaded:
-            self.load()
+    def _check_schema(self, data: Dict[str, Any]) -> None:
+        """
+        SCHEMA_PATH のスキーマで検証する（スキーマは検証関数に変換し、ハッシュごとに使い回す）
+        
+        Args:
+            data: 読み込んだコンテンツ
+        """
+        schema_path = Path(config.SCHEMA_PATH)
+        if not schema_path.exists():
+            logger.warning(f"Schema file not found, skipping schema validation: {schema_path}")
+            return
+        start = time.perf_counter()
+        try:
+            digest, validator = get_validator(schema_path)
+        except (OSError, SchemaError) as e:
+            raise ContentValidationError(f"Invalid content schema {schema_path}: {e}")
+        errors = validator(data)
+        if errors:
+            shown = errors[:MAX_SCHEMA_ERRORS]
+            if len(errors) > MAX_SCHEMA_ERRORS:
+                shown.append(f"... {len(errors) - MAX_SCHEMA_ERRORS} more")
+            raise ContentValidationError("Schema validation errors:\n" + "\n".join(shown))
+        logger.info(
+            f"Content schema checked: {digest[:12]} ({(time.perf_counter() - start) * 1000:.1f} ms)"
+        )
+    
+    def _check_graph(self, data: Dict[str, Any], errors: List[str]) -> None:
+        """
+        状態グラフを検証する（参照切れは errors に追加し、その他の指摘は CONTENT_GRAPH_CHECK に従う）
+        
+        Args:
+            data: screen_registry・menus・content_items（related / related_auto のみ参照）
+            errors: 検証エラーの一覧（追加する）
+        """
+        report = analyze_graph(data)
+        errors.extend(report.errors)
+        if report.warnings:
+            if config.CONTENT_GRAPH_CHECK.lower() == "strict":
+                errors.extend(report.warnings)
+            else:
+                for warning in report.warnings[:MAX_GRAPH_WARNINGS]:
+                    logger.warning(f"Content graph: {warning}")
+                if len(report.warnings) > MAX_GRAPH_WARNINGS:
+                    logger.warning(
+                        f"Content graph: {len(report.warnings) - MAX_GRAPH_WARNINGS} more warnings "
+                        f"(run contents/check_graph.py for the full list)"
+                    )
+        stats = report.stats
+        logger.info(
+            f"Content graph checked: {stats['states']} states, {stats['edges']} edges, "
+            f"{len(report.warnings)} warnings ({stats['elapsed_ms']} ms)"
+        )
+    
+    def _build_screen_lookup(self, data: Dict[str, Any]) -> tuple:
+        """画面別コンテンツ一覧を事前計算（画面ID → コンテンツID, 画面指定なしのコンテンツID）"""
+        screen_contents: Dict[str, List[str]] = {}
+        unscoped: List[str] = []
+        all_screens = set(data["screen_registry"].keys())
+        for item in data["content_items"].values():
+            all_screens.update(item.get("screens", []))
+        for screen_id in all_screens:
+            screen_contents[screen_id] = []
+        
+        for item_id, item in data["content_items"].items():
+            screens = item.get("screens", [])
+            targets = screens if screens else all_screens
+            for screen_id in targets:
+                screen_contents[screen_id].append(item_id)
+            if not screens:
+                unscoped.append(item_id)
+        
+        return screen_contents, unscoped
     
     # === Screen Registry ===
     
     def get_screen(self, screen_id: str) -> Optional[Dict[str, Any]]:
         """画面情報を取得"""
-        self._ensure_loaded()
-        return self._data["screen_registry"].get(screen_id)
+        return self.snapshot().data["screen_registry"].get(screen_id)
     
     def get_valid_screens(self) -> List[str]:
         """有効な画面ID一覧"""
-        self._ensure_loaded()
-        return list(self._data["screen_registry"].keys())
+        return list(self.snapshot().data["screen_registry"].keys())
     
     def resolve_screen_id(self, screen_id: str) -> str:
         """screen_id を検証し、不明なら global にフォールバック"""
-        self._ensure_loaded()
-        if screen_id in self._data["screen_registry"]:
+        if screen_id in self.snapshot().data["screen_registry"]:
             return screen_id
         logger.warning(f"Unknown screen_id: {screen_id}, falling back to 'global'")
         return "global"
@@ -272,57 +319,222 @@ class ContentRepository:
     
     def get_menu(self, menu_id: str) -> Optional[Dict[str, Any]]:
         """メニューを取得"""
-        self._ensure_loaded()
-        return self._data["menus"].get(menu_id)
+        return self.snapshot().data["menus"].get(menu_id)
     
     def get_home_menu(self, screen_id: str) -> Optional[Dict[str, Any]]:
         """画面のホームメニューを取得"""
-        self._ensure_loaded()
         home_key = f"home:{screen_id}"
-        return self._data["menus"].get(home_key)
+        return self.snapshot().data["menus"].get(home_key)
     
     # === Content Items ===
     
     def get_content(self, content_id: str) -> Optional[Dict[str, Any]]:
         """コンテンツを取得"""
-        self._ensure_loaded()
-        return self._data["content_items"].get(content_id)
+        return self.snapshot().data["content_items"].get(content_id)
+    
+    def get_related(self, content_id: str, limit: int = 3) -> List[Dict[str, Any]]:
+        """
+        関連コンテンツ（手動設定の related を優先し、残りを自動算出の related_auto で補う）
+
+        Returns:
+            {"id": ..., **アイテム} の一覧（存在しないID・自身・重複は除く）
+        """
+        items = self.snapshot().data["content_items"]
+        item = items.get(content_id)
+        if not item:
+            return []
+        related = []
+        seen = {content_id}
+        for related_id in item.get("related", []) + item.get("related_auto", []):
+            if related_id in seen or related_id not in items:
+                continue
+            seen.add(related_id)
+            related.append({"id": related_id, **items[related_id]})
+            if len(related) >= limit:
+                break
+        return related
     
     def get_contents_by_screen(self, screen_id: str) -> List[Dict[str, Any]]:
         """画面に関連するコンテンツ一覧"""
-        self._ensure_loaded()
-        result = []
-        for item_id, item in self._data["content_items"].items():
-            screens = item.get("screens", [])
-            if not screens or screen_id in screens:
-                result.append({"id": item_id, **item})
-        return result
+        snapshot = self.snapshot()
+        items = snapshot.data["content_items"]
+        item_ids = snapshot.screen_contents.get(screen_id, snapshot.unscoped_contents)
+        return [{"id": item_id, **items[item_id]} for item_id in item_ids]
     
     def get_all_contents(self) -> Dict[str, Dict[str, Any]]:
         """全コンテンツを取得"""
-        self._ensure_loaded()
-        return self._data["content_items"]
+        return self.snapshot().data["content_items"]
     
     # === System Messages ===
     
     def get_system_message(self, key: str) -> str:
         """システムメッセージを取得"""
-        self._ensure_loaded()
-        return self._data["system_messages"].get(key, "")
+        return self.snapshot().data["system_messages"].get(key, "")
+    
+    # === Meta ===
+    
+    def get_version(self) -> str:
+        """コンテンツバージョン（meta.version）"""
+        return self.snapshot().data.get("meta", {}).get("version", "unknown")
     
     # === Search Config ===
     
     def get_search_config(self) -> Dict[str, Any]:
         """検索設定を取得"""
-        self._ensure_loaded()
-        return self._data.get("search_config", {
+        data = self.snapshot().data
+        if "search_config" in data:
+            return data["search_config"]
+        return self._default_search_config()
+    
+    @staticmethod
+    def _default_search_config() -> Dict[str, Any]:
+        """search_config がない場合の検索設定"""
+        return {
             "enabled": True,
             "min_query_length": 2,
             "max_results": 5,
             "synonyms": {},
             "stopwords": []
-        })
+        }
+
+
+def create_content_repository() -> ContentRepository:
+    """CONTENT_SOURCE に応じたリポジトリ（sqlite の場合のみ SQLite 実装を読み込む）"""
+    if config.CONTENT_SOURCE.lower() == "sqlite":
+        from content_sqlite import SqliteContentRepository
+        return SqliteContentRepository()
+    return ContentRepository()
+
+
+# === CSV 読み込み（ContentRepository._load_from_csv） ===
+
+def _iter_csv(path: Path, columns: List[str]) -> Iterator[tuple]:
+    """CSV の指定列を1行ずつ返す（ヘッダにない列・行に足りない列は空文字）"""
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        width = len(header)
+        # ヘッダにない列は、各行の末尾に足す空文字を指す
+        getter = itemgetter(*[header.index(c) if c in header else width for c in columns])
+        padding = [""] * (width + 1)
+        for row in reader:
+            if len(row) != width:
+                row = row[:width] + padding[len(row):width]
+            row.append("")
+            yield getter(row)
+
+
+def _to_int(value: str) -> int:
+    value = value.strip()
+    try:
+        return int(value) if value else 0
+    except ValueError:
+        return 0
+
+
+def _split_list(value: str) -> List[str]:
+    if not value:
+        return []
+    return [v.strip() for v in value.split("|") if v.strip()]
+
+
+def _parse_meta(path: Path) -> Dict[str, str]:
+    meta = {}
+    for key, value in _iter_csv(path, ["key", "value"]):
+        key = key.strip()
+        if key:
+            meta[key] = value.strip()
+    return meta
+
+
+def _parse_system_messages(path: Path) -> Dict[str, str]:
+    system_messages = {}
+    for key, value in _iter_csv(path, ["key", "value"]):
+        key = key.strip()
+        if key:
+            system_messages[key] = value
+    return system_messages
+
+
+def _parse_screens(path: Path) -> Dict[str, Any]:
+    screen_registry = {}
+    for screen_id, name, routes, group in _iter_csv(path, ["screen_id", "name", "routes", "group"]):
+        screen_id = screen_id.strip()
+        if not screen_id:
+            continue
+        screen_registry[screen_id] = {
+            "name": name,
+            "routes": _split_list(routes),
+            "group": group.strip()
+        }
+    return screen_registry
+
+
+def _parse_menus(path: Path) -> Dict[str, Any]:
+    menus = {}
+    options = []
+    columns = ["menu_id", "message", "option_label", "option_next_state", "option_order"]
+    for menu_id, message, label, next_state, order in _iter_csv(path, columns):
+        menu_id = menu_id.strip()
+        if not menu_id:
+            continue
+        menu = menus.get(menu_id)
+        if menu is None:
+            menu = menus[menu_id] = {"message": "", "options": []}
+        if message and not menu["message"]:
+            menu["message"] = message
+        label = label.strip()
+        next_state = next_state.strip()
+        if label and next_state:
+            options.append((_to_int(order), menu, {"label": label, "next_state": next_state}))
+    options.sort(key=itemgetter(0))
+    for _, menu, option in options:
+        menu["options"].append(option)
+    return menus
+
+
+def _parse_content_items(path: Path) -> Dict[str, Any]:
+    content_items = {}
+    columns = ["id", "title", "body", "category", "screens", "keywords", "priority"]
+    for item_id, title, body, category, screens, keywords, priority in _iter_csv(path, columns):
+        item_id = item_id.strip()
+        if not item_id:
+            continue
+        content_items[item_id] = {
+            "title": title,
+            "body": body,
+            "category": category.strip(),
+            "screens": _split_list(screens),
+            "keywords": _split_list(keywords),
+            "links": [],
+            "related": [],
+            "priority": _to_int(priority)
+        }
+    return content_items
+
+
+def _parse_links(path: Path) -> List[Tuple[str, Dict[str, str]]]:
+    """(コンテンツID, リンク) を order 順に返す（同じ order は行順）"""
+    links = []
+    for content_id, label, url, order in _iter_csv(path, ["content_id", "label", "url", "order"]):
+        content_id = content_id.strip()
+        if content_id and label and url:
+            links.append((_to_int(order), content_id, {"label": label, "url": url}))
+    links.sort(key=itemgetter(0))
+    return [(content_id, link) for _, content_id, link in links]
+
+
+def _parse_related(path: Path) -> List[Tuple[str, str]]:
+    """(コンテンツID, 関連コンテンツID) を order 順に返す（同じ order は行順）"""
+    related = []
+    for content_id, related_id, order in _iter_csv(path, ["content_id", "related_id", "order"]):
+        content_id = content_id.strip()
+        related_id = related_id.strip()
+        if content_id and related_id:
+            related.append((_to_int(order), content_id, related_id))
+    related.sort(key=itemgetter(0))
+    return [(content_id, related_id) for _, content_id, related_id in related]
 
 
 # シングルトンインスタンス
-content_repo = ContentRepository()
+content_repo = create_content_repository()
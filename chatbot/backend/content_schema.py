@@ -0,0 +1,329 @@
+# コンテンツの JSON Schema 検証
+# contents.schema.json（SCHEMA_PATH）を一度だけ Python の検証関数に変換し、スキーマのハッシュごとに保持する。
+# 検証時はスキーマを解釈せず、生成した関数がコンテンツをたどる（エラーがない場合はパスの文字列も作らない）
+#
+# 対応するキーワード（draft-07 のうち contents.schema.json で使うもの）:
+#   type / enum / const / required / properties / additionalProperties / minProperties / maxProperties /
+#   items / minItems / maxItems / minLength / maxLength / pattern / minimum / maximum /
+#   exclusiveMinimum / exclusiveMaximum
+# format・title などの注釈は検証しない。それ以外（$ref・allOf など）を含むスキーマは SchemaError
+
+import gc
+import re
+import json
+import hashlib
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+# 生成した検証関数: コンテンツ → エラーメッセージ（"パス: 内容"）の一覧
+Validator = Callable[[Any], List[str]]
+
+_ANNOTATIONS = {"$schema", "$id", "$comment", "title", "description", "default", "examples", "format"}
+_OBJECT_KEYWORDS = {"required", "properties", "additionalProperties", "minProperties", "maxProperties"}
+_ARRAY_KEYWORDS = {"items", "minItems", "maxItems"}
+_STRING_KEYWORDS = {"minLength", "maxLength", "pattern"}
+_NUMBER_KEYWORDS = {"minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum"}
+_SUPPORTED = (
+    _ANNOTATIONS | _OBJECT_KEYWORDS | _ARRAY_KEYWORDS | _STRING_KEYWORDS | _NUMBER_KEYWORDS
+    | {"type", "enum", "const"}
+)
+
+# JSON の型 → 値の判定式（{v} は検証する変数、bool は integer / number に含めない）
+_TYPE_CHECKS = {
+    "object": "type({v}) is dict",
+    "array": "type({v}) is list",
+    "string": "type({v}) is str",
+    "integer": "(type({v}) is int or (type({v}) is float and {v}.is_integer()))",
+    "number": "type({v}) in (int, float)",
+    "boolean": "type({v}) is bool",
+    "null": "{v} is None",
+}
+# 型ごとのキーワード（type の判定が通った場合のみ適用）
+_KEYWORDS_BY_TYPE = [
+    ("object", _OBJECT_KEYWORDS),
+    ("array", _ARRAY_KEYWORDS),
+    ("string", _STRING_KEYWORDS),
+    ("number", _NUMBER_KEYWORDS),
+]
+# ループ（properties 以外の子要素）の入れ子の上限（Python の静的なブロックの入れ子は 20 まで）
+_MAX_LOOP_DEPTH = 15
+
+_validators: Dict[str, Validator] = {}
+_lock = threading.Lock()
+
+
+class SchemaError(Exception):
+    """スキーマを検証関数に変換できない（未対応のキーワード・不正な値）"""
+    pass
+
+
+def schema_hash(path: Path) -> str:
+    """スキーマファイルの SHA-256"""
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
+
+
+def get_validator(path: Path) -> Tuple[str, Validator]:
+    """
+    スキーマファイルの検証関数を取得する（ハッシュが同じなら変換済みの関数を再利用する）
+
+    Returns:
+        (スキーマのハッシュ, 検証関数)
+
+    Raises:
+        OSError: ファイルが読めない
+        SchemaError: スキーマが不正・未対応のキーワードを含む
+    """
+    raw = Path(path).read_bytes()
+    digest = hashlib.sha256(raw).hexdigest()
+    validator = _validators.get(digest)
+    if validator is None:
+        with _lock:
+            validator = _validators.get(digest)
+            if validator is None:
+                try:
+                    schema = json.loads(raw.decode("utf-8"))
+                except ValueError as e:
+                    raise SchemaError(f"invalid JSON: {e}")
+                validator = _validators[digest] = compile_schema(schema)
+    return digest, validator
+
+
+def compile_schema(schema: Any) -> Validator:
+    """スキーマを検証関数に変換する"""
+    compiler = _Compiler()
+    compiler.node(schema, "v0", "", 1, 0)
+    source = "def validate(v0):\n    errors = []\n" + "\n".join(compiler.lines) + "\n    return errors\n"
+    namespace = dict(compiler.constants)
+    exec(compile(source, "<content schema>", "exec"), namespace)
+    validate = namespace["validate"]
+
+    def validator(data: Any) -> List[str]:
+        # 検証中は循環 GC を止める（反復のたびに大量のコンテンツを走査しない）
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return validate(data)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    validator.source = source
+    return validator
+
+
+def _literal(text: str) -> str:
+    """f-string に埋め込む固定文字列（波括弧をエスケープ）"""
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+class _Compiler:
+    """スキーマを1つの関数のソースに変換する（ノードごとに判定をその場に展開する）"""
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self.constants: Dict[str, Any] = {"_MISSING": object(), "_json_key": _json_key}
+        self._counter = 0
+
+    def var(self, prefix: str) -> str:
+        self._counter += 1
+        return f"{prefix}{self._counter}"
+
+    def constant(self, value: Any) -> str:
+        name = self.var("C")
+        self.constants[name] = value
+        return name
+
+    def emit(self, indent: int, line: str) -> None:
+        self.lines.append("    " * indent + line)
+
+    def close_block(self, start: int, indent: int) -> None:
+        """start 以降に何も出力していなければ空のブロックを閉じる"""
+        if len(self.lines) == start:
+            self.emit(indent, "pass")
+
+    def error(self, indent: int, path: str, message: str) -> None:
+        """エラーの追加（path は f-string の断片、message は固定文字列または f-string の断片）"""
+        self.emit(indent, f"errors.append(f{(path or '(root)') + ': ' + message!r})")
+
+    def node(self, schema: Any, v: str, path: str, indent: int, loops: int) -> None:
+        """値 v をスキーマで検証するコードを出力する"""
+        if schema is True or schema == {}:
+            return
+        if schema is False:
+            self.error(indent, path, "is not allowed")
+            return
+        if not isinstance(schema, dict):
+            raise SchemaError(f"{path or '(root)'}: schema must be an object or boolean")
+        unsupported = sorted(set(schema) - _SUPPORTED)
+        if unsupported:
+            raise SchemaError(f"{path or '(root)'}: unsupported keywords {', '.join(unsupported)}")
+
+        if "enum" in schema:
+            values = list(schema["enum"])
+            keys = self.constant(frozenset(_json_key(value) for value in values))
+            self.emit(indent, f"if _json_key({v}) not in {keys}:")
+            self.error(indent + 1, path, _literal(f"must be one of {values!r}"))
+        if "const" in schema:
+            self.emit(indent, f"if _json_key({v}) != {self.constant(_json_key(schema['const']))}:")
+            self.error(indent + 1, path, _literal(f"must be {schema['const']!r}"))
+
+        types = schema.get("type")
+        if types is None:
+            # 型の指定がない場合、型ごとのキーワードは該当する型の値にのみ適用する
+            for json_type, keywords in _KEYWORDS_BY_TYPE:
+                if keywords & set(schema):
+                    self.emit(indent, f"if {_TYPE_CHECKS[json_type].format(v=v)}:")
+                    self._typed(json_type, schema, v, path, indent + 1, loops)
+            return
+
+        types = [types] if isinstance(types, str) else list(types)
+        unknown = [t for t in types if t not in _TYPE_CHECKS]
+        if unknown:
+            raise SchemaError(f"{path or '(root)'}: unknown type {', '.join(unknown)}")
+        condition = " or ".join(_TYPE_CHECKS[t].format(v=v) for t in types)
+        self.emit(indent, f"if not ({condition}):")
+        self.error(indent + 1, path, _literal(f"must be {' or '.join(types)}") + f", got {{type({v}).__name__}}")
+        groups = [
+            (json_type, keywords) for json_type, keywords in _KEYWORDS_BY_TYPE
+            if keywords & set(schema)
+            and (json_type in types or (json_type == "number" and "integer" in types))
+        ]
+        if not groups:
+            return
+        self.emit(indent, "else:")
+        for json_type, _ in groups:
+            if len(types) == 1:
+                self._typed(json_type, schema, v, path, indent + 1, loops)
+            else:
+                self.emit(indent + 1, f"if {_TYPE_CHECKS[json_type].format(v=v)}:")
+                self._typed(json_type, schema, v, path, indent + 2, loops)
+
+    def _typed(self, json_type: str, schema: Dict[str, Any], v: str, path: str, indent: int, loops: int) -> None:
+        """型が一致した値 v に型ごとのキーワードを適用するコードを出力する"""
+        start = len(self.lines)
+        if json_type == "object":
+            self._object(schema, v, path, indent, loops)
+        elif json_type == "array":
+            self._array(schema, v, path, indent, loops)
+        elif json_type == "string":
+            self._string(schema, v, path, indent)
+        else:
+            self._number(schema, v, path, indent)
+        self.close_block(start, indent)
+
+    def _object(self, schema: Dict[str, Any], v: str, path: str, indent: int, loops: int) -> None:
+        for key in schema.get("required", []):
+            self.emit(indent, f"if {key!r} not in {v}:")
+            self.error(indent + 1, path, _literal(f"missing required property {key!r}"))
+        if "minProperties" in schema:
+            self.emit(indent, f"if len({v}) < {int(schema['minProperties'])}:")
+            self.error(indent + 1, path, _literal(f"must have at least {schema['minProperties']} properties"))
+        if "maxProperties" in schema:
+            self.emit(indent, f"if len({v}) > {int(schema['maxProperties'])}:")
+            self.error(indent + 1, path, _literal(f"must have at most {schema['maxProperties']} properties"))
+
+        properties = schema.get("properties", {})
+        for key, subschema in properties.items():
+            if subschema is True or subschema == {}:
+                continue
+            child = self.var("v")
+            self.emit(indent, f"{child} = {v}.get({key!r}, _MISSING)")
+            self.emit(indent, f"if {child} is not _MISSING:")
+            start = len(self.lines)
+            self.node(subschema, child, _join(path, _literal(key)), indent + 1, loops)
+            self.close_block(start, indent + 1)
+
+        additional = schema.get("additionalProperties", True)
+        if additional is True or additional == {}:
+            return
+        if loops >= _MAX_LOOP_DEPTH:
+            raise SchemaError(f"{path or '(root)'}: schema is nested too deeply")
+        key_var, child = self.var("k"), self.var("v")
+        known = self.constant(frozenset(properties))
+        self.emit(indent, f"for {key_var}, {child} in {v}.items():")
+        if properties:
+            self.emit(indent + 1, f"if {key_var} in {known}:")
+            self.emit(indent + 2, "continue")
+        if additional is False:
+            self.error(indent + 1, path, f"unexpected property {{{key_var}!r}}")
+        else:
+            start = len(self.lines)
+            self.node(additional, child, _join(path, f"{{{key_var}}}"), indent + 1, loops + 1)
+            self.close_block(start, indent + 1)
+
+    def _array(self, schema: Dict[str, Any], v: str, path: str, indent: int, loops: int) -> None:
+        if "minItems" in schema:
+            self.emit(indent, f"if len({v}) < {int(schema['minItems'])}:")
+            self.error(indent + 1, path, _literal(f"must have at least {schema['minItems']} items"))
+        if "maxItems" in schema:
+            self.emit(indent, f"if len({v}) > {int(schema['maxItems'])}:")
+            self.error(indent + 1, path, _literal(f"must have at most {schema['maxItems']} items"))
+        items = schema.get("items", True)
+        if items is True or items == {}:
+            return
+        if isinstance(items, list):
+            raise SchemaError(f"{path or '(root)'}: tuple-form items is not supported")
+        if loops >= _MAX_LOOP_DEPTH:
+            raise SchemaError(f"{path or '(root)'}: schema is nested too deeply")
+        index, child = self.var("i"), self.var("v")
+        # 型だけの要素（文字列の一覧など）は添字なしで判定し、違反がある場合だけ添字付きで走査し直す
+        type_only = (
+            isinstance(items, dict) and set(items) - _ANNOTATIONS == {"type"}
+            and isinstance(items["type"], str) and items["type"] in _TYPE_CHECKS
+        )
+        if type_only:
+            self.emit(indent, f"for {child} in {v}:")
+            self.emit(indent + 1, f"if not ({_TYPE_CHECKS[items['type']].format(v=child)}):")
+            indent += 2
+        self.emit(indent, f"for {index}, {child} in enumerate({v}):")
+        start = len(self.lines)
+        self.node(items, child, _join(path, f"{{{index}}}"), indent + 1, loops + 1)
+        self.close_block(start, indent + 1)
+        if type_only:
+            self.emit(indent, "break")
+
+    def _string(self, schema: Dict[str, Any], v: str, path: str, indent: int) -> None:
+        if "minLength" in schema:
+            self.emit(indent, f"if len({v}) < {int(schema['minLength'])}:")
+            self.error(indent + 1, path, _literal(f"must be at least {schema['minLength']} characters"))
+        if "maxLength" in schema:
+            self.emit(indent, f"if len({v}) > {int(schema['maxLength'])}:")
+            self.error(indent + 1, path, _literal(f"must be at most {schema['maxLength']} characters"))
+        if "pattern" in schema:
+            try:
+                pattern = self.constant(re.compile(schema["pattern"]))
+            except re.error as e:
+                raise SchemaError(f"{path or '(root)'}: invalid pattern {schema['pattern']!r}: {e}")
+            self.emit(indent, f"if {pattern}.search({v}) is None:")
+            self.error(indent + 1, path, _literal(f"must match {schema['pattern']!r}") + f", got {{{v}!r}}")
+
+    def _number(self, schema: Dict[str, Any], v: str, path: str, indent: int) -> None:
+        for keyword, operator, message in (
+            ("minimum", "<", "must be >= {}"),
+            ("maximum", ">", "must be <= {}"),
+            ("exclusiveMinimum", "<=", "must be > {}"),
+            ("exclusiveMaximum", ">=", "must be < {}"),
+        ):
+            if keyword in schema:
+                limit = schema[keyword]
+                if type(limit) not in (int, float):
+                    raise SchemaError(f"{path or '(root)'}: {keyword} must be a number")
+                self.emit(indent, f"if {v} {operator} {limit!r}:")
+                self.error(indent + 1, path, _literal(message.format(limit)) + f", got {{{v}!r}}")
+
+
+def _json_key(value: Any) -> Any:
+    """enum / const の比較用のキー（JSON の等価性: true と 1 は別の値、1 と 1.0 は同じ値）"""
+    if type(value) is bool:
+        return ("bool", value)
+    if type(value) is list:
+        return ("array", tuple(_json_key(x) for x in value))
+    if type(value) is dict:
+        return ("object", frozenset((k, _json_key(x)) for k, x in value.items()))
+    return value
+
+
+def _join(path: str, key: str) -> str:
+    """エラーメッセージのパス（"content_items/item_001/title" の形式）"""
+    return f"{path}/{key}" if path else key
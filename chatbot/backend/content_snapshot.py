@@ -0,0 +1,135 @@
+# コンテンツスナップショットの保存形式
+# 検証済みのコンテンツと画面別の一覧を pickle（protocol 5）で1ファイルに書き出し、
+# 起動時は読み込み元ファイルのハッシュが一致する場合のみ、解析・検証を省いて復元する
+#
+# ファイル構成:
+#   マジック(8) | ヘッダ長(u32) | ヘッダ（JSON） | pickle
+# ヘッダ: {"format", "meta": {"source", "source_hash", "version", "items"}}
+
+import gc
+import json
+import hashlib
+import logging
+import os
+import pickle
+import struct
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"HCSNAP\x00\x01"
+# 保存形式のバージョン（スナップショットに含める値の構造を変えたら上げる）
+FORMAT_VERSION = 1
+
+_HASH_CHUNK = 1 << 20
+
+# (コンテンツ, 画面ID → コンテンツID, 画面指定なしのコンテンツID)
+SnapshotPayload = Tuple[Dict[str, Any], Dict[str, List[str]], List[str]]
+
+
+class SnapshotError(Exception):
+    """スナップショットが読み込めない（形式・バージョン不一致など）"""
+    pass
+
+
+def source_hash(paths: List[Path]) -> str:
+    """読み込み元ファイルの SHA-256（ファイル名と内容、paths の順）"""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(path.name.encode("utf-8") + b"\x00")
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(_HASH_CHUNK)
+                if not chunk:
+                    break
+                digest.update(chunk)
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+def _share_strings(value: Any, strings: Dict[str, str]) -> Any:
+    """同じ文字列を1つのオブジェクトにまとめる（pickle が参照として書き出し、読み込み時に作り直さない）"""
+    if isinstance(value, str):
+        return strings.setdefault(value, value)
+    if isinstance(value, dict):
+        return {_share_strings(k, strings): _share_strings(v, strings) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_share_strings(v, strings) for v in value]
+    if isinstance(value, tuple):
+        return tuple(_share_strings(v, strings) for v in value)
+    return value
+
+
+def write_snapshot(path: Path, payload: SnapshotPayload, meta: Dict[str, Any]) -> int:
+    """
+    スナップショットを書き出す（一時ファイルに書いてから置き換える）
+
+    Args:
+        path: 出力先
+        payload: 検証済みのコンテンツと画面別の一覧
+        meta: 読み込み時に照合するメタ情報（読み込み元・ハッシュなど）
+
+    Returns:
+        ファイルサイズ（バイト）
+    """
+    path = Path(path)
+    body = pickle.dumps(_share_strings(payload, {}), protocol=5)
+    header = json.dumps({"format": FORMAT_VERSION, "meta": meta}, ensure_ascii=False).encode("utf-8")
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        f.write(body)
+    os.replace(tmp, path)
+    return path.stat().st_size
+
+
+def _read_header(f) -> Dict[str, Any]:
+    if f.read(len(MAGIC)) != MAGIC:
+        raise SnapshotError("not a content snapshot")
+    (length,) = struct.unpack("<I", f.read(4))
+    header = json.loads(f.read(length).decode("utf-8"))
+    if header.get("format") != FORMAT_VERSION:
+        raise SnapshotError(f"format {header.get('format')} is not supported (expected {FORMAT_VERSION})")
+    return header
+
+
+def open_snapshot(path: Path, expected: Dict[str, Any]) -> Optional[SnapshotPayload]:
+    """
+    スナップショットを読み込む（ファイルがない・メタ情報が一致しない場合は None）
+
+    Args:
+        path: スナップショットファイル
+        expected: 一致すべきメタ情報（読み込み元の種類・ハッシュ）
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+    try:
+        with open(path, "rb") as f:
+            meta = _read_header(f).get("meta", {})
+            for key, value in expected.items():
+                if meta.get(key) != value:
+                    logger.warning(
+                        f"Content snapshot {path} ignored: {key} mismatch "
+                        f"(snapshot {meta.get(key)!r}, contents {value!r})"
+                    )
+                    return None
+            body = f.read()
+    except (OSError, ValueError, struct.error, SnapshotError) as e:
+        logger.warning(f"Content snapshot {path} ignored: {e}")
+        return None
+    # 大量のコンテナを作る間は循環 GC を止める（作成中のオブジェクトを何度も走査しない）
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        payload = pickle.loads(body)
+    except Exception as e:
+        logger.warning(f"Content snapshot {path} ignored: {e}")
+        return None
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return payload
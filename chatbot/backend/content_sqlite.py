@@ -0,0 +1,428 @@
+# SQLite コンテンツソース
+# contents.db（contents/build_sqlite.py で作成）から画面・メニュー・コンテンツを都度クエリで読む
+# カタログ全体をメモリに持たないため、複数ワーカーが1つのファイルを共有できる（CONTENT_SOURCE=sqlite）
+
+import os
+import json
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+from config import config
+from content_repo import ContentRepository, ContentValidationError
+from normalizer import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# テーブル定義（contents.rowid はコンテンツの定義順）
+SCHEMA = """
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE system_messages (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE screens (
+    screen_id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    routes TEXT NOT NULL,
+    screen_group TEXT
+) WITHOUT ROWID;
+CREATE TABLE menus (
+    menu_id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    message TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE menu_options (
+    menu_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    label TEXT NOT NULL,
+    next_state TEXT NOT NULL,
+    PRIMARY KEY (menu_id, position)
+) WITHOUT ROWID;
+CREATE TABLE contents (
+    rowid INTEGER PRIMARY KEY,
+    item_id TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    body TEXT NOT NULL,
+    category TEXT NOT NULL,
+    priority INTEGER NOT NULL,
+    unscoped INTEGER NOT NULL,
+    extra TEXT
+);
+CREATE INDEX contents_category ON contents (category);
+CREATE INDEX contents_priority ON contents (priority);
+CREATE TABLE content_screens (
+    item_rowid INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    screen_id TEXT NOT NULL,
+    PRIMARY KEY (item_rowid, position)
+) WITHOUT ROWID;
+CREATE INDEX content_screens_screen ON content_screens (screen_id, item_rowid);
+CREATE TABLE content_keywords (
+    item_rowid INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    keyword TEXT NOT NULL,
+    keyword_norm TEXT NOT NULL,
+    PRIMARY KEY (item_rowid, position)
+) WITHOUT ROWID;
+CREATE INDEX content_keywords_norm ON content_keywords (keyword_norm, item_rowid);
+CREATE TABLE content_links (
+    item_rowid INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    label TEXT NOT NULL,
+    url TEXT NOT NULL,
+    PRIMARY KEY (item_rowid, position)
+) WITHOUT ROWID;
+CREATE TABLE content_related (
+    item_rowid INTEGER NOT NULL,
+    auto INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    related_id TEXT NOT NULL,
+    PRIMARY KEY (item_rowid, auto, position)
+) WITHOUT ROWID;
+CREATE TABLE search_config (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+"""
+
+# contents の列・子テーブルで持つアイテムのキー（それ以外は extra に JSON で保持）
+ITEM_FIELDS = {"title", "body", "category", "priority", "screens", "keywords", "links", "related", "related_auto"}
+
+# 取得時のアイテムの列
+_ITEM_COLUMNS = "rowid, item_id, title, body, category, priority, extra"
+
+
+def write_database(data: Dict[str, Any], path: Path, search_tables: bool = True) -> Dict[str, int]:
+    """
+    コンテンツ（contents.json と同じ構造）を SQLite ファイルに書き出す
+
+    一時ファイルに書き込んでから置き換えるため、稼働中のワーカーは書き込み途中のファイルを読まない。
+
+    Args:
+        data: コンテンツ
+        path: 出力先
+        search_tables: FTS5 検索用のテーブルも作成する（SEARCH_ENGINE=fts5 用）
+
+    Returns:
+        {"items", "bytes"}
+    """
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    if tmp.exists():
+        tmp.unlink()
+    conn = sqlite3.connect(str(tmp))
+    try:
+        conn.executescript(SCHEMA)
+        if search_tables:
+            from search_fts_index import SEARCH_SCHEMA, write_search_tables
+            conn.executescript(SEARCH_SCHEMA)
+        with conn:
+            _write_rows(conn, data)
+            if search_tables:
+                write_search_tables(conn, data)
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+    os.replace(tmp, path)
+    return {"items": len(data.get("content_items", {})), "bytes": path.stat().st_size}
+
+
+def _write_rows(conn: sqlite3.Connection, data: Dict[str, Any]) -> None:
+    conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+        (key, json.dumps(value, ensure_ascii=False)) for key, value in data.get("meta", {}).items()
+    ])
+    conn.executemany("INSERT INTO system_messages VALUES (?, ?)", data.get("system_messages", {}).items())
+    conn.executemany("INSERT INTO screens VALUES (?, ?, ?, ?, ?)", [
+        (screen_id, i, screen.get("name", ""), json.dumps(screen.get("routes", []), ensure_ascii=False),
+         screen.get("group"))
+        for i, (screen_id, screen) in enumerate(data.get("screen_registry", {}).items())
+    ])
+    for i, (menu_id, menu) in enumerate(data.get("menus", {}).items()):
+        conn.execute("INSERT INTO menus VALUES (?, ?, ?)", (menu_id, i, menu.get("message", "")))
+        conn.executemany("INSERT INTO menu_options VALUES (?, ?, ?, ?)", [
+            (menu_id, j, opt.get("label", ""), opt.get("next_state", ""))
+            for j, opt in enumerate(menu.get("options", []))
+        ])
+    for rowid, (item_id, item) in enumerate(data.get("content_items", {}).items(), 1):
+        extra = {key: value for key, value in item.items() if key not in ITEM_FIELDS}
+        screens = item.get("screens", [])
+        conn.execute("INSERT INTO contents VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (
+            rowid, item_id, item.get("title", ""), item.get("body", ""), item.get("category", ""),
+            item.get("priority", 50), int(not screens),
+            json.dumps(extra, ensure_ascii=False) if extra else None
+        ))
+        conn.executemany("INSERT INTO content_screens VALUES (?, ?, ?)", [
+            (rowid, j, screen_id) for j, screen_id in enumerate(screens)
+        ])
+        conn.executemany("INSERT INTO content_keywords VALUES (?, ?, ?, ?)", [
+            (rowid, j, kw, normalize_text(kw)) for j, kw in enumerate(item.get("keywords", []))
+        ])
+        conn.executemany("INSERT INTO content_links VALUES (?, ?, ?, ?)", [
+            (rowid, j, link.get("label", ""), link.get("url", "")) for j, link in enumerate(item.get("links", []))
+        ])
+        for auto, key in enumerate(("related", "related_auto")):
+            conn.executemany("INSERT INTO content_related VALUES (?, ?, ?, ?)", [
+                (rowid, auto, j, related_id) for j, related_id in enumerate(item.get(key, []))
+            ])
+    conn.executemany("INSERT INTO search_config VALUES (?, ?)", [
+        (key, json.dumps(value, ensure_ascii=False)) for key, value in data.get("search_config", {}).items()
+    ])
+
+
+class SqliteSnapshot:
+    """
+    開いたデータベース（読み取り専用、スレッドごとに接続を持つ）
+
+    再ロードでは新しいスナップショットで接続を開き直す。置き換え前のファイルは
+    接続済みのスレッドが読み続けられる（os.replace で置き換えるため内容は消えない）。
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = db_path
+        self._local = threading.local()
+        # get_all_contents() の結果（python / numpy 検索エンジンが使う場合のみ作成）
+        self.all_contents: Optional[Dict[str, Dict[str, Any]]] = None
+        self.search_config: Optional[Dict[str, Any]] = None
+
+    def query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True)
+            self._local.conn = conn
+        return conn.execute(sql, params).fetchall()
+
+
+class SqliteContentRepository(ContentRepository):
+    """SQLite コンテンツリポジトリ（読み取り専用、スレッドごとに接続を持つ）"""
+
+    def __init__(self, db_path: str = None):
+        super().__init__()
+        self.db_path = Path(db_path or config.CONTENT_SQLITE_PATH)
+
+    def build_snapshot(self) -> SqliteSnapshot:
+        """データベースを開き、参照整合性を検証する（現在のスナップショットは変更しない）"""
+        if not self.db_path.exists():
+            raise ContentValidationError(f"Content database not found: {self.db_path}")
+        snapshot = SqliteSnapshot(self.db_path)
+        try:
+            self._validate(snapshot)
+        except sqlite3.DatabaseError as e:
+            raise ContentValidationError(f"Invalid content database {self.db_path}: {e}")
+        logger.info(f"Loaded contents from {self.db_path}")
+        return snapshot
+
+    def source_paths(self) -> List[Path]:
+        """コンテンツの読み込み元ファイル（再ロードの更新監視用）"""
+        return [self.db_path]
+
+    def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        return self.snapshot().query(sql, params)
+
+    def _validate(self, snapshot: SqliteSnapshot) -> None:
+        """
+        参照整合性チェック（ContentRepository._validate() と同じ検査を SQL で行う）
+
+        スキーマ検証と状態グラフの検証（到達できないメニュー・循環など）は全コンテンツをたどるため起動時には行わない。
+        DB の作成時（build_sqlite.py が ContentRepository で読み込む際）に検証済み。
+        """
+        errors = []
+        valid_screens = {row[0] for row in snapshot.query("SELECT screen_id FROM screens")}
+        valid_screens.add("global")  # フォールバック用
+        valid_menus = {row[0] for row in snapshot.query("SELECT menu_id FROM menus")}
+        missing_contents = {row[0] for row in snapshot.query(
+            "SELECT DISTINCT substr(next_state, 5) FROM menu_options "
+            "WHERE next_state LIKE 'ans:%' AND substr(next_state, 5) NOT IN (SELECT item_id FROM contents)"
+        )}
+
+        options = snapshot.query(
+            "SELECT o.menu_id, o.next_state FROM menu_options o JOIN menus m USING (menu_id) "
+            "ORDER BY m.position, o.position"
+        )
+        for menu_id, next_state in options:
+            if next_state.startswith("home:"):
+                screen = next_state.split(":")[1]
+                if screen not in valid_screens:
+                    errors.append(f"Menu '{menu_id}' references unknown screen: {screen}")
+            elif next_state.startswith("menu:"):
+                ref_menu = next_state[5:]
+                if f"menu:{ref_menu}" not in valid_menus and ref_menu not in valid_menus:
+                    errors.append(f"Menu '{menu_id}' references unknown menu: {next_state}")
+            elif next_state.startswith("ans:"):
+                content_id = next_state[4:]
+                if content_id in missing_contents:
+                    errors.append(f"Menu '{menu_id}' references unknown content: {content_id}")
+
+        for item_id, title, body in snapshot.query(
+            "SELECT item_id, title, body FROM contents WHERE title = '' OR body = '' ORDER BY rowid"
+        ):
+            if not title:
+                errors.append(f"Content '{item_id}' missing title")
+            if not body:
+                errors.append(f"Content '{item_id}' missing body")
+
+        if errors:
+            raise ContentValidationError("Validation errors:\n" + "\n".join(errors))
+
+        logger.info("Content validation passed")
+
+    def _item(self, row: tuple) -> Dict[str, Any]:
+        """contents の1行と子テーブルからアイテムを組み立てる"""
+        rowid, _, title, body, category, priority, extra = row
+        item = {
+            "title": title,
+            "body": body,
+            "category": category,
+            "screens": [r[0] for r in self._query(
+                "SELECT screen_id FROM content_screens WHERE item_rowid = ? ORDER BY position", (rowid,)
+            )],
+            "keywords": [r[0] for r in self._query(
+                "SELECT keyword FROM content_keywords WHERE item_rowid = ? ORDER BY position", (rowid,)
+            )],
+            "links": [{"label": label, "url": url} for label, url in self._query(
+                "SELECT label, url FROM content_links WHERE item_rowid = ? ORDER BY position", (rowid,)
+            )],
+            "priority": priority,
+        }
+        for auto, related_id in self._query(
+            "SELECT auto, related_id FROM content_related WHERE item_rowid = ? ORDER BY auto, position", (rowid,)
+        ):
+            item.setdefault("related_auto" if auto else "related", []).append(related_id)
+        if extra:
+            item.update(json.loads(extra))
+        return item
+
+    def _items(self, where: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        """条件に一致するアイテム（定義順、{"id": ..., **アイテム}）"""
+        return [
+            {"id": row[1], **self._item(row)}
+            for row in self._query(f"SELECT {_ITEM_COLUMNS} FROM contents WHERE {where} ORDER BY rowid", params)
+        ]
+
+    # === Screen Registry ===
+
+    def get_screen(self, screen_id: str) -> Optional[Dict[str, Any]]:
+        """画面情報を取得"""
+        rows = self._query("SELECT name, routes, screen_group FROM screens WHERE screen_id = ?", (screen_id,))
+        if not rows:
+            return None
+        name, routes, group = rows[0]
+        screen = {"name": name, "routes": json.loads(routes)}
+        if group is not None:
+            screen["group"] = group
+        return screen
+
+    def get_valid_screens(self) -> List[str]:
+        """有効な画面ID一覧"""
+        return [row[0] for row in self._query("SELECT screen_id FROM screens ORDER BY position")]
+
+    def resolve_screen_id(self, screen_id: str) -> str:
+        """screen_id を検証し、不明なら global にフォールバック"""
+        if self._query("SELECT 1 FROM screens WHERE screen_id = ?", (screen_id,)):
+            return screen_id
+        logger.warning(f"Unknown screen_id: {screen_id}, falling back to 'global'")
+        return "global"
+
+    # === Menus ===
+
+    def get_menu(self, menu_id: str) -> Optional[Dict[str, Any]]:
+        """メニューを取得"""
+        rows = self._query("SELECT message FROM menus WHERE menu_id = ?", (menu_id,))
+        if not rows:
+            return None
+        options = self._query(
+            "SELECT label, next_state FROM menu_options WHERE menu_id = ? ORDER BY position", (menu_id,)
+        )
+        return {
+            "message": rows[0][0],
+            "options": [{"label": label, "next_state": next_state} for label, next_state in options],
+        }
+
+    def get_home_menu(self, screen_id: str) -> Optional[Dict[str, Any]]:
+        """画面のホームメニューを取得"""
+        return self.get_menu(f"home:{screen_id}")
+
+    # === Content Items ===
+
+    def get_content(self, content_id: str) -> Optional[Dict[str, Any]]:
+        """コンテンツを取得"""
+        rows = self._query(f"SELECT {_ITEM_COLUMNS} FROM contents WHERE item_id = ?", (content_id,))
+        return self._item(rows[0]) if rows else None
+
+    def get_related(self, content_id: str, limit: int = 3) -> List[Dict[str, Any]]:
+        """
+        関連コンテンツ（手動設定の related を優先し、残りを自動算出の related_auto で補う）
+
+        Returns:
+            {"id": ..., **アイテム} の一覧（存在しないID・自身・重複は除く）
+        """
+        rows = self._query(
+            "SELECT r.related_id FROM contents c JOIN content_related r ON r.item_rowid = c.rowid "
+            "WHERE c.item_id = ? ORDER BY r.auto, r.position",
+            (content_id,)
+        )
+        related = []
+        seen = {content_id}
+        for (related_id,) in rows:
+            if related_id in seen:
+                continue
+            seen.add(related_id)
+            item = self.get_content(related_id)
+            if item is None:
+                continue
+            related.append({"id": related_id, **item})
+            if len(related) >= limit:
+                break
+        return related
+
+    def get_contents_by_screen(self, screen_id: str) -> List[Dict[str, Any]]:
+        """画面に関連するコンテンツ一覧（画面指定なしのコンテンツを含む）"""
+        return self._items(
+            "unscoped = 1 OR rowid IN (SELECT item_rowid FROM content_screens WHERE screen_id = ?)",
+            (screen_id,)
+        )
+
+    def get_all_contents(self) -> Dict[str, Dict[str, Any]]:
+        """
+        全コンテンツを取得
+
+        初回の呼び出しで全アイテムを読み込んで保持する（python / numpy 検索エンジン用）。
+        SEARCH_ENGINE=fts5 では呼ばれないため、カタログはメモリに載らない。
+        """
+        snapshot = self.snapshot()
+        if snapshot.all_contents is None:
+            snapshot.all_contents = {item.pop("id"): item for item in self._items("1")}
+        return snapshot.all_contents
+
+    # === System Messages ===
+
+    def get_system_message(self, key: str) -> str:
+        """システムメッセージを取得"""
+        rows = self._query("SELECT value FROM system_messages WHERE key = ?", (key,))
+        return rows[0][0] if rows else ""
+
+    # === Meta ===
+
+    def get_version(self) -> str:
+        """コンテンツバージョン（meta.version）"""
+        rows = self._query("SELECT value FROM meta WHERE key = 'version'")
+        return json.loads(rows[0][0]) if rows else "unknown"
+
+    # === Search Config ===
+
+    def get_search_config(self) -> Dict[str, Any]:
+        """検索設定を取得"""
+        snapshot = self.snapshot()
+        if snapshot.search_config is None:
+            rows = snapshot.query("SELECT key, value FROM search_config")
+            if rows:
+                snapshot.search_config = {key: json.loads(value) for key, value in rows}
+            else:
+                snapshot.search_config = self._default_search_config()
+        return snapshot.search_config
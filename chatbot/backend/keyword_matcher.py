@@ -0,0 +1,160 @@
+# キーワードマッチャ
+# Aho–Corasick オートマトンでキーワード・シノニムをクエリ1回の走査で検出する
+
+import logging
+from bisect import bisect_right
+from collections import deque
+from typing import Dict, List, Tuple, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+# トークン連結時の区切り文字（パターンがトークンをまたがないようにする）
+TOKEN_SEPARATOR = "\x00"
+
+
+class AhoCorasick:
+    """複数パターン同時照合オートマトン"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        self.patterns: List[str] = []
+
+    def add(self, pattern: str) -> int:
+        """パターンを追加してパターンIDを返す（build() 前に呼ぶ）"""
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        pattern_id = len(self.patterns)
+        self.patterns.append(pattern)
+        self._out[node].append(pattern_id)
+        return pattern_id
+
+    def build(self) -> None:
+        """失敗リンクを張る（BFS）"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # 失敗先の出力を引き継ぐ（走査時に出力リンクを辿らずに済む）
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """
+        テキストを1回走査して一致を列挙
+
+        Yields:
+            (一致の終端位置（排他的）, パターンID)
+        """
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for pos, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for pattern_id in out[node]:
+                yield pos + 1, pattern_id
+
+
+class KeywordMatcher:
+    """
+    キーワード・シノニムの一括マッチャ
+
+    content_items のキーワードと search_config.synonyms の見出し語を
+    1つのオートマトンにまとめ、クエリトークン列の1回の走査で
+    「トークンに含まれるキーワード」と「展開すべきシノニム」を得る。
+    """
+
+    def __init__(self):
+        self._automaton = AhoCorasick()
+        # パターンID → (キーワードか, シノニム展開語)
+        self._payloads: List[Tuple[bool, List[str]]] = []
+        # シノニム展開語 → 展開語に含まれるキーワード（構築時に計算）
+        self._expansion_keywords: Dict[str, List[str]] = {}
+
+    def build(self, keywords: Iterable[str], synonyms: Dict[str, List[str]]) -> None:
+        """
+        オートマトンを構築（コンテンツ再ロード時も再実行する）
+
+        Args:
+            keywords: 正規化済みキーワード
+            synonyms: 見出し語 → 展開語
+        """
+        automaton = AhoCorasick()
+        entries: Dict[str, Tuple[bool, List[str]]] = {}
+        for kw in keywords:
+            if kw:
+                entries[kw] = (True, entries.get(kw, (False, []))[1])
+        for key, values in synonyms.items():
+            if key:
+                is_keyword = entries.get(key, (False, []))[0]
+                entries[key] = (is_keyword, list(values))
+
+        payloads = []
+        for pattern, payload in entries.items():
+            automaton.add(pattern)
+            payloads.append(payload)
+        automaton.build()
+
+        self._automaton = automaton
+        self._payloads = payloads
+
+        # 展開語は実行時に走査しないよう、含まれるキーワードを先に求めておく
+        expansion_keywords = {}
+        for values in synonyms.values():
+            for value in values:
+                if value not in expansion_keywords:
+                    expansion_keywords[value] = [
+                        automaton.patterns[pid]
+                        for _, pid in automaton.iter_matches(value)
+                        if payloads[pid][0]
+                    ]
+        self._expansion_keywords = expansion_keywords
+        logger.info(f"Keyword matcher built: {len(payloads)} patterns")
+
+    def scan(self, tokens: List[str]) -> Tuple[List[str], List[List[str]]]:
+        """
+        クエリトークンを1回走査してシノニム展開とキーワード一致を求める
+
+        Returns:
+            (展開後トークン, トークンごとの含まれるキーワード)
+        """
+        text = TOKEN_SEPARATOR.join(tokens)
+        # 各トークンの開始位置（一致終端位置 → トークン番号の変換用）
+        starts = []
+        pos = 0
+        for token in tokens:
+            starts.append(pos)
+            pos += len(token) + 1
+
+        keyword_hits: List[List[str]] = [[] for _ in tokens]
+        expansions: List[str] = []
+        patterns = self._automaton.patterns
+        for end, pattern_id in self._automaton.iter_matches(text):
+            is_keyword, values = self._payloads[pattern_id]
+            if is_keyword:
+                keyword_hits[bisect_right(starts, end - 1) - 1].append(patterns[pattern_id])
+            expansions.extend(values)
+
+        expanded = list(tokens)
+        seen = set(tokens)
+        for value in expansions:
+            if value not in seen:
+                seen.add(value)
+                expanded.append(value)
+                keyword_hits.append(list(self._expansion_keywords.get(value, [])))
+        return expanded, keyword_hits
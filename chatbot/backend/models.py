@@ -70,6 +70,7 @@ class ChatResponse:
     content: Optional[ContentDetail] = None
     input_mode: InputMode = field(default_factory=InputMode)
     screen_info: Optional[Dict[str, str]] = None
+    explain: Optional[Dict[str, Any]] = None  # 検索の内訳（explain 指定時のみ）
     
     def to_dict(self) -> Dict[str, Any]:
         result = {
@@ -84,6 +85,8 @@ class ChatResponse:
             result["content"] = self.content.to_dict()
         if self.screen_info:
             result["screen_info"] = self.screen_info
+        if self.explain:
+            result["explain"] = self.explain
         return result
 
 
@@ -118,3 +121,4 @@ class StepRequest:
     action: str
     target: str = ""
     query: str = ""  # 検索用
+    explain: bool = False  # 検索の内訳を含める
@@ -0,0 +1,77 @@
+# テキスト正規化パイプライン
+# 1. 表記の統一: NFKC（全角英数→半角、半角カナ→全角）・小文字化・空白統一
+# 2. かなの統一: 語末の長音記号の除去、カタカナ→ひらがな
+# クエリのトークン分割（助詞位置の判定）は 1 の後、2 の前に行う
+
+import re
+import unicodedata
+from typing import List, Tuple
+
+# カタカナ（ァ〜ヶ）→ ひらがな（ぁ〜ゖ）
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+
+# カタカナ3文字以上に続く語末の長音記号（「サーバー」→「サーバ」、「ター」はそのまま）
+# ひらがなに変換すると助詞との境界が分からなくなるため、変換前に除去する
+_TRAILING_LONG_VOWEL = re.compile(r"(?<=[ァ-ヶー]{3})ー+(?![ァ-ヶー])")
+
+_WHITESPACE = re.compile(r"\s+")
+
+# 半角カナの濁点・半濁点
+_HALFWIDTH_VOICED = "\uff9e\uff9f"
+
+
+def normalize_width(text: str) -> str:
+    """表記の統一（NFKC・小文字化・空白統一）"""
+    text = unicodedata.normalize("NFKC", text).lower().strip()
+    return _WHITESPACE.sub(" ", text)
+
+
+def fold_kana(text: str) -> str:
+    """かなの統一（語末の長音記号を除去し、カタカナ→ひらがな）"""
+    text = _TRAILING_LONG_VOWEL.sub("", text)
+    return text.translate(_KATAKANA_TO_HIRAGANA)
+
+
+def normalize_text(text: str) -> str:
+    """正規化パイプライン全体（インデックス構築・シノニム用）"""
+    return fold_kana(normalize_width(text))
+
+
+def normalize_with_offsets(text: str) -> Tuple[str, List[int]]:
+    """
+    normalize_text() を1文字ずつ適用し、正規化後の各文字の元テキスト上の位置も返す
+
+    スニペットのハイライト位置（正規化済みテキスト上の位置）を元の本文に戻すために使う。
+    結合文字などで文字列全体の正規化と結果が異なる場合があるため、呼び出し側で
+    normalize_text() の結果と一致するか確認すること。
+    """
+    chars: List[str] = []
+    offsets: List[int] = []
+    i = 0
+    while i < len(text):
+        # 濁点・半濁点（半角）と結合文字は直前の文字とまとめて正規化する
+        j = i + 1
+        while j < len(text) and (text[j] in _HALFWIDTH_VOICED or unicodedata.combining(text[j])):
+            j += 1
+        unit, start = text[i:j], i
+        i = j
+        for c in unicodedata.normalize("NFKC", unit).lower():
+            if c.isspace():
+                # 空白の連続は1つにまとめ、先頭の空白は除く
+                if not chars or chars[-1] == " ":
+                    continue
+                c = " "
+            chars.append(c)
+            offsets.append(start)
+    while chars and chars[-1] == " ":
+        chars.pop()
+        offsets.pop()
+
+    width = "".join(chars)
+    removed = set()
+    for match in _TRAILING_LONG_VOWEL.finditer(width):
+        removed.update(range(match.start(), match.end()))
+    if removed:
+        width = "".join(c for k, c in enumerate(width) if k not in removed)
+        offsets = [o for k, o in enumerate(offsets) if k not in removed]
+    return width.translate(_KATAKANA_TO_HIRAGANA), offsets
@@ -2,78 +2,365 @@
 # キーワードによる候補提示（生成禁止確保）
 
 import re
+import json
+import time
+import heapq
+import hashlib
 import logging
-from typing import List, Dict, Any, Tuple
+from contextvars import ContextVar, Token
+from itertools import count, product
+from pathlib import Path
+from threading import Lock
+from typing import List, Dict, Any, Tuple, Optional
 
 from content_repo import content_repo
+from content_snapshot import source_hash
 from config import config
+from tokenizer import tokenize_query
+from normalizer import normalize_width, fold_kana, normalize_text
+from keyword_matcher import KeywordMatcher
+from search_cache import SearchCache
+from search_query import QueryFilter, parse_filters, filter_bits, format_filter
+from search_proximity import phrase_bits, proximity_bonus, max_proximity_bonus
+from search_fuzzy import SymSpellIndex, max_distance_for
+from search_suggest import SuggestIndex
+from search_snippet import SnippetBuilder
+from search_vector import VectorScorer, QuerySpec, numpy_available
+from search_store import IndexReader, IndexWriter, open_index, STRING_SEPARATOR
+from search_index import (
+    SearchIndex, SearchDocument, build_documents, ids_to_bits, bits_to_bytes, popcount,
+    FLAG_WEIGHTS, FIELD_TITLE, FIELD_KEYWORD, FIELD_BODY, FIELD_TEXT
+)
 
 logger = logging.getLogger(__name__)
 
+# 表記ゆれ補正でトークンごとに試す候補語数
+FUZZY_CANDIDATES_PER_TOKEN = 3
+# クエリ正規化結果のメモ化の最大件数（超えたら破棄して作り直す）
+QUERY_MEMO_MAX = 4096
+
+# (正規化済みクエリ, トークンの表記, 正規化済みトークン, フレーズごとの正規化済みトークン, フィールド指定)
+QueryAnalysis = Tuple[str, List[str], List[str], List[List[str]], List[QueryFilter]]
+
+# フレーズ指定（"..." または「...」）
+_PHRASE = re.compile(r'"([^"]*)"|「([^」]*)」')
+_QUOTES = re.compile(r'["「」]')
+
+
+# 状態の作成順の番号（結果キャッシュのスタンプに使う）
+_state_generations = count(1)
+
+
+class SearchState:
+    """
+    検索の状態（検索設定・インデックス・辞書。build_state() で作成し、クエリのメモ化以外は変更しない）
+    
+    再ロードでは新しい状態を作ってから参照を差し替えるため、
+    差し替え前に始まった検索は古い状態のまま最後まで処理できる。
+    """
+    
+    def __init__(self):
+        self.synonyms: Dict[str, List[str]] = {}
+        self.stopwords: set = set()
+        # クエリ → 正規化・トークン分割の結果（同じクエリで Unicode 処理を繰り返さない）
+        self.query_memo: Dict[str, QueryAnalysis] = {}
+        # 正規化済みの語 → 表示用の表記（「もしかして」用）
+        self.surface_forms: Dict[str, str] = {}
+        self.index = SearchIndex()
+        self.keyword_matcher = KeywordMatcher()
+        self.vector: Optional[VectorScorer] = None
+        self.suggest = SuggestIndex()
+        self.fuzzy = SymSpellIndex()
+        self.snippets = SnippetBuilder()
+        # 読み込んだ保存済みインデックス（配列が参照している間は mmap を開いたままにする）
+        self.store: Optional[IndexReader] = None
+        # インデックスを構築したコンテンツ（結果整形で参照、再ロード後も同じ状態の中で整合する）
+        self.contents: Dict[str, Dict[str, Any]] = {}
+        self.version = ""
+        self.generation = next(_state_generations)
+
+
+def state_property(name: str) -> property:
+    """現在の SearchState の要素（pin() 中は固定した状態）を参照するプロパティ"""
+    return property(lambda self: getattr(self.state(), name))
+
 
 class SearchEngine:
     """検索エンジン（候補提示のみ）"""
     
+    _synonyms = state_property("synonyms")
+    _stopwords = state_property("stopwords")
+    _query_memo = state_property("query_memo")
+    _surface_forms = state_property("surface_forms")
+    _index = state_property("index")
+    _keyword_matcher = state_property("keyword_matcher")
+    _vector = state_property("vector")
+    _suggest = state_property("suggest")
+    _fuzzy = state_property("fuzzy")
+    _snippets = state_property("snippets")
+    _contents = state_property("contents")
+    
     def __init__(self):
-        self._synonyms: Dict[str, List[str]] = {}
-        self._stopwords: set = set()
-        self._initialized = False
+        self._state: Optional[SearchState] = None
+        # pin() で固定した状態（リクエスト処理中は再ロードの影響を受けない）
+        self._pinned: ContextVar = ContextVar(f"search_state_{id(self)}", default=None)
+        self._cache = SearchCache(config.SEARCH_CACHE_SIZE, config.SEARCH_CACHE_TTL)
+        # 上位k件抽出の集計（SEARCH_TOPK_STATS=1 の場合のみ）
+        self._topk_stats = {"queries": 0, "candidates": 0, "scored": 0, "skipped": 0}
+        self._topk_lock = Lock()
     
     def initialize(self) -> None:
-        """検索設定を読み込み"""
+        """検索設定を読み込み、ドキュメントストアとインデックスを構築（再ロード時も再実行）"""
+        self.swap(self.build_state())
+    
+    def build_state(self) -> SearchState:
+        """
+        content_repo の現在の内容から検索の状態を作成する
+        
+        現在の状態は変更しない（再ロードでは新しいコンテンツを pin() した上で呼び出す）
+        """
+        state = SearchState()
         search_config = content_repo.get_search_config()
-        self._synonyms = search_config.get("synonyms", {})
-        self._stopwords = set(search_config.get("stopwords", []))
-        self._initialized = True
+        raw_synonyms = search_config.get("synonyms", {})
+        state.synonyms = self._normalize_synonyms(raw_synonyms)
+        # ストップワードはかな統一前のトークンと比較する（助詞はひらがなのまま判定）
+        state.stopwords = {normalize_width(w) for w in search_config.get("stopwords", [])}
+        state.contents = items = content_repo.get_all_contents()
+        store = self._open_store()
+        if store is not None:
+            # 保存済みインデックス（配列は mmap 上を参照し、構築処理を省く）
+            state.index.load(store, items)
+            state.suggest.load(store)
+            state.fuzzy.load(store)
+            state.surface_forms = dict(zip(store.strings("surface.terms"), store.strings("surface.forms")))
+            state.snippets.load(store, state.index.documents, items)
+        else:
+            documents = build_documents(items, self._normalize)
+            state.index.build(documents)
+            state.suggest.build(state.index.documents, items, raw_synonyms, self._normalize)
+            state.fuzzy.build(self._fuzzy_vocabulary(state))
+            state.snippets.build(state.index.documents, items)
+        state.store = store
+        state.keyword_matcher.build(state.index.keyword_terms, state.synonyms)
+        state.vector = self._build_vector_scorer(state.index)
+        state.version = content_repo.get_version()
+        return state
+    
+    def swap(self, state: SearchState) -> None:
+        """状態を差し替える（参照の代入1回のため、読み取り側はロック不要）"""
+        self._state = state
+        self._cache.clear()
+    
+    def state(self) -> SearchState:
+        """現在の状態（pin() 中は固定したもの、未初期化なら初期化する）"""
+        state = self._pinned.get()
+        if state is None:
+            state = self._state
+            if state is None:
+                self.initialize()
+                state = self._state
+        return state
+    
+    def pin(self, state: SearchState) -> Token:
+        """現在のコンテキスト（リクエスト処理）で使う状態を固定する"""
+        return self._pinned.set(state)
+    
+    def unpin(self, token: Token) -> None:
+        """pin() の固定を解除する"""
+        self._pinned.reset(token)
+    
+    def _store_meta(self) -> Dict[str, Any]:
+        """
+        保存済みインデックスと一致すべきメタ情報
+        
+        コンテンツバージョン・アイテムの並び・検索設定に加え、読み込み元ファイルのハッシュを含める
+        （バージョンを上げずにタイトル・本文を編集した場合も古いインデックスを使わない）
+        """
+        items = content_repo.get_all_contents()
+        digest = hashlib.sha1(STRING_SEPARATOR.join(items).encode("utf-8"))
+        digest.update(json.dumps(content_repo.get_search_config(), sort_keys=True, ensure_ascii=False).encode("utf-8"))
+        return {
+            "content_version": content_repo.get_version(),
+            "items": len(items),
+            "items_hash": digest.hexdigest(),
+            "source_hash": source_hash(content_repo.source_paths()),
+        }
     
-    def _ensure_initialized(self) -> None:
-        if not self._initialized:
-            self.initialize()
+    def _open_store(self) -> Optional[IndexReader]:
+        """SEARCH_INDEX_MODE=auto の場合、コンテンツと一致する保存済みインデックスを開く"""
+        if config.SEARCH_INDEX_MODE.lower() != "auto":
+            return None
+        path = Path(config.SEARCH_INDEX_PATH)
+        if not path.exists():
+            return None
+        try:
+            expected = self._store_meta()
+        except OSError as e:
+            logger.warning(f"Search index {path} ignored: {e}")
+            return None
+        return open_index(path, expected)
+    
+    def save_index(self, path: str = None) -> Dict[str, Any]:
+        """
+        構築済みの検索状態を保存（次回以降の initialize() は構築せずに読み込む）
+        
+        Args:
+            path: 出力先（省略時は SEARCH_INDEX_PATH）
+        
+        Returns:
+            {"path", "bytes", メタ情報}
+        """
+        path = Path(path or config.SEARCH_INDEX_PATH)
+        writer = IndexWriter()
+        self._index.save(writer)
+        self._suggest.save(writer)
+        self._fuzzy.save(writer)
+        writer.add_strings("surface.terms", list(self._surface_forms))
+        writer.add_strings("surface.forms", list(self._surface_forms.values()))
+        self._snippets.save(writer)
+        meta = self._store_meta()
+        size = writer.write(path, meta)
+        logger.info(f"Search index saved: {path} ({size} bytes)")
+        return {"path": str(path), "bytes": size, **meta}
+    
+    def _build_vector_scorer(self, index: SearchIndex) -> Optional[VectorScorer]:
+        """SEARCH_ENGINE=numpy の場合のみベクトル化スコアラを構築"""
+        if config.SEARCH_ENGINE.lower() != "numpy":
+            return None
+        if not numpy_available():
+            logger.warning("SEARCH_ENGINE=numpy but NumPy is not installed, using python engine")
+            return None
+        return VectorScorer(index)
+    
+    def _normalize_synonyms(self, synonyms: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """シノニムをインデックスと同じパイプラインで正規化（正規化後に重なる見出し語は統合）"""
+        normalized: Dict[str, List[str]] = {}
+        for key, values in synonyms.items():
+            key = self._normalize(key)
+            if not key:
+                continue
+            merged = normalized.setdefault(key, [])
+            for value in values:
+                value = self._normalize(value)
+                if value and value != key and value not in merged:
+                    merged.append(value)
+        return normalized
+    
+    def _fuzzy_vocabulary(self, state: SearchState) -> Dict[str, int]:
+        """
+        表記ゆれ補正の語彙（キーワード・シノニムの展開元）と表示用の表記
+        
+        本文・タイトルの語は含めない（本文はコンテンツ件数に比例して削除形の辞書が大きくなり、
+        タイトルの語は末尾の助詞が残るため補正候補に向かない）。
+        出現数はキーワードにその語を持つアイテム数。
+        """
+        vocabulary: Dict[str, int] = {}
+        # かな統一前の表記（「えくすぽーと」ではなく「エクスポート」と提示する）
+        surfaces: Dict[str, str] = {}
+        
+        for item in state.contents.values():
+            for word in {normalize_width(kw) for kw in item.get("keywords", [])}:
+                term = fold_kana(word)
+                if term:
+                    vocabulary[term] = vocabulary.get(term, 0) + 1
+                    surfaces.setdefault(term, word)
+        # シノニムは展開元の語のみ（展開先の語は検索で一致しないため補正先にしない）
+        for key in content_repo.get_search_config().get("synonyms", {}):
+            word = normalize_width(key)
+            term = fold_kana(word)
+            if term:
+                vocabulary.setdefault(term, 1)
+                surfaces.setdefault(term, word)
+        state.surface_forms = surfaces
+        return vocabulary
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """結果キャッシュの統計（ヒット/ミス/破棄数）"""
+        return self._cache.stats()
+    
+    def top_k_stats(self) -> Dict[str, Any]:
+        """上位k件抽出で全スコア計算を省略したアイテム数（SEARCH_TOPK_STATS=1 で集計）"""
+        with self._topk_lock:
+            stats = dict(self._topk_stats)
+        stats["enabled"] = config.SEARCH_TOPK_STATS
+        stats["skip_rate"] = (
+            round(stats["skipped"] / stats["candidates"], 4) if stats["candidates"] else 0.0
+        )
+        return stats
+    
+    def _cache_stamp(self) -> str:
+        """結果キャッシュのスタンプ（コンテンツバージョン + 状態の番号）"""
+        state = self.state()
+        return f"{state.version}#{state.generation}"
     
     def _normalize(self, text: str) -> str:
-        """テキスト正規化"""
-        # 小文字化、空白統一
-        text = text.lower().strip()
-        text = re.sub(r"\s+", " ", text)
-        return text
+        """テキスト正規化（NFKC・小文字化・空白統一・かな統一）"""
+        return normalize_text(text)
+    
+    def _analyze_query(self, query: str) -> QueryAnalysis:
+        """
+        クエリの正規化とトークン分割（メモ化）
+        
+        助詞位置の判定はかな統一前に行い、分割後の各トークンをかな統一する。
+        引用符で囲んだ部分はフレーズ（トークンが隣接して出現すること）、
+        category:faq・priority:>=80・-語 などはフィールド指定として別に取り出す。
+        """
+        analysis = self._query_memo.get(query)
+        if analysis is not None:
+            return analysis
+        
+        key, text, filters = self._normalize_query(query)
+        surfaces, tokens, phrases = self._split_query(text)
+        analysis = (key, surfaces, tokens, phrases, filters)
+        
+        if len(self._query_memo) >= QUERY_MEMO_MAX:
+            self._query_memo.clear()
+        self._query_memo[query] = analysis
+        return analysis
+    
+    def _normalize_query(self, query: str) -> Tuple[str, str, List[QueryFilter]]:
+        """表記の統一とフィールド指定の取り出し（正規化済みクエリ, 残りのクエリ, フィールド指定）"""
+        key = normalize_width(query)
+        text, filters = parse_filters(key)
+        return fold_kana(key), text, filters
+    
+    def _split_query(self, text: str) -> Tuple[List[str], List[str], List[List[str]]]:
+        """フレーズの取り出しとトークン分割（トークンの表記, 正規化済みトークン, フレーズ）"""
+        phrases = []
+        for match in _PHRASE.finditer(text):
+            phrase = [fold_kana(t) for t in tokenize_query(match.group(1) or match.group(2) or "", self._stopwords)]
+            if phrase:
+                phrases.append(phrase)
+        surfaces = tokenize_query(_QUOTES.sub(" ", text), self._stopwords)
+        return surfaces, [fold_kana(t) for t in surfaces], phrases
     
     def _tokenize(self, text: str) -> List[str]:
-        """トークン分割（簡易）"""
-        text = self._normalize(text)
-        # スペースで分割 + ストップワード除去
-        tokens = [t for t in text.split() if t not in self._stopwords and len(t) >= 2]
-        return tokens
-    
-    def _expand_synonyms(self, tokens: List[str]) -> List[str]:
-        """シノニム展開"""
-        expanded = set(tokens)
-        for token in tokens:
-            if token in self._synonyms:
-                expanded.update(self._synonyms[token])
-        return list(expanded)
-    
-    def _score_item(self, item: Dict[str, Any], query_tokens: List[str]) -> float:
-        """アイテムのスコア計算"""
+        """トークン分割（空白 + 日本語の助詞位置で分割、ストップワード除去）"""
+        return self._analyze_query(text)[2]
+    
+    def _score_item(self, doc: SearchDocument, token_hits: List[int]) -> float:
+        """
+        アイテムのスコア計算
+
+        Args:
+            doc: 正規化済みドキュメント
+            token_hits: クエリトークンごとのフィールド一致フラグ
+        """
         score = 0.0
         
-        title = self._normalize(item.get("title", ""))
-        body = self._normalize(item.get("body", ""))
-        keywords = [self._normalize(k) for k in item.get("keywords", [])]
-        
-        for token in query_tokens:
+        for flags in token_hits:
             # タイトル一致（高スコア）
-            if token in title:
+            if flags & FIELD_TITLE:
                 score += 3.0
             # キーワード一致（中スコア）
-            if any(token in kw or kw in token for kw in keywords):
+            if flags & FIELD_KEYWORD:
                 score += 2.0
             # 本文一致（低スコア）
-            if token in body:
+            if flags & FIELD_BODY:
                 score += 1.0
         
         # 優先度による補正
-        priority = item.get("priority", 50)
-        score += priority / 100.0
+        score += doc.priority / 100.0
         
         return score
     
@@ -81,7 +368,8 @@ class SearchEngine:
         self, 
         query: str, 
         screen_id: str = None,
-        max_results: int = None
+        max_results: int = None,
+        category: str = None
     ) -> List[Dict[str, Any]]:
         """
         検索実行
@@ -90,57 +378,722 @@ class SearchEngine:
             query: 検索クエリ
             screen_id: 絞り込み用画面ID（省略時は全画面）
             max_results: 最大結果数
+            category: 絞り込み用カテゴリ（省略時は全カテゴリ）
         
         Returns:
-            スコア順のコンテンツリスト（id, title, snippet, score）
+            スコア順のコンテンツリスト（id, title, snippet, highlights, score）
+        """
+        results, _ = self._cached_search(query, screen_id, max_results, category, False)
+        return results
+    
+    def search_with_facets(
+        self,
+        query: str,
+        screen_id: str = None,
+        max_results: int = None,
+        category: str = None
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
         """
-        self._ensure_initialized()
+        検索実行（カテゴリ別ヒット件数付き）
         
+        Returns:
+            (スコア順のコンテンツリスト, {category: 画面絞り込み後のヒット件数})
+        """
+        return self._cached_search(query, screen_id, max_results, category, True)
+    
+    def _cached_search(
+        self,
+        query: str,
+        screen_id: str,
+        max_results: int,
+        category: str,
+        with_facets: bool
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """キャッシュ経由の検索（ファセット不要なら上位k件抽出を使う）"""
         if max_results is None:
             max_results = config.SEARCH_MAX_RESULTS
         
         # クエリが短すぎる
         if len(query.strip()) < config.SEARCH_MIN_QUERY_LEN:
+            return [], {}
+        
+        # 結果キャッシュ（状態の番号でスタンプし、再ロード前の状態で検索した結果は使わない）
+        # キーはトークン分割後の結果（分割はかな統一前に行うため、かな統一後のクエリでは区別できない）
+        _, surfaces, _, phrases, filters = self._analyze_query(query)
+        cache_key = (
+            tuple(surfaces), tuple(map(tuple, phrases)), tuple(filters),
+            screen_id, max_results, category, with_facets
+        )
+        stamp = self._cache_stamp()
+        cached = self._cache.get(cache_key, stamp)
+        if cached is None:
+            cached = self._search(query, screen_id, max_results, category, with_facets)
+            self._cache.put(cache_key, stamp, cached)
+        
+        results, facets = cached
+        return [dict(r) for r in results], dict(facets)
+    
+    def explain(
+        self,
+        query: str,
+        screen_id: str = None,
+        max_results: int = None,
+        category: str = None
+    ) -> Dict[str, Any]:
+        """
+        検索の内訳（処理段階ごとの所要時間と結果ごとのスコア内訳）
+        
+        調査用のため結果キャッシュ・クエリのメモ化を使わず、常に Python 実装で全候補を採点する。
+        通常の検索（search / search_with_facets）には計測処理を入れていない。
+        
+        Returns:
+            {"query", "normalized", "tokens", "expanded", "phrases", "filters", "candidates",
+             "results"（各結果に breakdown）, "facets", "timings_ms"}
+        """
+        if max_results is None:
+            max_results = config.SEARCH_MAX_RESULTS
+        
+        clock = time.perf_counter
+        timings: Dict[str, float] = {}
+        started = mark = clock()
+        
+        def lap(phase: str) -> None:
+            nonlocal mark
+            now = clock()
+            timings[phase] = round((now - mark) * 1000, 3)
+            mark = now
+        
+        key, text, filters = self._normalize_query(query)
+        lap("normalize")
+        _, tokens, phrases = self._split_query(text)
+        lap("tokenize")
+        if len(query.strip()) < config.SEARCH_MIN_QUERY_LEN:
+            # クエリが短すぎる（search() と同じく結果なし）
+            tokens, phrases, filters = [], [], []
+        unique = list(dict.fromkeys(tokens))
+        expanded, keyword_hits = self._keyword_matcher.scan(unique) if unique else ([], [])
+        lap("synonyms")
+        
+        required, near = self._constraints(tokens, phrases, filters)
+        candidates: Dict[int, List[int]] = {}
+        if expanded:
+            candidates = self._collect_candidates(expanded, keyword_hits, required)
+        lap("candidates")
+        
+        facets: Dict[str, int] = {}
+        if expanded:
+            selected, facets = self._select_candidates(candidates, screen_id, category)
+            scored = self._score_candidates(candidates, selected, near)
+        elif required is not None:
+            scored, facets = self._rank_filtered(required, screen_id, category)
+        else:
+            scored = []
+        lap("scoring")
+        scored.sort(key=lambda x: (-x[0], x[1]))
+        lap("sort")
+        
+        terms = self._highlight_terms(expanded, keyword_hits) if expanded else []
+        results = self._format_results(scored[:max_results], terms)
+        lap("snippet")
+        timings["total"] = round((mark - started) * 1000, 3)
+        
+        documents = self._index.documents
+        for result, (score, doc_id) in zip(results, scored):
+            result["breakdown"] = self._score_breakdown(
+                doc_id, documents[doc_id], expanded, candidates.get(doc_id), near
+            )
+        
+        return {
+            "query": query,
+            "normalized": key,
+            "tokens": tokens,
+            "expanded": expanded,
+            "phrases": phrases,
+            "filters": [
+                {"field": field or "term", "value": value, "negate": negate}
+                for negate, field, value in filters
+            ],
+            "candidates": len(candidates),
+            "results": results,
+            "facets": facets,
+            "timings_ms": timings,
+        }
+    
+    def _score_breakdown(
+        self,
+        doc_id: int,
+        doc: SearchDocument,
+        tokens: List[str],
+        token_hits: Optional[List[int]],
+        near: List[str]
+    ) -> Dict[str, Any]:
+        """スコアの内訳（_score_item() と近接ボーナスの加点を項目別に集計）"""
+        breakdown = {"title": 0.0, "keyword": 0.0, "body": 0.0, "priority": doc.priority / 100.0, "proximity": 0.0}
+        matched = {}
+        for token, flags in zip(tokens, token_hits or ()):
+            fields = []
+            for flag, name in ((FIELD_TITLE, "title"), (FIELD_KEYWORD, "keyword"), (FIELD_BODY, "body")):
+                if flags & flag:
+                    breakdown[name] += FLAG_WEIGHTS[flag]
+                    fields.append(name)
+            matched[token] = fields
+        if token_hits and near:
+            breakdown["proximity"] = round(self._near_bonus(doc_id, near, token_hits), 4)
+        breakdown["matched"] = matched
+        return breakdown
+    
+    def suggest(
+        self,
+        prefix: str,
+        screen_id: str = None,
+        limit: int = None
+    ) -> List[Dict[str, Any]]:
+        """
+        入力補完（タイトル・キーワード・シノニムの前方一致、優先度順）
+        
+        Args:
+            prefix: 入力途中の文字列
+            screen_id: 絞り込み用画面ID（省略時は全画面）
+            limit: 最大件数
+        
+        Returns:
+            補完候補リスト（text, type, priority, タイトルの場合は id）
+        """
+        if limit is None:
+            limit = config.SUGGEST_MAX_RESULTS
+        
+        # 入力のたびに変わる接頭辞はクエリのメモに入れない（検索クエリのメモを押し出さない）
+        prefix = normalize_text(prefix)
+        return self._suggest.suggest(prefix, screen_id, limit)
+    
+    def did_you_mean(
+        self,
+        query: str,
+        screen_id: str = None,
+        limit: int = None
+    ) -> List[str]:
+        """
+        表記ゆれ・誤入力の補正候補（「もしかして」）
+        
+        どの語にも一致しないトークンを編集距離の近い語に置き換えたクエリのうち、
+        検索結果が1件以上あるものを返す。
+        
+        Args:
+            query: 検索クエリ（該当なしだったもの）
+            screen_id: 絞り込み用画面ID
+            limit: 最大件数
+        
+        Returns:
+            補正後のクエリ（編集距離の合計が小さい順 → 出現数の多い順）
+        """
+        if config.SEARCH_FUZZY.lower() == "off":
             return []
+        if limit is None:
+            limit = config.SEARCH_FUZZY_SUGGESTIONS
         
-        # トークン化 & シノニム展開
-        tokens = self._tokenize(query)
-        tokens = self._expand_synonyms(tokens)
+        # 補正するのは引用符の外の語だけ（フレーズ・フィールド指定・除外語はそのまま残す）
+        _, text, filters = self._normalize_query(query)
+        kept = [m.group(0) for m in _PHRASE.finditer(text)] + [format_filter(f) for f in filters]
+        excluded = {fold_kana(value) for negate, field, value in filters if negate and not field}
+        # 正規化済みトークン → 入力された表記
+        tokens: Dict[str, str] = {}
+        for surface in tokenize_query(_QUOTES.sub(" ", _PHRASE.sub(" ", text)), self._stopwords):
+            tokens.setdefault(fold_kana(surface), surface)
+        unknown = [t for t in tokens if not self._token_known(t)]
+        if not unknown:
+            return []
+        per_token = FUZZY_CANDIDATES_PER_TOKEN if len(unknown) <= 3 else 1
         
-        if not tokens:
+        # トークンごとの置き換え候補 [(表記, 編集距離, 出現数)]
+        # 候補のない未知語はどの語にも一致しないため除く。入力そのものと除外語は候補にしない
+        alternatives = []
+        for token, surface in tokens.items():
+            if token not in unknown:
+                alternatives.append([(surface, 0, 0)])
+                continue
+            candidates = [
+                candidate for candidate in self._fuzzy.lookup(token, max_distance_for(token))
+                if candidate[0] != token and candidate[0] not in excluded
+            ][:per_token]
+            if candidates:
+                alternatives.append([
+                    (self._surface_forms.get(term, term), distance, frequency)
+                    for term, distance, frequency in candidates
+                ])
+        if len(alternatives) == len(tokens) - len(unknown):
             return []
         
-        # スコア計算
-        scored: List[Tuple[float, str, Dict[str, Any]]] = []
+        combos = sorted(
+            product(*alternatives),
+            key=lambda combo: (sum(c[1] for c in combo), -sum(c[2] for c in combo))
+        )
+        corrections = []
+        for combo in combos:
+            corrected = " ".join(list(dict.fromkeys(c[0] for c in combo)) + kept)
+            if corrected in corrections:
+                continue
+            if self.search(corrected, screen_id, max_results=1):
+                corrections.append(corrected)
+                if len(corrections) >= limit:
+                    break
+        
+        logger.info(f"Did you mean '{query}' -> {corrections}")
+        return corrections
+    
+    def _token_known(self, token: str) -> bool:
+        """
+        トークンが補正語彙の語そのものか、トークン（またはシノニム展開語）がいずれかの語・キーワードに一致するか
+        
+        補正語彙（キーワード・シノニムの展開元）にある語は補正しない（入力そのものを補正候補として返さない）。
+        """
+        if token in self._fuzzy:
+            return True
+        expanded, keyword_hits = self._keyword_matcher.scan([token])
+        return any(keyword_hits) or any(self._index.resolve(t) for t in expanded)
+    
+    def search_batch(
+        self,
+        queries: List[Tuple[str, Optional[str]]],
+        max_results: int = None
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        複数クエリの一括検索（セッション・キャッシュを使わない）
+        
+        ベクトル化モードではクエリをブロックにまとめて行列積でスコアリングする。
+        
+        Args:
+            queries: (検索クエリ, 絞り込み用画面ID) のリスト
+            max_results: クエリごとの最大結果数
+        
+        Returns:
+            クエリ順の検索結果リスト
+        """
+        if max_results is None:
+            max_results = config.SEARCH_MAX_RESULTS
+        
+        if self._vector is None:
+            return [self._search(q, s, max_results, None, False)[0] for q, s in queries]
+        
+        specs = []
+        terms = []
+        for query, _ in queries:
+            prepared = None
+            if len(query.strip()) >= config.SEARCH_MIN_QUERY_LEN:
+                prepared = self._prepare_tokens(query)
+            specs.append(self._query_spec(*prepared) if prepared else None)
+            terms.append(self._highlight_terms(*prepared) if prepared else [])
+        
+        # スコア行列はブロックごとに上位k件だけを取り出して破棄する
+        batch = [(i, spec) for i, spec in enumerate(specs) if spec is not None]
+        ranked: Dict[int, List[Tuple[float, int]]] = {}
+        for offset, block in self._vector.score_blocks([spec for _, spec in batch]):
+            for row, scores in enumerate(block):
+                i = batch[offset + row][0]
+                query, screen_id = queries[i]
+                required, near = self._query_constraints(query)
+                if near:
+                    self._add_proximity(scores, near)
+                ranked[i], _ = self._vector.rank(scores, screen_id, None, max_results, required)
+            del scores, block
+        
+        results = []
+        for i, ((query, screen_id), highlight) in enumerate(zip(queries, terms)):
+            if i in ranked:
+                results.append(self._format_results(ranked[i], highlight))
+            elif len(query.strip()) >= config.SEARCH_MIN_QUERY_LEN:
+                # フィールド指定のみのクエリは通常の検索で処理
+                results.append(self._search(query, screen_id, max_results, None, False)[0])
+            else:
+                results.append([])
+        
+        logger.info(f"Batch search: {len(queries)} queries")
+        return results
+    
+    def _prepare_tokens(self, query: str) -> Optional[Tuple[List[str], List[List[str]]]]:
+        """トークン化・シノニム展開・キーワード一致（トークンなしは None）"""
+        # トークン化（重複トークンは1回だけ数える）
+        tokens = list(dict.fromkeys(self._tokenize(query)))
+        if not tokens:
+            return None
+        
+        # シノニム展開 & キーワード一致（オートマトンで1回走査）
+        return self._keyword_matcher.scan(tokens)
+    
+    def _query_spec(self, tokens: List[str], keyword_hits: List[List[str]]) -> QuerySpec:
+        """ベクトル化スコアリング用のクエリ表現"""
+        return [self._index.resolve(token) for token in tokens], keyword_hits
+    
+    def _query_constraints(self, query: str) -> Tuple[Optional[int], List[str]]:
+        """
+        スコア計算前に評価する条件
+        
+        Returns:
+            (フィールド指定・フレーズを満たすアイテムのビットセット（指定なしは None）,
+             近接ボーナスの対象トークン（クエリ内の順、2つ未満または無効なら空）)
+        """
+        _, _, tokens, phrases, filters = self._analyze_query(query)
+        return self._constraints(tokens, phrases, filters)
+    
+    def _constraints(
+        self,
+        tokens: List[str],
+        phrases: List[List[str]],
+        filters: List[QueryFilter]
+    ) -> Tuple[Optional[int], List[str]]:
+        """_query_constraints() の本体（クエリ解析済み）"""
+        required = None
+        if filters:
+            required = filter_bits(self._index, filters, self._term_bits)
+        for phrase in phrases:
+            bits = phrase_bits(self._index, phrase)
+            required = bits if required is None else required & bits
+        near = list(dict.fromkeys(tokens))
+        if len(near) < 2 or config.SEARCH_PROXIMITY_WEIGHT <= 0:
+            near = []
+        return required, near
+    
+    def _term_bits(self, word: str) -> int:
+        """除外語（-語）を含むアイテムのビットセット"""
+        return ids_to_bits(self._index.lookup(fold_kana(word)), self._index.doc_count)
+    
+    def _near_bonus(self, doc_id: int, near: List[str], flags: List[int]) -> float:
+        """近接ボーナス（隣り合うトークンが両方タイトル・本文に一致する場合のみ位置を照合）"""
+        for i in range(len(near) - 1):
+            if flags[i] & FIELD_TEXT and flags[i + 1] & FIELD_TEXT:
+                return proximity_bonus(self._index, doc_id, near, config.SEARCH_PROXIMITY_WEIGHT)
+        return 0.0
+    
+    def _add_proximity(self, scores, near: List[str]) -> None:
+        """ベクトル化スコアに近接ボーナスを加算（隣り合うトークンが共起するアイテムのみ）"""
+        hits = [self._index.lookup(token) for token in near]
+        docs = set()
+        for a, b in zip(hits, hits[1:]):
+            docs.update(d for d, flags in a.items() if flags & FIELD_TEXT and b.get(d, 0) & FIELD_TEXT)
+        weight = config.SEARCH_PROXIMITY_WEIGHT
+        for doc_id in docs:
+            scores[doc_id] += proximity_bonus(self._index, doc_id, near, weight)
+    
+    def _search(
+        self,
+        query: str,
+        screen_id: str,
+        max_results: int,
+        category: str,
+        with_facets: bool = True
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """検索実行（キャッシュなし）"""
+        prepared = self._prepare_tokens(query)
+        required, near = self._query_constraints(query)
+        if prepared is None and required is None:
+            return [], {}
+        
+        if prepared is None:
+            # フィールド指定のみ: 該当アイテムを優先度順に列挙
+            scored, facets = self._rank_filtered(required, screen_id, category)
+        elif self._vector is not None:
+            tokens, keyword_hits = prepared
+            scores = self._vector.score(self._query_spec(tokens, keyword_hits))
+            if near:
+                self._add_proximity(scores, near)
+            scored, facets = self._vector.rank(scores, screen_id, category, max_results, required)
+        elif not with_facets and config.SEARCH_TOPK_MODE.lower() == "maxscore":
+            scored = self._rank_top_k(*prepared, screen_id, category, max_results, required, near)
+            facets = {}
+        else:
+            scored, facets = self._rank(*prepared, screen_id, category, required, near)
         
-        for item_id, item in content_repo.get_all_contents().items():
-            # 画面フィルタ
-            item_screens = item.get("screens", [])
-            if screen_id and item_screens and screen_id not in item_screens:
+        terms = self._highlight_terms(*prepared) if prepared else []
+        results = self._format_results(scored[:max_results], terms)
+        logger.info(f"Search '{query}' -> {len(results)} results")
+        return results, facets
+    
+    def _rank(
+        self,
+        tokens: List[str],
+        keyword_hits: List[List[str]],
+        screen_id: str,
+        category: str,
+        required: Optional[int] = None,
+        near: List[str] = None
+    ) -> Tuple[List[Tuple[float, int]], Dict[str, int]]:
+        """
+        候補収集・絞り込み・スコア計算（Python 実装）
+        
+        Args:
+            required: 候補をこのビットセットに限定（フィールド指定・フレーズ）
+            near: 近接ボーナスの対象トークン（tokens の先頭と同じ並び）
+        
+        Returns:
+            ([(スコア, アイテム番号)] スコア降順・同点は定義順, {category: 件数})
+        """
+        candidates = self._collect_candidates(tokens, keyword_hits, required)
+        selected, facets = self._select_candidates(candidates, screen_id, category)
+        scored = self._score_candidates(candidates, selected, near)
+        
+        # スコア降順でソート（同点はコンテンツ定義順）
+        scored.sort(key=lambda x: (-x[0], x[1]))
+        return scored, facets
+    
+    def _collect_candidates(
+        self,
+        tokens: List[str],
+        keyword_hits: List[List[str]],
+        required: Optional[int]
+    ) -> Dict[int, List[int]]:
+        """
+        候補収集（クエリトークンのポスティングのみ参照）
+        
+        フィールド指定・フレーズを満たさないアイテムは候補に入れない。
+        
+        Returns:
+            {アイテム番号: トークンごとのフィールド一致フラグ}
+        """
+        index = self._index
+        candidates: Dict[int, List[int]] = {}
+        allowed = bits_to_bytes(required, index.doc_count) if required is not None else None
+        
+        def add_hit(i: int, doc_id: int, flags: int) -> None:
+            hits = candidates.get(doc_id)
+            if hits is None:
+                if allowed is not None and not allowed[doc_id >> 3] >> (doc_id & 7) & 1:
+                    return
+                hits = candidates[doc_id] = [0] * len(tokens)
+            hits[i] |= flags
+        
+        for i, token in enumerate(tokens):
+            for doc_id, flags in index.lookup(token).items():
+                add_hit(i, doc_id, flags)
+            for kw in keyword_hits[i]:
+                for doc_id in index.keyword_items(kw):
+                    add_hit(i, doc_id, FIELD_KEYWORD)
+        return candidates
+    
+    def _select_candidates(
+        self,
+        candidates: Dict[int, List[int]],
+        screen_id: str,
+        category: str
+    ) -> Tuple[bytes, Dict[str, int]]:
+        """
+        画面・カテゴリ絞り込み（ビットセットの AND）
+        
+        カテゴリ別件数はカテゴリ絞り込み前に数える（他カテゴリの件数も提示できるように）
+        
+        Returns:
+            (絞り込み後のビットセット（バイト列）, {category: 件数})
+        """
+        index = self._index
+        size = index.doc_count
+        selected = ids_to_bits(candidates, size)
+        if screen_id:
+            selected &= index.screen_bits(screen_id)
+        facets = index.category_counts(selected)
+        if category:
+            selected &= index.category_bits.get(category, 0)
+        return bits_to_bytes(selected, size), facets
+    
+    def _score_candidates(
+        self,
+        candidates: Dict[int, List[int]],
+        selected: bytes,
+        near: List[str] = None
+    ) -> List[Tuple[float, int]]:
+        """絞り込み後の候補のスコア計算（未ソート）"""
+        scored: List[Tuple[float, int]] = []
+        documents = self._index.documents
+        
+        for doc_id, hits in candidates.items():
+            if not selected[doc_id >> 3] >> (doc_id & 7) & 1:
                 continue
-            
-            score = self._score_item(item, tokens)
-            if score > 0:
-                scored.append((score, item_id, item))
+            score = self._score_item(documents[doc_id], hits)
+            if near:
+                score += self._near_bonus(doc_id, near, hits)
+            scored.append((score, doc_id))
+        return scored
+    
+    def _rank_filtered(
+        self,
+        required: int,
+        screen_id: str,
+        category: str
+    ) -> Tuple[List[Tuple[float, int]], Dict[str, int]]:
+        """
+        フィールド指定のみのクエリ（検索語なし）
+        
+        Returns:
+            ([(優先度補正, アイテム番号)] 優先度降順・同点は定義順, {category: 件数})
+        """
+        index = self._index
+        selected = required
+        if screen_id:
+            selected &= index.screen_bits(screen_id)
+        facets = index.category_counts(selected)
+        if category:
+            selected &= index.category_bits.get(category, 0)
+        
+        documents = index.documents
+        selected_bytes = bits_to_bytes(selected, index.doc_count)
+        scored = [
+            (documents[doc_id].priority / 100.0, doc_id)
+            for doc_id in range(index.doc_count)
+            if selected_bytes[doc_id >> 3] >> (doc_id & 7) & 1
+        ]
+        scored.sort(key=lambda x: (-x[0], x[1]))
+        return scored, facets
+    
+    def _rank_top_k(
+        self,
+        tokens: List[str],
+        keyword_hits: List[List[str]],
+        screen_id: str,
+        category: str,
+        k: int,
+        required: Optional[int] = None,
+        near: List[str] = None
+    ) -> List[Tuple[float, int]]:
+        """
+        上位k件抽出（MaxScore 方式）
+        
+        トークンごとの上限スコアを大きい順に並べ、上位k件の最低スコアを
+        超えられないアイテムはスコア計算を途中で打ち切る。
+        残りのトークンの上限合計が閾値を下回った時点で、それらにしか
+        出現しないアイテムはまとめてスキップする。
+        優先度補正と近接ボーナスはアイテム単位の加点として上限に含める。
+        
+        Returns:
+            [(スコア, アイテム番号)] スコア降順・同点は定義順（最大k件）
+        """
+        if k <= 0:
+            return []
+        index = self._index
+        
+        # トークンごとのヒット（{アイテム番号: フラグ}）と上限スコア
+        token_hits: List[Dict[int, int]] = []
+        upper: List[float] = []
+        for token, kws in zip(tokens, keyword_hits):
+            hits = index.lookup(token)
+            for kw in kws:
+                for doc_id in index.keyword_items(kw):
+                    hits[doc_id] = hits.get(doc_id, 0) | FIELD_KEYWORD
+            any_flags = 0
+            for flags in hits.values():
+                any_flags |= flags
+            token_hits.append(hits)
+            upper.append(FLAG_WEIGHTS[any_flags])
+        
+        order = sorted(range(len(tokens)), key=lambda i: -upper[i])
+        lists = [token_hits[i] for i in order]
+        bounds = [upper[i] for i in order]
+        # suffix[j] = j番目以降のトークンの上限合計
+        suffix = [0.0] * (len(lists) + 1)
+        for j in range(len(lists) - 1, -1, -1):
+            suffix[j] = suffix[j + 1] + bounds[j]
+        # アイテム単位の加点（優先度補正 + 近接ボーナス）の上限
+        max_prior = index.max_prior
+        if near:
+            max_prior += max_proximity_bonus(near, config.SEARCH_PROXIMITY_WEIGHT)
         
-        # スコア降順でソート
-        scored.sort(key=lambda x: x[0], reverse=True)
+        restrict = None
+        if screen_id or category or required is not None:
+            bits = index.all_bits if required is None else required
+            if screen_id:
+                bits &= index.screen_bits(screen_id)
+            if category:
+                bits &= index.category_bits.get(category, 0)
+            restrict = bits_to_bytes(bits, index.doc_count)
         
-        # 結果整形
+        documents = index.documents
+        heap: List[Tuple[float, int]] = []  # (スコア, -アイテム番号) の最小ヒープ
+        scored_count = 0
+        for j, hits in enumerate(lists):
+            # 残りのトークンにしか出現しないアイテムは上位k件に入れない
+            if len(heap) == k and suffix[j] + max_prior < heap[0][0]:
+                break
+            earlier = lists[:j]
+            for doc_id in hits:
+                if restrict is not None and not restrict[doc_id >> 3] >> (doc_id & 7) & 1:
+                    continue
+                if any(doc_id in prev for prev in earlier):
+                    continue  # 先のトークンで評価済み
+                score = 0.0
+                remaining = suffix[j] + max_prior
+                for m in range(j, len(lists)):
+                    score += FLAG_WEIGHTS[lists[m].get(doc_id, 0)]
+                    remaining -= bounds[m]
+                    if len(heap) == k and (score + remaining, -doc_id) <= heap[0]:
+                        break
+                else:
+                    score += documents[doc_id].priority / 100.0
+                    if near:
+                        flags = [token_hits[i].get(doc_id, 0) for i in range(len(near))]
+                        score += self._near_bonus(doc_id, near, flags)
+                    scored_count += 1
+                    entry = (score, -doc_id)
+                    if len(heap) < k:
+                        heapq.heappush(heap, entry)
+                    elif entry > heap[0]:
+                        heapq.heapreplace(heap, entry)
+        
+        if config.SEARCH_TOPK_STATS:
+            candidates = ids_to_bits((d for hits in token_hits for d in hits), index.doc_count)
+            if required is not None:
+                candidates &= required
+            if screen_id:
+                candidates &= index.screen_bits(screen_id)
+            if category:
+                candidates &= index.category_bits.get(category, 0)
+            total = popcount(candidates)
+            with self._topk_lock:
+                self._topk_stats["queries"] += 1
+                self._topk_stats["candidates"] += total
+                self._topk_stats["scored"] += scored_count
+                self._topk_stats["skipped"] += total - scored_count
+        
+        return sorted(((score, -neg_id) for score, neg_id in heap), key=lambda x: (-x[0], x[1]))
+    
+    def _highlight_terms(self, tokens: List[str], keyword_hits: List[List[str]]) -> List[str]:
+        """ハイライト対象の語（トークン・シノニム展開語・トークンに含まれるキーワード）"""
+        terms = list(tokens)
+        for kws in keyword_hits:
+            terms.extend(kws)
+        return list(dict.fromkeys(terms))
+    
+    def _format_results(
+        self,
+        scored: List[Tuple[float, int]],
+        terms: List[str] = None
+    ) -> List[Dict[str, Any]]:
+        """結果整形（スニペットは本文中の一致箇所を中心に切り出す）"""
         results = []
-        for score, item_id, item in scored[:max_results]:
-            body = item.get("body", "")
-            snippet = body[:80] + "..." if len(body) > 80 else body
+        index = self._index
+        documents = index.documents
+        all_contents = self._contents
+        for score, doc_id in scored:
+            item_id = documents[doc_id].item_id
+            item = all_contents[item_id]
+            spans = []
+            if terms:
+                positions = index.token_positions(doc_id, terms)
+                for i, term in enumerate(terms):
+                    spans.extend((pos, len(term), i) for pos in positions[i].get(FIELD_BODY, ()))
+            snippet, highlights = self._snippets.snippet(doc_id, spans)
             results.append({
                 "id": item_id,
                 "title": item["title"],
                 "snippet": snippet,
+                "highlights": highlights,
                 "score": round(score, 2)
             })
-        
-        logger.info(f"Search '{query}' -> {len(results)} results")
         return results
 
 
+def create_search_engine() -> SearchEngine:
+    """SEARCH_ENGINE に応じた検索エンジン（fts5 の場合のみ SQLite 実装を読み込む）"""
+    if config.SEARCH_ENGINE.lower() == "fts5":
+        from search_fts import FtsSearchEngine
+        return FtsSearchEngine()
+    return SearchEngine()
+
+
 # シングルトンインスタンス
-search_engine = SearchEngine()
+search_engine = create_search_engine()
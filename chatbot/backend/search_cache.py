@@ -0,0 +1,77 @@
+# 検索結果キャッシュ
+# LRU + TTL（コンテンツバージョンでスタンプし、再ロード時に無効化）
+
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, Hashable, Optional
+
+
+class SearchCache:
+    """検索結果の LRU/TTL キャッシュ（スレッドセーフ）"""
+
+    def __init__(self, max_size: int, ttl: float):
+        """
+        Args:
+            max_size: 最大エントリ数（0 でキャッシュ無効）
+            ttl: 有効期限（秒、0 で無期限）
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, version: str) -> Optional[Any]:
+        """キャッシュ取得（バージョン不一致・期限切れはミス扱い）"""
+        if self.max_size <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, entry_version, stored_at = entry
+                if entry_version != version:
+                    del self._entries[key]
+                elif self.ttl and time.monotonic() - stored_at > self.ttl:
+                    del self._entries[key]
+                    self.expirations += 1
+                else:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, version: str, value: Any) -> None:
+        """キャッシュ登録（上限超過時は最も古いエントリを破棄）"""
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, version, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """全エントリを破棄（カウンタは保持）"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """ヒット率などの統計"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
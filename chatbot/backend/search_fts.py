@@ -0,0 +1,469 @@
+# FTS5 検索エンジン
+# SQLite の全文検索（contents.db の content_fts、search_fts_index.py で作成）で
+# 候補収集・絞り込み・スコア計算を行う（SEARCH_ENGINE=fts5）
+# インデックスはファイル上にあり、複数ワーカーで共有する（プロセスごとにインデックスを構築・保持しない）
+
+import json
+import time
+import heapq
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+
+from config import config
+from content_repo import content_repo, ContentValidationError
+from normalizer import normalize_width, fold_kana, normalize_text
+from search import SearchEngine, SearchState, state_property
+from search_index import SearchDocument, FLAG_WEIGHTS, FIELD_TITLE, FIELD_KEYWORD, FIELD_BODY
+from search_fts_index import FTS_COLUMNS, fts_grams, fts_phrase, text_positions
+from search_proximity import has_phrase, PHRASE_MAX_GAP
+from search_query import QueryFilter, priority_range
+from search_snippet import SnippetBuilder
+from search_suggest import SOURCES
+
+logger = logging.getLogger(__name__)
+
+# フレーズ内の隣接トークン間にある bi-gram の最大数（PHRASE_MAX_GAP 文字 + 語の区切り）
+PHRASE_GAP_GRAMS = PHRASE_MAX_GAP + 1
+
+# 加点 → スコア内訳の項目名（explain 用）
+_FIELD_NAMES = {
+    FLAG_WEIGHTS[FIELD_TITLE]: "title",
+    FLAG_WEIGHTS[FIELD_KEYWORD]: "keyword",
+    FLAG_WEIGHTS[FIELD_BODY]: "body",
+}
+
+
+class FtsSearchState(SearchState):
+    """FTS5 検索の状態（開いたデータベース。スレッドごとに接続を持つ）"""
+
+    def __init__(self, db_path: Path):
+        super().__init__()
+        self.db_path = db_path
+        self._local = threading.local()
+        # カテゴリ別件数の並び（コンテンツでの初出順、python エンジンと同じ）
+        self.categories: List[str] = []
+
+    def query(self, sql: str, params: Iterable[Any] = ()) -> List[tuple]:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True)
+            self._local.conn = conn
+        return conn.execute(sql, tuple(params)).fetchall()
+
+
+class FtsSearchEngine(SearchEngine):
+    """
+    FTS5 検索エンジン
+
+    クエリ解析・シノニム展開・結果キャッシュは SearchEngine と共通で、候補収集・絞り込み・
+    スコア計算（タイトル 3 / キーワード 2 / 本文 1 + 優先度補正）を1回の SQL で行う。
+    近接ボーナスと表記ゆれ補正（「もしかして」）は行わない。
+    """
+
+    _categories = state_property("categories")
+
+    def __init__(self, db_path: str = None):
+        super().__init__()
+        self.db_path = Path(db_path or config.CONTENT_SQLITE_PATH)
+
+    def build_state(self) -> FtsSearchState:
+        """検索設定を読み込み、データベースを開く（現在の状態は変更しない）"""
+        if not self.db_path.exists():
+            raise ContentValidationError(f"Search database not found: {self.db_path}")
+        state = FtsSearchState(self.db_path)
+        search_config = content_repo.get_search_config()
+        state.synonyms = self._normalize_synonyms(search_config.get("synonyms", {}))
+        state.stopwords = {normalize_width(w) for w in search_config.get("stopwords", [])}
+        keyword_terms = [row[0] for row in state.query("SELECT term FROM keyword_terms ORDER BY position")]
+        state.keyword_matcher.build(keyword_terms, state.synonyms)
+        state.categories = [row[0] for row in state.query(
+            "SELECT category FROM contents GROUP BY category ORDER BY MIN(rowid)"
+        )]
+        state.version = content_repo.get_version()
+        rows = state.query("SELECT value FROM meta WHERE key = 'version'")
+        if not rows or json.loads(rows[0][0]) != state.version:
+            logger.warning(f"Search database {self.db_path} does not match content version {state.version}")
+        logger.info(f"FTS5 search initialized: {self.db_path} ({len(keyword_terms)} keywords)")
+        return state
+
+    def _query(self, sql: str, params: Iterable[Any] = ()) -> List[tuple]:
+        return self.state().query(sql, params)
+
+    def save_index(self, path: str = None) -> Dict[str, Any]:
+        """
+        何も書き出さない（FTS5 のインデックスは build_sqlite.py で作成したデータベース上にある）
+
+        Args:
+            path: 使わない（SearchEngine.save_index と同じ呼び出し方にするため）
+
+        Returns:
+            {"path", "bytes", "content_version", "items"}（データベースの情報）
+        """
+        state = self.state()
+        items = state.query("SELECT COUNT(*) FROM contents")[0][0]
+        logger.info(f"SEARCH_ENGINE=fts5 uses the index in {self.db_path}, nothing to save")
+        return {
+            "path": str(self.db_path),
+            "bytes": self.db_path.stat().st_size,
+            "content_version": state.version,
+            "items": items,
+        }
+
+    def suggest(
+        self,
+        prefix: str,
+        screen_id: str = None,
+        limit: int = None
+    ) -> List[Dict[str, Any]]:
+        """
+        入力補完（タイトル・キーワード・シノニムの前方一致、優先度順）
+
+        同じ語が複数の行にある場合は SuggestIndex と同じく優先度・種別の高いもの
+        （画面指定時は画面指定なしの行、同順位なら先に登録された行）を残す。
+        """
+        if limit is None:
+            limit = config.SUGGEST_MAX_RESULTS
+
+        # 入力のたびに変わる接頭辞はクエリのメモに入れない（検索クエリのメモを押し出さない）
+        prefix = normalize_text(prefix)
+        if not prefix or limit <= 0:
+            return []
+        params: List[Any] = [prefix, prefix + chr(0x10FFFF)]
+        scope, tiebreak = "", ""
+        if screen_id:
+            scope, tiebreak = "AND (screen_id = ? OR screen_id = '')", "screen_id <> '', "
+            params.append(screen_id)
+        rows = self._query(
+            "SELECT term, text, source, priority, item_id FROM ("
+            "SELECT *, ROW_NUMBER() OVER ("
+            f"PARTITION BY term ORDER BY priority DESC, source, {tiebreak}rowid) AS n "
+            f"FROM suggest_terms WHERE term >= ? AND term < ? {scope}"
+            ") WHERE n = 1 ORDER BY priority DESC, source, length(term), term LIMIT ?",
+            params + [limit]
+        )
+        suggestions = []
+        for _, text, source, priority, item_id in rows:
+            suggestion = {"text": text, "type": SOURCES[source], "priority": priority}
+            if item_id:
+                suggestion["id"] = item_id
+            suggestions.append(suggestion)
+        return suggestions
+
+    def did_you_mean(
+        self,
+        query: str,
+        screen_id: str = None,
+        limit: int = None
+    ) -> List[str]:
+        """表記ゆれ補正は行わない（編集距離の辞書をメモリに持たないため、常に空）"""
+        return []
+
+    # === SQL の組み立て ===
+
+    def _hits_sql(self, tokens: List[str], keyword_hits: List[List[str]]) -> Tuple[str, List[Any]]:
+        """(rowid, トークン番号, 加点) の行（フィールドごとに1行、UNION で重複を除く）"""
+        parts, params = [], []
+        for i, token in enumerate(tokens):
+            phrase = fts_phrase(token)
+            for flag, column in FTS_COLUMNS:
+                parts.append(f"SELECT rowid, {i}, {FLAG_WEIGHTS[flag]} FROM content_fts WHERE content_fts MATCH ?")
+                params.append(f"{column} : {phrase}")
+            if keyword_hits[i]:
+                marks = ", ".join("?" * len(keyword_hits[i]))
+                parts.append(
+                    f"SELECT item_rowid, {i}, {FLAG_WEIGHTS[FIELD_KEYWORD]} FROM content_keywords "
+                    f"WHERE keyword_norm IN ({marks})"
+                )
+                params.extend(keyword_hits[i])
+        return " UNION ".join(parts), params
+
+    def _conditions(
+        self,
+        phrases: List[List[str]],
+        filters: List[QueryFilter]
+    ) -> Tuple[List[str], List[Any]]:
+        """フィールド指定・フレーズの条件（同じフィールドの指定同士は OR、異なるフィールドは AND）"""
+        include: Dict[str, List[Tuple[str, List[Any]]]] = {}
+        conditions, params = [], []
+        for negate, field, value in filters:
+            if field == "":
+                condition = "c.rowid IN (SELECT rowid FROM content_fts WHERE content_fts MATCH ?)"
+                values = [fts_phrase(fold_kana(value))]
+            elif field == "category":
+                values = value.split(",")
+                condition = f"c.category IN ({', '.join('?' * len(values))})"
+            elif field == "screen":
+                values = value.split(",")
+                condition = self._screen_condition(len(values))
+            else:
+                lo, hi = priority_range(value)
+                bounds = [("c.priority >= ?", lo), ("c.priority <= ?", hi)]
+                condition = " AND ".join(sql for sql, bound in bounds if bound is not None)
+                values = [bound for _, bound in bounds if bound is not None]
+            if negate:
+                conditions.append(f"NOT ({condition})")
+                params.extend(values)
+            else:
+                include.setdefault(field, []).append((condition, values))
+        for alternatives in include.values():
+            conditions.append("(" + " OR ".join(f"({sql})" for sql, _ in alternatives) + ")")
+            for _, values in alternatives:
+                params.extend(values)
+        for phrase in phrases:
+            condition, values = self._phrase_condition(phrase)
+            conditions.append(condition)
+            params.extend(values)
+        return conditions, params
+
+    @staticmethod
+    def _screen_condition(count: int) -> str:
+        """画面で表示対象になるアイテム（画面指定なしのアイテムを含む）"""
+        marks = ", ".join("?" * count)
+        return (
+            "(c.unscoped = 1 OR c.rowid IN "
+            f"(SELECT item_rowid FROM content_screens WHERE screen_id IN ({marks})))"
+        )
+
+    def _phrase_condition(self, phrase: List[str]) -> Tuple[str, List[Any]]:
+        """
+        フレーズを含むアイテムの条件
+
+        複数トークンのフレーズは NEAR で候補を絞り、タイトル・本文上の位置を
+        has_phrase() で照合したアイテムに限定する（Python 実装と同じ判定）。
+        """
+        if len(phrase) == 1:
+            return "c.rowid IN (SELECT rowid FROM content_fts WHERE content_fts MATCH ?)", [fts_phrase(phrase[0])]
+        # 先頭と末尾のフレーズの間の bi-gram 数の上限
+        distance = sum(len(fts_grams(t)) for t in phrase[1:-1]) + PHRASE_GAP_GRAMS * (len(phrase) - 1)
+        near = f"{{title body}} : NEAR({' '.join(fts_phrase(t) for t in phrase)}, {distance})"
+        rows = self._query(
+            "SELECT rowid, title, body FROM contents "
+            "WHERE rowid IN (SELECT rowid FROM content_fts WHERE content_fts MATCH ?)",
+            (near,)
+        )
+        lengths = [len(t) for t in phrase]
+        matched = []
+        for rowid, title, body in rows:
+            for text in (normalize_text(title), normalize_text(body)):
+                positions = [text_positions(text, t) for t in phrase]
+                if all(positions) and has_phrase(positions, lengths):
+                    matched.append(rowid)
+                    break
+        # 件数が多くてもバインド変数の上限に掛からないよう JSON 配列で渡す
+        return "c.rowid IN (SELECT value FROM json_each(?))", [json.dumps(matched)]
+
+    # === 検索 ===
+
+    def _search(
+        self,
+        query: str,
+        screen_id: str,
+        max_results: int,
+        category: str,
+        with_facets: bool = True
+    ) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+        """検索実行（キャッシュなし）"""
+        prepared = self._prepare_tokens(query)
+        _, _, _, phrases, filters = self._analyze_query(query)
+        if prepared is None and not phrases and not filters:
+            return [], {}
+
+        rows, facets = self._rank_sql(prepared, phrases, filters, screen_id, category, max_results, with_facets)
+        terms = self._highlight_terms(*prepared) if prepared else []
+        results = self._format_rows(rows, terms)
+        logger.info(f"Search '{query}' -> {len(results)} results")
+        return results, facets
+
+    def _rank_sql(
+        self,
+        prepared: Optional[Tuple[List[str], List[List[str]]]],
+        phrases: List[List[str]],
+        filters: List[QueryFilter],
+        screen_id: str,
+        category: str,
+        limit: int,
+        with_facets: bool
+    ) -> Tuple[List[tuple], Dict[str, int]]:
+        """
+        候補収集・絞り込み・スコア計算
+
+        Returns:
+            ([(rowid, item_id, title, body, スコア)] スコア降順・同点は定義順, {category: 件数})
+        """
+        conditions, params = self._conditions(phrases, filters)
+        if screen_id:
+            conditions.append(self._screen_condition(1))
+            params.append(screen_id)
+
+        if prepared is None:
+            # フィールド指定のみ: 該当アイテムを優先度順に列挙
+            with_sql, with_params = "", []
+            source, score = "contents c", "c.priority / 100.0"
+        else:
+            hits_sql, with_params = self._hits_sql(*prepared)
+            with_sql = (
+                f"WITH hits(rowid, token, weight) AS ({hits_sql}), "
+                "scored AS (SELECT rowid, SUM(weight) AS score FROM hits GROUP BY rowid) "
+            )
+            source, score = "scored s JOIN contents c ON c.rowid = s.rowid", "s.score + c.priority / 100.0"
+
+        if with_facets:
+            return self._rank_with_facets(with_sql, source, score, conditions, with_params + params, category, limit)
+        if category:
+            conditions.append("c.category = ?")
+            params.append(category)
+        where = " AND ".join(conditions) or "1"
+        rows = self._query(
+            f"{with_sql}SELECT c.rowid, c.item_id, c.title, c.body, {score} AS total FROM {source} "
+            f"WHERE {where} ORDER BY total DESC, c.rowid LIMIT ?",
+            with_params + params + [limit]
+        )
+        return rows, {}
+
+    def _rank_with_facets(
+        self,
+        with_sql: str,
+        source: str,
+        score: str,
+        conditions: List[str],
+        params: List[Any],
+        category: str,
+        limit: int
+    ) -> Tuple[List[tuple], Dict[str, int]]:
+        """
+        カテゴリ別件数付きの順位付け
+
+        候補の収集とスコア計算を1回で済ませるため、画面・フィールド指定で絞った候補の
+        (rowid, category, スコア) を取得し、件数（カテゴリ絞り込み前）と上位を Python で求める。
+        """
+        where = " AND ".join(conditions) or "1"
+        candidates = self._query(f"{with_sql}SELECT c.rowid, c.category, {score} FROM {source} WHERE {where}", params)
+        counts: Dict[str, int] = {}
+        for _, item_category, _ in candidates:
+            counts[item_category] = counts.get(item_category, 0) + 1
+        facets = {name: counts[name] for name in self._categories if name in counts}
+        if category:
+            candidates = [c for c in candidates if c[1] == category]
+        top = heapq.nsmallest(limit, candidates, key=lambda c: (-c[2], c[0]))
+        rowids = [rowid for rowid, _, _ in top]
+        details = {row[0]: row for row in self._query(
+            f"SELECT rowid, item_id, title, body FROM contents WHERE rowid IN ({', '.join('?' * len(rowids))})",
+            rowids
+        )}
+        return [details[rowid] + (total,) for rowid, _, total in top], facets
+
+    def _format_rows(self, rows: List[tuple], terms: List[str]) -> List[Dict[str, Any]]:
+        """結果整形（スニペットは結果のアイテムのみ位置対応を作成して切り出す）"""
+        results = []
+        for _, item_id, title, body, score in rows:
+            doc = SearchDocument(item_id=item_id, title=normalize_text(title), body=normalize_text(body))
+            snippets = SnippetBuilder()
+            snippets.build([doc], {item_id: {"body": body}})
+            spans = []
+            for i, term in enumerate(terms):
+                spans.extend((pos, len(term), i) for pos in text_positions(doc.body, term))
+            snippet, highlights = snippets.snippet(0, spans)
+            results.append({
+                "id": item_id,
+                "title": title,
+                "snippet": snippet,
+                "highlights": highlights,
+                "score": round(score, 2)
+            })
+        return results
+
+    def explain(
+        self,
+        query: str,
+        screen_id: str = None,
+        max_results: int = None,
+        category: str = None
+    ) -> Dict[str, Any]:
+        """
+        検索の内訳（処理段階ごとの所要時間と結果ごとのスコア内訳）
+
+        SearchEngine.explain() と同じ形式。候補収集からソートまでは1回の SQL のため
+        "search" にまとめて計測する（近接ボーナスは常に 0）。
+        """
+        if max_results is None:
+            max_results = config.SEARCH_MAX_RESULTS
+
+        clock = time.perf_counter
+        timings: Dict[str, float] = {}
+        started = mark = clock()
+
+        def lap(phase: str) -> None:
+            nonlocal mark
+            now = clock()
+            timings[phase] = round((now - mark) * 1000, 3)
+            mark = now
+
+        key, text, filters = self._normalize_query(query)
+        _, tokens, phrases = self._split_query(text)
+        lap("tokenize")
+        if len(query.strip()) < config.SEARCH_MIN_QUERY_LEN:
+            tokens, phrases, filters = [], [], []
+        unique = list(dict.fromkeys(tokens))
+        expanded, keyword_hits = self._keyword_matcher.scan(unique) if unique else ([], [])
+        lap("synonyms")
+
+        prepared = (expanded, keyword_hits) if expanded else None
+        rows, facets = [], {}
+        if prepared is not None or phrases or filters:
+            rows, facets = self._rank_sql(prepared, phrases, filters, screen_id, category, max_results, True)
+        lap("search")
+        terms = self._highlight_terms(expanded, keyword_hits) if expanded else []
+        results = self._format_rows(rows, terms)
+        lap("snippet")
+        timings["total"] = round((mark - started) * 1000, 3)
+
+        # スコア内訳（結果のアイテムについてトークン・フィールドごとの一致を取り直す）
+        rowids = [row[0] for row in rows]
+        marks = ", ".join("?" * len(rowids))
+        breakdowns = {
+            rowid: {
+                "title": 0.0, "keyword": 0.0, "body": 0.0, "priority": priority / 100.0, "proximity": 0.0,
+                "matched": {token: [] for token in expanded},
+            }
+            for rowid, priority in self._query(f"SELECT rowid, priority FROM contents WHERE rowid IN ({marks})", rowids)
+        }
+        candidates = 0
+        if prepared is not None:
+            hits_sql, params = self._hits_sql(expanded, keyword_hits)
+            hits = f"WITH hits(rowid, token, weight) AS ({hits_sql}) "
+            # 候補数はフィールド指定・フレーズを満たすもの（画面・カテゴリ絞り込み前）
+            conditions, condition_params = self._conditions(phrases, filters)
+            candidates = self._query(
+                f"{hits}SELECT COUNT(*) FROM (SELECT DISTINCT rowid FROM hits) s JOIN contents c ON c.rowid = s.rowid "
+                f"WHERE {' AND '.join(conditions) or '1'}",
+                params + condition_params
+            )[0][0]
+            for rowid, token, weight in self._query(
+                f"{hits}SELECT rowid, token, weight FROM hits WHERE rowid IN ({marks}) "
+                "ORDER BY rowid, token, weight DESC",
+                params + rowids
+            ):
+                name = _FIELD_NAMES[weight]
+                breakdowns[rowid][name] += weight
+                breakdowns[rowid]["matched"][expanded[token]].append(name)
+        for result, rowid in zip(results, rowids):
+            result["breakdown"] = breakdowns[rowid]
+
+        return {
+            "query": query,
+            "normalized": key,
+            "tokens": tokens,
+            "expanded": expanded,
+            "phrases": phrases,
+            "filters": [
+                {"field": field or "term", "value": value, "negate": negate}
+                for negate, field, value in filters
+            ],
+            "candidates": candidates,
+            "results": results,
+            "facets": facets,
+            "timings_ms": timings,
+        }
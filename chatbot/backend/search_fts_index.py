@@ -0,0 +1,128 @@
+# FTS5 検索インデックス
+# contents.db に全文検索（content_fts）・キーワード・入力補完のテーブルを作成する（SEARCH_ENGINE=fts5 用）
+#
+# 語の途中への部分一致（SearchIndex と同じ）を保つため、各語を文字 bi-gram の列として格納し、
+# クエリのトークンは bi-gram のフレーズとして照合する。bi-gram は文字コードの 16 進表記にして
+# FTS5 のトークナイザが記号で分割しないようにする（「c++」「1.5」なども1トークンのまま照合できる）
+
+import re
+import sqlite3
+from typing import List, Dict, Any, Iterable
+
+from normalizer import normalize_text
+from search_index import SearchDocument, build_documents, FIELD_TITLE, FIELD_KEYWORD, FIELD_BODY
+from search_suggest import SOURCES
+
+# 検索用テーブル（write_search_tables() で content_sqlite.write_database() のテーブルに追加する）
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE content_fts USING fts5(title, keywords, body, content='', tokenize='ascii');
+CREATE TABLE keyword_terms (
+    position INTEGER PRIMARY KEY,
+    term TEXT NOT NULL UNIQUE
+);
+CREATE TABLE suggest_terms (
+    term TEXT NOT NULL,
+    text TEXT NOT NULL,
+    source INTEGER NOT NULL,
+    priority INTEGER NOT NULL,
+    item_id TEXT,
+    screen_id TEXT NOT NULL
+);
+CREATE INDEX suggest_terms_term ON suggest_terms (term);
+"""
+
+# フィールド → content_fts の列
+FTS_COLUMNS = ((FIELD_TITLE, "title"), (FIELD_KEYWORD, "keywords"), (FIELD_BODY, "body"))
+# 語の区切り（bi-gram は 16 進数字と "x" のみのため一致しない）
+WORD_BREAK = "z"
+
+_WORD = re.compile(r"\S+")
+
+
+def fts_grams(word: str) -> List[str]:
+    """語 → bi-gram のトークン（1文字の語はその文字のみ）"""
+    if len(word) < 2:
+        return [f"{ord(word):x}"]
+    return [f"{ord(a):x}x{ord(b):x}" for a, b in zip(word, word[1:])]
+
+
+def fts_words(text: str) -> str:
+    """正規化済みテキスト → content_fts に格納する列の値（語ごとの bi-gram、語の間に区切り）"""
+    return f" {WORD_BREAK} ".join(" ".join(fts_grams(word)) for word in text.split())
+
+
+def fts_phrase(token: str) -> str:
+    """トークン → 語の途中にも一致する FTS5 のフレーズ"""
+    return '"' + " ".join(fts_grams(token)) + '"'
+
+
+def write_search_tables(conn: sqlite3.Connection, data: Dict[str, Any]) -> None:
+    """
+    全文検索・キーワード一致・入力補完のテーブルを作成（contents と同じ rowid を使う）
+
+    Args:
+        conn: SEARCH_SCHEMA 作成済みの接続
+        data: コンテンツ（contents.json と同じ構造）
+    """
+    items = data.get("content_items", {})
+    documents = build_documents(items, normalize_text)
+    conn.executemany("INSERT INTO content_fts (rowid, title, keywords, body) VALUES (?, ?, ?, ?)", (
+        (rowid, fts_words(doc.title), fts_words(" ".join(doc.keywords)), fts_words(doc.body))
+        for rowid, doc in enumerate(documents.values(), 1)
+    ))
+    keywords = dict.fromkeys(kw for doc in documents.values() for kw in doc.keywords)
+    conn.executemany("INSERT INTO keyword_terms (term) VALUES (?)", ((kw,) for kw in keywords))
+    conn.executemany(
+        "INSERT INTO suggest_terms VALUES (?, ?, ?, ?, ?, ?)",
+        _suggest_rows(documents.values(), items, data.get("search_config", {}).get("synonyms", {}))
+    )
+
+
+def _suggest_rows(
+    documents: Iterable[SearchDocument],
+    items: Dict[str, Dict[str, Any]],
+    synonyms: Dict[str, List[str]]
+) -> List[tuple]:
+    """
+    補完候補の行（SuggestIndex.build() と同じ候補、画面ごとに1行）
+
+    画面指定なしのコンテンツとシノニムは screen_id が空文字（どの画面でも候補になる）
+    """
+    rows = []
+    keyword_priority: Dict[str, int] = {}
+    for doc in documents:
+        item = items[doc.item_id]
+        entries = []
+        if doc.title:
+            entries.append((doc.title, item.get("title", ""), SOURCES.index("title"), doc.priority, doc.item_id))
+        for raw, kw in zip((k for k in item.get("keywords", []) if normalize_text(k)), doc.keywords):
+            entries.append((kw, raw, SOURCES.index("keyword"), doc.priority, None))
+            keyword_priority[kw] = max(keyword_priority.get(kw, 0), doc.priority)
+        for screen_id in doc.screens or [""]:
+            rows.extend(entry + (screen_id,) for entry in entries)
+    for key, values in synonyms.items():
+        group = [key] + list(values)
+        terms = [normalize_text(t) for t in group]
+        priority = max((keyword_priority.get(t, 0) for t in terms), default=0)
+        for raw, term in zip(group, terms):
+            if term:
+                rows.append((term, raw, SOURCES.index("synonym"), priority, None, ""))
+    return rows
+
+
+def text_positions(text: str, term: str) -> List[int]:
+    """
+    正規化済みテキスト内の term の開始位置（SearchIndex.token_positions() と同じ一致範囲）
+
+    語の途中にも一致する（重なる出現も含む）。1文字の term は同じ1文字の語にのみ一致する。
+    """
+    if len(term) < 2:
+        return [m.start() for m in _WORD.finditer(text) if m.group() == term]
+    if " " in term:
+        return []
+    positions = []
+    pos = text.find(term)
+    while pos >= 0:
+        positions.append(pos)
+        pos = text.find(term, pos + 1)
+    return positions
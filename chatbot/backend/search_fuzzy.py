@@ -0,0 +1,163 @@
+# 表記ゆれ・誤入力の補正（SymSpell 方式）
+# 語彙の各語から最大編集距離分の文字を削除した形を事前に索引化し、
+# クエリ側も同様に削除形を作って辞書引きするだけで候補語を得る（語彙との総当たり比較なし）
+
+import logging
+from itertools import combinations
+from typing import Dict, List, Sequence, Set, Tuple
+
+from search_store import IndexReader, IndexWriter, StringTable, csr
+
+logger = logging.getLogger(__name__)
+
+# 削除形を索引化する語の最大長（タイトルを分割した長い語は補正候補にしない）
+FUZZY_MAX_TERM_LEN = 16
+
+
+def _deletes(term: str, max_distance: int) -> Set[str]:
+    """term から 1〜max_distance 文字を削除した形（空文字は除く）"""
+    results = set()
+    for n in range(1, min(max_distance, len(term) - 1) + 1):
+        for positions in combinations(range(len(term)), n):
+            skip = set(positions)
+            results.add("".join(c for i, c in enumerate(term) if i not in skip))
+    return results
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    制限付き Damerau-Levenshtein 距離（隣接文字の入れ替えを1とする）
+
+    Returns:
+        距離（max_distance を超える場合は max_distance + 1）
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    prev2: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, prev2[j - 2] + 1)
+            cur[j] = value
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return max_distance + 1
+        prev2, prev = prev, cur
+    return prev[len(b)] if prev[len(b)] <= max_distance else max_distance + 1
+
+
+def max_distance_for(token: str) -> int:
+    """トークン長に応じた許容編集距離（短い語ほど厳しくする）"""
+    if len(token) <= 2:
+        return 0
+    if len(token) <= 4 and token.isascii():
+        return 1
+    return 2
+
+
+class _StoredDeletes:
+    """保存済みの削除形の辞書（dict の get() と同じ形で引く）"""
+
+    def __init__(self, terms: List[str], variants: StringTable, ptr: Sequence[int], term_ids: Sequence[int]):
+        self._terms = terms
+        self._variants = variants
+        self._ptr = ptr
+        self._term_ids = term_ids
+
+    def __len__(self) -> int:
+        return len(self._variants)
+
+    def get(self, variant: str, default: Sequence[str] = ()) -> Sequence[str]:
+        row = self._variants.find(variant)
+        if row is None:
+            return default
+        return [self._terms[i] for i in self._term_ids[self._ptr[row]:self._ptr[row + 1]]]
+
+
+class SymSpellIndex:
+    """対称削除（symmetric delete）辞書"""
+
+    def __init__(self, max_distance: int = 2):
+        self.max_distance = max_distance
+        # 語 → 出現アイテム数
+        self._frequencies: Dict[str, int] = {}
+        # 削除形（語そのものを含む） → 語の一覧（保存済みインデックスの場合は _StoredDeletes）
+        self._deletes: Dict[str, List[str]] = {}
+
+    def build(self, vocabulary: Dict[str, int]) -> None:
+        """
+        語彙から削除形の辞書を構築（コンテンツ再ロード時も再実行する）
+
+        Args:
+            vocabulary: 語 → 出現アイテム数
+        """
+        frequencies: Dict[str, int] = {}
+        deletes: Dict[str, List[str]] = {}
+        for term, frequency in vocabulary.items():
+            if not term or len(term) > FUZZY_MAX_TERM_LEN:
+                continue
+            frequencies[term] = max(frequencies.get(term, 0), frequency)
+            deletes.setdefault(term, []).append(term)
+            for variant in _deletes(term, self.max_distance):
+                deletes.setdefault(variant, []).append(term)
+
+        self._frequencies = frequencies
+        self._deletes = deletes
+        logger.info(f"Fuzzy index built: {len(frequencies)} terms, {len(deletes)} deletes")
+
+    def __contains__(self, term: str) -> bool:
+        """term が語彙の語そのものか"""
+        return term in self._frequencies
+
+    def save(self, writer: IndexWriter) -> None:
+        """削除形の辞書を保存形式のセクションとして追加（削除形は辞書順の文字列表）"""
+        terms = list(self._frequencies)
+        term_ids = {term: i for i, term in enumerate(terms)}
+        variants = sorted(self._deletes)
+        writer.add_strings("fuzzy.terms", terms)
+        writer.add_array("fuzzy.frequencies", self._frequencies.values())
+        StringTable.write(writer, "fuzzy.variants", variants)
+        ptr, ids = csr([term_ids[t] for t in self._deletes[v]] for v in variants)
+        writer.add_array("fuzzy.variant_ptr", ptr)
+        writer.add_array("fuzzy.variant_terms", ids)
+
+    def load(self, reader: IndexReader) -> None:
+        """保存済みの削除形の辞書を読み込む（削除形の表は mmap 上で二分探索する）"""
+        terms = reader.strings("fuzzy.terms")
+        self._frequencies = dict(zip(terms, reader.array("fuzzy.frequencies")))
+        self._deletes = _StoredDeletes(
+            terms,
+            reader.string_table("fuzzy.variants"),
+            reader.array("fuzzy.variant_ptr"),
+            reader.array("fuzzy.variant_terms"),
+        )
+
+    def lookup(self, token: str, max_distance: int = None) -> List[Tuple[str, int, int]]:
+        """
+        編集距離 max_distance 以内の語
+
+        Returns:
+            [(語, 編集距離, 出現アイテム数)] 距離昇順 → 出現数降順
+        """
+        if max_distance is None:
+            max_distance = self.max_distance
+        max_distance = min(max_distance, self.max_distance)
+
+        seen: Set[str] = set()
+        results = []
+        deletes = self._deletes
+        for variant in {token} | _deletes(token, max_distance):
+            for term in deletes.get(variant, ()):
+                if term in seen:
+                    continue
+                seen.add(term)
+                distance = edit_distance(token, term, max_distance)
+                if distance <= max_distance:
+                    results.append((term, distance, self._frequencies[term]))
+        results.sort(key=lambda x: (x[1], -x[2], x[0]))
+        return results
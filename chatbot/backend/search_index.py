@@ -0,0 +1,460 @@
+# 検索インデックス
+# 転置インデックス（語 → ポスティング）を初期化時に一度だけ構築する
+
+import logging
+import re
+from array import array
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Callable, Iterable, Optional, Sequence, Tuple
+
+from tokenizer import char_ngrams
+from search_store import IndexReader, IndexWriter, csr
+
+logger = logging.getLogger(__name__)
+
+
+# フィールド一致フラグ（ポスティングに OR で保持）
+FIELD_TITLE = 1
+FIELD_KEYWORD = 2
+FIELD_BODY = 4
+# 位置情報を持つフィールド（キーワードは1語丸ごとのため位置を持たない）
+FIELD_TEXT = FIELD_TITLE | FIELD_BODY
+
+# フィールドフラグ → トークン1つ分のスコア（タイトル 3 / キーワード 2 / 本文 1）
+FLAG_WEIGHTS = [
+    3.0 * bool(flags & FIELD_TITLE)
+    + 2.0 * bool(flags & FIELD_KEYWORD)
+    + 1.0 * bool(flags & FIELD_BODY)
+    for flags in range(8)
+]
+
+# トークン解決キャッシュの上限（超えたら破棄）
+RESOLVE_CACHE_MAX = 4096
+
+_WORD = re.compile(r"\S+")
+
+
+@dataclass
+class SearchDocument:
+    """検索用の正規化済みドキュメント（ロード時に一度だけ作成）"""
+    item_id: str
+    title: str
+    body: str
+    keywords: List[str] = field(default_factory=list)
+    screens: List[str] = field(default_factory=list)
+    category: str = ""
+    priority: int = 50
+    title_len: int = 0
+    body_len: int = 0
+    keyword_lens: List[int] = field(default_factory=list)
+
+
+def build_documents(
+    items: Dict[str, Dict[str, Any]],
+    normalize: Callable[[str], str]
+) -> Dict[str, SearchDocument]:
+    """content_items から正規化済みドキュメントストアを作成"""
+    documents = {}
+    for item_id, item in items.items():
+        title = normalize(item.get("title", ""))
+        body = normalize(item.get("body", ""))
+        keywords = [kw for kw in (normalize(k) for k in item.get("keywords", [])) if kw]
+        documents[item_id] = SearchDocument(
+            item_id=item_id,
+            title=title,
+            body=body,
+            keywords=keywords,
+            screens=list(item.get("screens", [])),
+            category=item.get("category", ""),
+            priority=item.get("priority", 50),
+            title_len=len(title),
+            body_len=len(body),
+            keyword_lens=[len(kw) for kw in keywords]
+        )
+    return documents
+
+
+def ids_to_bits(ids: Iterable[int], size: int) -> int:
+    """アイテム番号の集合をビットセット（int）に変換"""
+    buf = bytearray((size >> 3) + 1)
+    for i in ids:
+        buf[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(buf, "little")
+
+
+def bits_to_bytes(bits: int, size: int) -> bytes:
+    """ビットセットを所属判定用のバイト列に変換（buf[i >> 3] >> (i & 7) & 1）"""
+    return bits.to_bytes((size >> 3) + 1, "little")
+
+
+def popcount(bits: int) -> int:
+    return bin(bits).count("1")
+
+
+class SearchIndex:
+    """
+    転置インデックス
+
+    語は正規化済みテキストを空白で分割したもの（キーワードは1語として丸ごと登録）。
+    クエリトークンは空白を含まないため「トークン in フィールド」は
+    「フィールド内のいずれかの語がトークンを含む」と同値になり、
+    従来の部分一致スコアリングと同じ結果を語単位のポスティングで得られる。
+
+    トークンに一致する語は文字 bi-gram の索引（bi-gram → 語ID）で候補を絞り、
+    候補語のみ部分一致を確認する。分かち書きのない日本語でも語辞書の全走査は発生しない。
+
+    アイテムには定義順の連番（アイテム番号）を振り、画面・カテゴリごとの
+    所属をビットセット（int）で保持する。絞り込みは候補ビットセットとの AND で行う。
+
+    タイトル・本文の語はアイテムごとに出現位置（正規化済みテキスト上の文字位置）も保持し、
+    フレーズ一致・近接度の判定に使う。
+
+    ポスティング・bi-gram 索引・位置情報は平坦な配列（開始位置の配列 + 値の配列）で持つ。
+    構築時は array、保存済みインデックスの読み込み時は mmap 上の memoryview を参照する。
+    """
+
+    def __init__(self):
+        # 語ID → 語
+        self._terms: List[str] = []
+        # 語ID → ポスティング（アイテム番号の昇順、フィールドフラグ）
+        self._term_ptr: Sequence[int] = array("i", [0])
+        self._term_docs: Sequence[int] = array("i")
+        self._term_flags: Sequence[int] = array("B")
+        # bi-gram → 行番号、行 → 語ID（昇順）
+        self._ngrams: Dict[str, int] = {}
+        self._ngram_ptr: Sequence[int] = array("i", [0])
+        self._ngram_terms: Sequence[int] = array("i")
+        # キーワード → 行番号、行 → そのキーワードを持つアイテム番号（KeywordMatcher の一致先）
+        self._keywords: Dict[str, int] = {}
+        self._keyword_ptr: Sequence[int] = array("i", [0])
+        self._keyword_docs: Sequence[int] = array("i")
+        # トークン → 一致した語の解決結果キャッシュ
+        self._resolve_cache: Dict[str, List[int]] = {}
+        self._resolve_set_cache: Dict[str, frozenset] = {}
+        # アイテム番号 → 位置情報（語ID, フィールド, 開始文字位置 の3つ組を平坦に並べた配列）
+        self._forward_ptr: Sequence[int] = array("i", [0])
+        self._forward: Sequence[int] = array("i")
+        # アイテム番号 → 正規化済みドキュメント、item_id → アイテム番号
+        self.documents: List[SearchDocument] = []
+        self.doc_order: Dict[str, int] = {}
+        self.doc_count = 0
+        # 画面 → ビットセット（画面指定なしのアイテムを含む）
+        self._screen_bits: Dict[str, int] = {}
+        # 画面指定なしのアイテム（未登録の画面IDで絞り込む場合に使う）
+        self.unscoped_bits = 0
+        # カテゴリ → ビットセット
+        self.category_bits: Dict[str, int] = {}
+        # 優先度の値 → ビットセット（範囲指定は該当する値の OR）
+        self._priority_bits: Dict[int, int] = {}
+        self.all_bits = 0
+        # 優先度補正の最大値（上位k件抽出の上限スコア計算用）
+        self.max_prior = 0.0
+
+    def build(self, documents: Dict[str, SearchDocument]) -> None:
+        """
+        ドキュメントストアからインデックスを構築
+
+        Args:
+            documents: build_documents() の結果（item_id → SearchDocument）
+        """
+        postings: Dict[str, Dict[int, int]] = {}
+        keyword_postings: Dict[str, List[int]] = {}
+        screen_ids: Dict[str, List[int]] = {}
+        category_ids: Dict[str, List[int]] = {}
+        priority_ids: Dict[int, List[int]] = {}
+        unscoped_ids: List[int] = []
+        # 語 → 語ID（postings の挿入順と同じ）
+        term_ids: Dict[str, int] = {}
+        forward_ptr = array("i", [0])
+        forward = array("i")
+
+        def add(term: str, doc_id: int, flag: int) -> int:
+            doc_flags = postings.setdefault(term, {})
+            doc_flags[doc_id] = doc_flags.get(doc_id, 0) | flag
+            return term_ids.setdefault(term, len(term_ids))
+
+        docs = list(documents.values())
+        for doc_id, doc in enumerate(docs):
+            for flag, text in ((FIELD_TITLE, doc.title), (FIELD_BODY, doc.body)):
+                for match in _WORD.finditer(text):
+                    forward.extend((add(match.group(), doc_id, flag), flag, match.start()))
+            forward_ptr.append(len(forward))
+            for term in doc.keywords:
+                add(term, doc_id, FIELD_KEYWORD)
+                docs_with_kw = keyword_postings.setdefault(term, [])
+                if not docs_with_kw or docs_with_kw[-1] != doc_id:
+                    docs_with_kw.append(doc_id)
+            if doc.screens:
+                for screen in doc.screens:
+                    screen_ids.setdefault(screen, []).append(doc_id)
+            else:
+                unscoped_ids.append(doc_id)
+            category_ids.setdefault(doc.category, []).append(doc_id)
+            priority_ids.setdefault(doc.priority, []).append(doc_id)
+
+        size = len(docs)
+        terms = list(postings)
+        ngram_postings: Dict[str, List[int]] = {}
+        for term_id, term in enumerate(terms):
+            for gram in char_ngrams(term):
+                ngram_postings.setdefault(gram, []).append(term_id)
+
+        term_ptr, term_docs, term_flags = array("i", [0]), array("i"), array("B")
+        for term in terms:
+            doc_flags = postings[term]
+            term_docs.extend(doc_flags)
+            term_flags.extend(doc_flags.values())
+            term_ptr.append(len(term_docs))
+
+        self._terms = terms
+        self._term_ptr, self._term_docs, self._term_flags = term_ptr, term_docs, term_flags
+        self._ngrams = {gram: row for row, gram in enumerate(ngram_postings)}
+        self._ngram_ptr, self._ngram_terms = csr(ngram_postings.values())
+        self._keywords = {kw: row for row, kw in enumerate(keyword_postings)}
+        self._keyword_ptr, self._keyword_docs = csr(keyword_postings.values())
+        self._forward_ptr, self._forward = forward_ptr, forward
+        self._set_documents(docs)
+        unscoped_bits = ids_to_bits(unscoped_ids, size)
+        self._screen_bits = {
+            screen: ids_to_bits(ids, size) | unscoped_bits for screen, ids in screen_ids.items()
+        }
+        self.unscoped_bits = unscoped_bits
+        self.category_bits = {cat: ids_to_bits(ids, size) for cat, ids in category_ids.items()}
+        self._priority_bits = {p: ids_to_bits(ids, size) for p, ids in priority_ids.items()}
+        logger.info(
+            f"Search index built: {self.doc_count} items, {len(terms)} terms, "
+            f"{len(self._ngrams)} n-grams"
+        )
+
+    def _set_documents(self, docs: List[SearchDocument]) -> None:
+        self.documents = docs
+        self.doc_order = {doc.item_id: i for i, doc in enumerate(docs)}
+        self.doc_count = len(docs)
+        self.all_bits = (1 << len(docs)) - 1
+        self.max_prior = max((doc.priority / 100.0 for doc in docs), default=0.0)
+        self._resolve_cache = {}
+        self._resolve_set_cache = {}
+
+    def save(self, writer: IndexWriter) -> None:
+        """インデックスを保存形式のセクションとして追加"""
+        docs = self.documents
+        writer.add_strings("index.terms", self._terms)
+        writer.add_array("index.term_ptr", self._term_ptr)
+        writer.add_array("index.term_docs", self._term_docs)
+        writer.add_array("index.term_flags", self._term_flags, "B")
+        writer.add_strings("index.ngrams", list(self._ngrams))
+        writer.add_array("index.ngram_ptr", self._ngram_ptr)
+        writer.add_array("index.ngram_terms", self._ngram_terms)
+        writer.add_strings("index.keywords", list(self._keywords))
+        writer.add_array("index.keyword_ptr", self._keyword_ptr)
+        writer.add_array("index.keyword_docs", self._keyword_docs)
+        writer.add_array("index.forward_ptr", self._forward_ptr)
+        writer.add_array("index.forward", self._forward)
+        # 正規化済みドキュメント（アイテムID・画面・カテゴリ・優先度はコンテンツから復元）
+        writer.add_strings("index.titles", [doc.title for doc in docs])
+        writer.add_strings("index.bodies", [doc.body for doc in docs])
+        keyword_ptr, keywords = array("i", [0]), []
+        for doc in docs:
+            keywords.extend(doc.keywords)
+            keyword_ptr.append(len(keywords))
+        writer.add_strings("index.doc_keywords", keywords)
+        writer.add_array("index.doc_keyword_ptr", keyword_ptr)
+        for name, bitsets in (("screens", self._screen_bits), ("categories", self.category_bits)):
+            writer.add_strings(f"index.{name}", list(bitsets))
+            writer.add_bytes(f"index.{name}.bits", self._pack_bits(bitsets.values()))
+        writer.add_array("index.priorities", list(self._priority_bits))
+        writer.add_bytes("index.priorities.bits", self._pack_bits(self._priority_bits.values()))
+        writer.add_bytes("index.unscoped.bits", self._pack_bits([self.unscoped_bits]))
+
+    def load(self, reader: IndexReader, items: Dict[str, Dict[str, Any]]) -> None:
+        """
+        保存済みインデックスを読み込む（配列は mmap 上を参照）
+
+        Args:
+            reader: 保存済みインデックス（アイテムの並びが items と一致することを確認済み）
+            items: content_items
+        """
+        all_keywords = reader.strings("index.doc_keywords")
+        keyword_ptr = reader.array("index.doc_keyword_ptr").tolist()
+        docs = [
+            SearchDocument(
+                item_id, title, body, keywords,
+                list(item.get("screens", [])), item.get("category", ""), item.get("priority", 50),
+                len(title), len(body), [len(kw) for kw in keywords]
+            )
+            for (item_id, item), title, body, keywords in zip(
+                items.items(),
+                reader.strings("index.titles"),
+                reader.strings("index.bodies"),
+                (all_keywords[start:end] for start, end in zip(keyword_ptr, keyword_ptr[1:]))
+            )
+        ]
+
+        self._terms = reader.strings("index.terms")
+        self._term_ptr = reader.array("index.term_ptr")
+        self._term_docs = reader.array("index.term_docs")
+        self._term_flags = reader.array("index.term_flags")
+        self._ngrams = {gram: row for row, gram in enumerate(reader.strings("index.ngrams"))}
+        self._ngram_ptr = reader.array("index.ngram_ptr")
+        self._ngram_terms = reader.array("index.ngram_terms")
+        self._keywords = {kw: row for row, kw in enumerate(reader.strings("index.keywords"))}
+        self._keyword_ptr = reader.array("index.keyword_ptr")
+        self._keyword_docs = reader.array("index.keyword_docs")
+        self._forward_ptr = reader.array("index.forward_ptr")
+        self._forward = reader.array("index.forward")
+        self._set_documents(docs)
+
+        def bits(name: str) -> List[int]:
+            return self._unpack_bits(reader.blob(f"index.{name}.bits"))
+
+        self._screen_bits = dict(zip(reader.strings("index.screens"), bits("screens")))
+        self.category_bits = dict(zip(reader.strings("index.categories"), bits("categories")))
+        self._priority_bits = dict(zip(reader.array("index.priorities"), bits("priorities")))
+        self.unscoped_bits = bits("unscoped")[0]
+        logger.info(f"Search index loaded: {self.doc_count} items, {len(self._terms)} terms")
+
+    def _pack_bits(self, bitsets: Iterable[int]) -> bytes:
+        """ビットセットを固定長のバイト列にして連結"""
+        return b"".join(bits_to_bytes(bits, self.doc_count) for bits in bitsets)
+
+    def _unpack_bits(self, data: bytes) -> List[int]:
+        width = (self.doc_count >> 3) + 1
+        return [int.from_bytes(data[i:i + width], "little") for i in range(0, len(data), width)]
+
+    def resolve(self, token: str) -> List[int]:
+        """トークンを部分文字列として含む語の語ID一覧"""
+        cached = self._resolve_cache.get(token)
+        if cached is not None:
+            return cached
+
+        # 語がトークンを含む → 全フィールドで一致
+        # （キーワードがトークンに含まれる場合は KeywordMatcher が検出する）
+        matched = self._terms_containing(token)
+
+        if len(self._resolve_cache) >= RESOLVE_CACHE_MAX:
+            self._resolve_cache.clear()
+        self._resolve_cache[token] = matched
+        return matched
+
+    def resolve_set(self, token: str) -> frozenset:
+        """resolve() の集合版（位置情報の照合用）"""
+        cached = self._resolve_set_cache.get(token)
+        if cached is None:
+            if len(self._resolve_set_cache) >= RESOLVE_CACHE_MAX:
+                self._resolve_set_cache.clear()
+            cached = self._resolve_set_cache[token] = frozenset(self.resolve(token))
+        return cached
+
+    def token_positions(self, doc_id: int, tokens: List[str]) -> List[Dict[int, List[int]]]:
+        """
+        アイテム内でのトークンの出現位置（位置情報を1回走査）
+
+        Returns:
+            トークンごとの {フィールドフラグ: 開始文字位置の昇順リスト}
+        """
+        term_sets = [self.resolve_set(token) for token in tokens]
+        result: List[Dict[int, List[int]]] = [{} for _ in tokens]
+        positions = self._forward[self._forward_ptr[doc_id]:self._forward_ptr[doc_id + 1]]
+        terms = self._terms
+        for k in range(0, len(positions), 3):
+            term_id = positions[k]
+            for i, ids in enumerate(term_sets):
+                if term_id not in ids:
+                    continue
+                term, token = terms[term_id], tokens[i]
+                bucket = result[i].setdefault(positions[k + 1], [])
+                start = positions[k + 2]
+                offset = term.find(token)
+                while offset >= 0:
+                    bucket.append(start + offset)
+                    offset = term.find(token, offset + 1)
+        return result
+
+    def _terms_containing(self, token: str) -> List[int]:
+        """
+        token を部分文字列として含む語
+
+        token の bi-gram のうち最も語数の少ないものの語だけを部分一致で確認する
+        （部分一致する語は token のすべての bi-gram を含むため、積集合を取る必要はない）
+        """
+        ptr = self._ngram_ptr
+        smallest = None
+        for gram in char_ngrams(token):
+            row = self._ngrams.get(gram)
+            if row is None:
+                return []
+            if smallest is None or ptr[row + 1] - ptr[row] < ptr[smallest + 1] - ptr[smallest]:
+                smallest = row
+        if smallest is None:
+            return []
+        terms = self._terms
+        return [i for i in self._ngram_terms[ptr[smallest]:ptr[smallest + 1]] if token in terms[i]]
+
+    def lookup(self, token: str) -> Dict[int, int]:
+        """
+        トークンのヒット情報を取得
+
+        Returns:
+            {アイテム番号: フィールドフラグ}（一致したアイテムのみ）
+        """
+        hits: Dict[int, int] = {}
+        ptr, docs, flags = self._term_ptr, self._term_docs, self._term_flags
+        for term_id in self.resolve(token):
+            start, end = ptr[term_id], ptr[term_id + 1]
+            if not hits:
+                hits = dict(zip(docs[start:end], flags[start:end]))
+                continue
+            for doc_id, doc_flags in zip(docs[start:end], flags[start:end]):
+                hits[doc_id] = hits.get(doc_id, 0) | doc_flags
+        return hits
+
+    @property
+    def term_count(self) -> int:
+        return len(self._terms)
+
+    def postings_arrays(self) -> Tuple[Sequence[int], Sequence[int], Sequence[int]]:
+        """全語のポスティング（語IDごとの開始位置, アイテム番号, フィールドフラグ）"""
+        return self._term_ptr, self._term_docs, self._term_flags
+
+    def vocabulary(self) -> Dict[str, int]:
+        """語 → 出現アイテム数（表記ゆれ補正の辞書構築用）"""
+        ptr = self._term_ptr
+        return {term: ptr[i + 1] - ptr[i] for i, term in enumerate(self._terms)}
+
+    @property
+    def keyword_terms(self) -> List[str]:
+        """登録済みキーワード一覧（KeywordMatcher の構築用）"""
+        return list(self._keywords)
+
+    def keyword_items(self, term: str) -> Sequence[int]:
+        """キーワード term を持つアイテム番号一覧"""
+        row = self._keywords.get(term)
+        if row is None:
+            return []
+        return self._keyword_docs[self._keyword_ptr[row]:self._keyword_ptr[row + 1]]
+
+    @property
+    def screens(self) -> List[str]:
+        """コンテンツで使われている画面ID一覧"""
+        return list(self._screen_bits)
+
+    def screen_bits(self, screen_id: str) -> int:
+        """画面で表示対象になるアイテムのビットセット（画面指定なしのアイテムを含む）"""
+        return self._screen_bits.get(screen_id, self.unscoped_bits)
+
+    def priority_bits(self, lo: Optional[int] = None, hi: Optional[int] = None) -> int:
+        """優先度が lo 以上 hi 以下のアイテムのビットセット（None は上限・下限なし）"""
+        bits = 0
+        for priority, priority_bits in self._priority_bits.items():
+            if (lo is None or priority >= lo) and (hi is None or priority <= hi):
+                bits |= priority_bits
+        return bits
+
+    def category_counts(self, bits: int) -> Dict[str, int]:
+        """ビットセット内のカテゴリ別件数（0件のカテゴリは除く）"""
+        counts = {}
+        for category, cat_bits in self.category_bits.items():
+            count = popcount(bits & cat_bits)
+            if count:
+                counts[category] = count
+        return counts
@@ -0,0 +1,104 @@
+# フレーズ一致・近接度
+# インデックスの位置情報（昇順の文字位置リスト）を線形マージして判定する（本文の部分文字列検索なし）
+
+from typing import List, Optional
+
+from search_index import SearchIndex, ids_to_bits, FIELD_TITLE, FIELD_BODY, FIELD_TEXT
+
+# フレーズ内の隣接トークン間に許す文字数（空白・除去された助詞1文字分）
+PHRASE_MAX_GAP = 2
+# 近接ボーナスが付くトークン間の最大文字数
+PROXIMITY_WINDOW = 10
+
+
+def min_gap(a: List[int], len_a: int, b: List[int], len_b: int) -> int:
+    """
+    2つのトークンの出現位置の最小間隔（文字数、重なる場合は 0）
+
+    両リストとも昇順のため、先に出現する側を進める線形マージで求める。
+    """
+    best = None
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i] <= b[j]:
+            gap = b[j] - (a[i] + len_a)
+            i += 1
+        else:
+            gap = a[i] - (b[j] + len_b)
+            j += 1
+        gap = max(gap, 0)
+        if best is None or gap < best:
+            best = gap
+            if best == 0:
+                break
+    return best
+
+
+def has_phrase(positions: List[List[int]], lengths: List[int]) -> bool:
+    """
+    トークンが順に隣接して出現するか（間隔 PHRASE_MAX_GAP 文字以内）
+
+    前のトークンまで一致した箇所の終端位置と次のトークンの開始位置を線形マージで突き合わせる。
+    """
+    ends = [p + lengths[0] for p in positions[0]]
+    for token_positions, length in zip(positions[1:], lengths[1:]):
+        next_ends = []
+        k = 0
+        for p in token_positions:
+            while k < len(ends) and ends[k] < p - PHRASE_MAX_GAP:
+                k += 1
+            if k < len(ends) and ends[k] <= p:
+                next_ends.append(p + length)
+        if not next_ends:
+            return False
+        ends = next_ends
+    return True
+
+
+def phrase_bits(index: SearchIndex, phrase: List[str]) -> int:
+    """フレーズ（正規化済みトークン列）をタイトルまたは本文に含むアイテムのビットセット"""
+    candidates: Optional[set] = None
+    for token in phrase:
+        hits = index.lookup(token)
+        docs = {d for d, flags in hits.items() if flags & FIELD_TEXT} if len(phrase) > 1 else set(hits)
+        candidates = docs if candidates is None else candidates & docs
+        if not candidates:
+            return 0
+    if len(phrase) == 1:
+        return ids_to_bits(candidates, index.doc_count)
+
+    lengths = [len(t) for t in phrase]
+    matched = []
+    for doc_id in candidates:
+        positions = index.token_positions(doc_id, phrase)
+        for field in (FIELD_TITLE, FIELD_BODY):
+            if all(field in p for p in positions) and has_phrase([p[field] for p in positions], lengths):
+                matched.append(doc_id)
+                break
+    return ids_to_bits(matched, index.doc_count)
+
+
+def proximity_bonus(index: SearchIndex, doc_id: int, tokens: List[str], weight: float) -> float:
+    """
+    クエリ内で隣り合うトークンがアイテム内で近いほど大きい加点
+
+    トークン対ごとに weight × (1 - 最小間隔 / PROXIMITY_WINDOW)（同じフィールド内のみ）
+    """
+    positions = index.token_positions(doc_id, tokens)
+    bonus = 0.0
+    for i in range(len(tokens) - 1):
+        best = None
+        for field in (FIELD_TITLE, FIELD_BODY):
+            a, b = positions[i].get(field), positions[i + 1].get(field)
+            if a and b:
+                gap = min_gap(a, len(tokens[i]), b, len(tokens[i + 1]))
+                if best is None or gap < best:
+                    best = gap
+        if best is not None and best < PROXIMITY_WINDOW:
+            bonus += weight * (1.0 - best / PROXIMITY_WINDOW)
+    return bonus
+
+
+def max_proximity_bonus(tokens: List[str], weight: float) -> float:
+    """proximity_bonus() の上限（上位k件抽出の上限スコア用）"""
+    return weight * max(len(tokens) - 1, 0)
@@ -0,0 +1,120 @@
+# 検索クエリのフィールド指定
+# category:faq screen:yield_admin priority:>=80 -category:glossary -語 のような指定を
+# インデックスのビットセット演算で評価する（スコア計算前に候補を絞る）
+
+import re
+from typing import Callable, List, Optional, Tuple
+
+from search_index import SearchIndex
+
+# (否定, フィールド, 値)。フィールドが空文字の場合は語の除外（-語）
+QueryFilter = Tuple[bool, str, str]
+
+# フィールド名の別名
+FIELD_ALIASES = {
+    "category": "category",
+    "cat": "category",
+    "screen": "screen",
+    "screens": "screen",
+    "priority": "priority",
+}
+
+_FILTER = re.compile(r"(?:(?<=\s)|^)(-?)([a-z]+):(\S+)")
+_EXCLUDE = re.compile(r"(?:(?<=\s)|^)-(\S+)")
+_PRIORITY_RANGE = re.compile(r"^(\d+)\.\.(\d+)$")
+_PRIORITY_COMPARE = re.compile(r"^(>=|<=|>|<|=)?(\d+)$")
+
+
+def parse_filters(text: str) -> Tuple[str, List[QueryFilter]]:
+    """
+    クエリからフィールド指定を取り出す
+
+    Args:
+        text: 表記統一済みのクエリ（かな統一前）
+
+    Returns:
+        (フィールド指定を除いたクエリ, フィールド指定)
+    """
+    filters: List[QueryFilter] = []
+
+    def take_field(match: "re.Match") -> str:
+        field = FIELD_ALIASES.get(match.group(2))
+        if field is None or (field == "priority" and priority_range(match.group(3)) is None):
+            return match.group(0)  # フィールド指定ではない（通常の語として扱う）
+        filters.append((match.group(1) == "-", field, match.group(3)))
+        return " "
+
+    def take_exclude(match: "re.Match") -> str:
+        filters.append((True, "", match.group(1)))
+        return " "
+
+    text = _FILTER.sub(take_field, text)
+    text = _EXCLUDE.sub(take_exclude, text)
+    return text, filters
+
+
+def format_filter(query_filter: QueryFilter) -> str:
+    """フィールド指定をクエリの表記に戻す（補正後のクエリに元の指定を残すため）"""
+    negate, field, value = query_filter
+    return f"{'-' if negate else ''}{field + ':' if field else ''}{value}"
+
+
+def priority_range(value: str) -> Optional[Tuple[int, int]]:
+    """priority の値（80 / >=80 / <30 / 50..90）を閉区間に変換（不正な値は None）"""
+    match = _PRIORITY_RANGE.match(value)
+    if match:
+        return int(match.group(1)), int(match.group(2))
+    match = _PRIORITY_COMPARE.match(value)
+    if not match:
+        return None
+    op, n = match.group(1) or "=", int(match.group(2))
+    return {
+        "=": (n, n),
+        ">=": (n, None),
+        ">": (n + 1, None),
+        "<=": (None, n),
+        "<": (None, n - 1),
+    }[op]
+
+
+def filter_bits(
+    index: SearchIndex,
+    filters: List[QueryFilter],
+    term_bits: Callable[[str], int]
+) -> int:
+    """
+    フィールド指定を満たすアイテムのビットセット
+
+    同じフィールドの指定同士・カンマ区切りの値は OR、異なるフィールドは AND、否定は除外。
+
+    Args:
+        index: 検索インデックス
+        filters: parse_filters() の結果
+        term_bits: 除外語 → 語を含むアイテムのビットセット
+    """
+    include = {}
+    exclude = 0
+    for negate, field, value in filters:
+        if field == "":
+            bits = term_bits(value)
+        elif field == "category":
+            bits = 0
+            for category in value.split(","):
+                bits |= index.category_bits.get(category, 0)
+        elif field == "screen":
+            bits = 0
+            for screen_id in value.split(","):
+                bits |= index.screen_bits(screen_id)
+        else:
+            lo, hi = priority_range(value)
+            bits = index.priority_bits(lo, hi)
+
+        if negate:
+            exclude |= bits
+        else:
+            include[field] = include.get(field, 0) | bits
+
+    result = index.all_bits
+    for bits in include.values():
+        result &= bits
+    return result & ~exclude
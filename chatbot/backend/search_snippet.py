@@ -0,0 +1,153 @@
+# 検索結果のスニペット
+# 本文ごとの文境界と「正規化済みテキスト上の位置 → 本文上の位置」の対応をロード時に作成し、
+# 検索時はインデックスの出現位置から一致箇所を求めて切り出す（本文の再走査なし）
+# 位置対応・文境界は全アイテム分を平坦な配列で持つ（保存済みインデックスからも読み込める）
+
+import logging
+import re
+from array import array
+from bisect import bisect_right
+from typing import Dict, List, Any, Sequence, Tuple
+
+from normalizer import normalize_with_offsets
+from search_index import SearchDocument
+from search_store import IndexReader, IndexWriter
+
+logger = logging.getLogger(__name__)
+
+# スニペットの文字数（省略記号を除く）
+SNIPPET_LEN = 80
+ELLIPSIS = "..."
+LONG_VOWELS = "ーｰ"
+
+# 文の区切り（句点・感嘆符・疑問符の直後、改行）
+_SENTENCE_END = re.compile(r"[。！？!?]+|\n+")
+
+# (スニペット, [[開始, 終了], ...] スニペット内のハイライト位置)
+Snippet = Tuple[str, List[List[int]]]
+
+
+class SnippetBuilder:
+    """一致箇所を中心にしたスニペットの作成"""
+
+    def __init__(self):
+        # アイテム番号 → 本文の原文
+        self._bodies: List[str] = []
+        # アイテム番号 → 正規化済み本文の文字位置ごとの本文上の文字位置
+        # （正規化結果が一致しない本文は位置対応なし: _mapped が 0）
+        self._offset_ptr: Sequence[int] = array("i", [0])
+        self._offsets: Sequence[int] = array("i")
+        self._mapped: Sequence[int] = array("B")
+        # アイテム番号 → 各文の開始位置（本文上、昇順）
+        self._sentence_ptr: Sequence[int] = array("i", [0])
+        self._sentences: Sequence[int] = array("i")
+
+    def build(self, documents: List[SearchDocument], items: Dict[str, Dict[str, Any]]) -> None:
+        """
+        文境界と位置対応を作成（コンテンツ再ロード時も再実行する）
+
+        Args:
+            documents: 正規化済みドキュメント（アイテム番号順）
+            items: content_items（本文の原文）
+        """
+        bodies = []
+        offset_ptr, all_offsets, mapped = array("i", [0]), array("i"), array("B")
+        sentence_ptr, sentences = array("i", [0]), array("i")
+        unmapped = 0
+        for doc in documents:
+            body = items[doc.item_id].get("body", "")
+            bodies.append(body)
+            normalized, offsets = normalize_with_offsets(body)
+            if normalized == doc.body:
+                all_offsets.extend(offsets)
+                mapped.append(1)
+            else:
+                # 位置が対応しない本文はハイライトなし（先頭からのスニペット）
+                mapped.append(0)
+                unmapped += 1
+            offset_ptr.append(len(all_offsets))
+            sentences.append(0)
+            for match in _SENTENCE_END.finditer(body):
+                if match.end() < len(body):
+                    sentences.append(match.end())
+            sentence_ptr.append(len(sentences))
+        self._bodies = bodies
+        self._offset_ptr, self._offsets, self._mapped = offset_ptr, all_offsets, mapped
+        self._sentence_ptr, self._sentences = sentence_ptr, sentences
+        logger.info(f"Snippet offsets built: {len(bodies)} bodies ({unmapped} without offsets)")
+
+    def save(self, writer: IndexWriter) -> None:
+        """位置対応・文境界を保存形式のセクションとして追加（本文はコンテンツから復元）"""
+        writer.add_array("snippet.offset_ptr", self._offset_ptr)
+        writer.add_array("snippet.offsets", self._offsets)
+        writer.add_array("snippet.mapped", self._mapped, "B")
+        writer.add_array("snippet.sentence_ptr", self._sentence_ptr)
+        writer.add_array("snippet.sentences", self._sentences)
+
+    def load(self, reader: IndexReader, documents: List[SearchDocument], items: Dict[str, Dict[str, Any]]) -> None:
+        """保存済みの位置対応・文境界を読み込む（配列は mmap 上を参照）"""
+        self._bodies = [items[doc.item_id].get("body", "") for doc in documents]
+        self._offset_ptr = reader.array("snippet.offset_ptr")
+        self._offsets = reader.array("snippet.offsets")
+        self._mapped = reader.array("snippet.mapped")
+        self._sentence_ptr = reader.array("snippet.sentence_ptr")
+        self._sentences = reader.array("snippet.sentences")
+
+    def snippet(self, doc_id: int, spans: List[Tuple[int, int, int]]) -> Snippet:
+        """
+        スニペットとハイライト位置
+
+        最も多くの異なるトークンが一致する文を選び、その一致範囲を中心に切り出す。
+
+        Args:
+            doc_id: アイテム番号
+            spans: (正規化済み本文上の開始位置, 長さ, トークン番号) の一覧
+        """
+        body = self._bodies[doc_id]
+        if not spans or not self._mapped[doc_id]:
+            return self._head(body), []
+
+        offsets = self._offsets[self._offset_ptr[doc_id]:self._offset_ptr[doc_id + 1]]
+        sentences = self._sentences[self._sentence_ptr[doc_id]:self._sentence_ptr[doc_id + 1]]
+        # 本文上の一致範囲を文ごとにまとめる
+        mapped = []
+        by_sentence: Dict[int, List[Tuple[int, int, int]]] = {}
+        for pos, length, token in spans:
+            start, end = offsets[pos], offsets[pos + length - 1] + 1
+            # 正規化で除いた語末の長音記号もハイライトに含める
+            following = offsets[pos + length] if pos + length < len(offsets) else len(body)
+            while end < following and body[end] in LONG_VOWELS:
+                end += 1
+            mapped.append((start, end))
+            by_sentence.setdefault(bisect_right(sentences, start) - 1, []).append((start, end, token))
+
+        best = min(by_sentence, key=lambda s: (-len({m[2] for m in by_sentence[s]}), s))
+        matches = sorted(by_sentence[best])
+        first, last = matches[0][0], max(m[1] for m in matches)
+
+        # 文頭から収まる場合は文頭から、収まらない場合は一致範囲を中心にする
+        sentence_start = sentences[best]
+        if last - sentence_start <= SNIPPET_LEN:
+            start = sentence_start
+        else:
+            start = max(sentence_start, first - max(SNIPPET_LEN - (last - first), 0) // 2)
+        while start < first and body[start].isspace():
+            start += 1
+        end = min(start + SNIPPET_LEN, len(body))
+
+        prefix = ELLIPSIS if start > 0 else ""
+        suffix = ELLIPSIS if end < len(body) else ""
+        shift = len(prefix) - start
+        highlights = []
+        for m_start, m_end in sorted(set(mapped)):
+            if m_start >= start and m_end <= end:
+                if highlights and m_start + shift <= highlights[-1][1]:
+                    highlights[-1][1] = max(highlights[-1][1], m_end + shift)  # 重なる一致はまとめる
+                else:
+                    highlights.append([m_start + shift, m_end + shift])
+        return prefix + body[start:end] + suffix, highlights
+
+    @staticmethod
+    def _head(body: str) -> str:
+        """先頭からのスニペット（一致箇所なし）"""
+        return body[:SNIPPET_LEN] + ELLIPSIS if len(body) > SNIPPET_LEN else body
@@ -0,0 +1,225 @@
+# 検索インデックスの保存形式
+# 構築済みの検索状態を平坦な配列（セクション）として1ファイルに書き出し、
+# 起動時は mmap で読み込んで配列をコピーせずに参照する（同じファイルを開く
+# 複数のワーカーは OS のページキャッシュを共有する）
+#
+# ファイル構成（各セクションは 8 バイト境界に配置）:
+#   マジック(8) | ヘッダ長(u32) | ヘッダ（JSON） | セクション...
+# ヘッダ: {"format", "byteorder", "meta": {...}, "sections": {名前: [開始位置, バイト数, 型, 要素数]}}
+
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"HCSIDX\x00\x01"
+# 保存形式のバージョン（正規化・インデックス構造を変えたら上げる）
+FORMAT_VERSION = 1
+# 文字列表の区切り（正規化済みテキストに含まれない文字）
+STRING_SEPARATOR = "\x00"
+
+_ALIGN = 8
+
+
+class IndexStoreError(Exception):
+    """保存済みインデックスが読み込めない（形式・バージョン不一致など）"""
+    pass
+
+
+class IndexWriter:
+    """セクションを追加してファイルに書き出す"""
+
+    def __init__(self):
+        self._sections: List[tuple] = []  # (名前, 型, バイト列, 要素数)
+
+    def add_array(self, name: str, values: Any, typecode: str = "i") -> None:
+        """整数・実数の配列（array の型コード: i / B / d）"""
+        data = values if isinstance(values, array) and values.typecode == typecode else array(typecode, values)
+        self._sections.append((name, typecode, data.tobytes(), len(data)))
+
+    def add_strings(self, name: str, values: List[str]) -> None:
+        """文字列の一覧（区切り文字で連結した UTF-8）"""
+        joined = STRING_SEPARATOR.join(values)
+        if values and joined.count(STRING_SEPARATOR) != len(values) - 1:
+            raise IndexStoreError(f"Section {name} contains the string separator")
+        self._sections.append((name, "s", joined.encode("utf-8"), len(values)))
+
+    def add_bytes(self, name: str, data: bytes) -> None:
+        self._sections.append((name, "b", bytes(data), len(data)))
+
+    def write(self, path: Path, meta: Dict[str, Any]) -> int:
+        """
+        ファイルに書き出す（一時ファイルに書いてから置き換える）
+
+        Returns:
+            ファイルサイズ（バイト）
+        """
+        sections = {}
+        offset = 0
+        for name, typecode, data, count in self._sections:
+            sections[name] = [offset, len(data), typecode, count]
+            offset += len(data) + (-len(data) % _ALIGN)
+        header = json.dumps({
+            "format": FORMAT_VERSION,
+            "byteorder": sys.byteorder,
+            "meta": meta,
+            "sections": sections,
+        }, ensure_ascii=False).encode("utf-8")
+        header += b" " * (-(len(MAGIC) + 4 + len(header)) % _ALIGN)
+        base = len(MAGIC) + 4 + len(header)
+
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header)))
+            f.write(header)
+            for _, _, data, _ in self._sections:
+                f.write(data)
+                f.write(b"\x00" * (-len(data) % _ALIGN))
+        os.replace(tmp, path)
+        return base + offset
+
+
+class IndexReader:
+    """mmap したファイルからセクションを参照する（配列はコピーしない）"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:  # 空ファイル
+                raise IndexStoreError(f"Empty index file: {self.path}") from e
+        view = memoryview(self._mmap)
+        if bytes(view[:len(MAGIC)]) != MAGIC:
+            raise IndexStoreError(f"Not a search index file: {self.path}")
+        (header_len,) = struct.unpack("<I", view[len(MAGIC):len(MAGIC) + 4])
+        start = len(MAGIC) + 4
+        header = json.loads(bytes(view[start:start + header_len]).decode("utf-8"))
+        if header.get("format") != FORMAT_VERSION:
+            raise IndexStoreError(f"Index format {header.get('format')} != {FORMAT_VERSION}")
+        if header.get("byteorder") != sys.byteorder:
+            raise IndexStoreError(f"Index byte order {header.get('byteorder')} != {sys.byteorder}")
+        self.meta: Dict[str, Any] = header.get("meta", {})
+        self._sections: Dict[str, list] = header["sections"]
+        self._view = view
+        self._base = start + header_len
+
+    def _raw(self, name: str) -> memoryview:
+        if name not in self._sections:
+            raise IndexStoreError(f"Missing section: {name}")
+        offset, length = self._sections[name][:2]
+        start = self._base + offset
+        return self._view[start:start + length]
+
+    def array(self, name: str) -> memoryview:
+        """配列セクション（mmap 上の memoryview）"""
+        raw = self._raw(name)
+        return raw.cast(self._sections[name][2])
+
+    def strings(self, name: str) -> List[str]:
+        """文字列セクション（デコードした一覧）"""
+        raw = self._raw(name)
+        if not self._sections[name][3]:
+            return []
+        return bytes(raw).decode("utf-8").split(STRING_SEPARATOR)
+
+    def blob(self, name: str) -> bytes:
+        """バイト列セクション（コピー）"""
+        return bytes(self._raw(name))
+
+    def string_table(self, name: str) -> "StringTable":
+        """文字列セクション（デコードせずに位置で参照）"""
+        return StringTable(self.array(f"{name}.offsets"), self._raw(f"{name}.data"))
+
+
+class StringTable:
+    """
+    辞書順に並んだ文字列の表（UTF-8 の連結 + 開始位置の配列）
+
+    要素数の多い表をデコードせずに mmap 上で二分探索する。
+    """
+
+    def __init__(self, offsets: memoryview, data: memoryview):
+        self._offsets = offsets
+        self._data = data
+
+    @staticmethod
+    def write(writer: IndexWriter, name: str, values: List[str]) -> None:
+        """values（辞書順）を書き出す"""
+        offsets = array("i", [0])
+        chunks = []
+        position = 0
+        for value in values:
+            encoded = value.encode("utf-8")
+            chunks.append(encoded)
+            position += len(encoded)
+            offsets.append(position)
+        writer.add_array(f"{name}.offsets", offsets)
+        writer.add_bytes(f"{name}.data", b"".join(chunks))
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def _encoded(self, i: int) -> bytes:
+        return bytes(self._data[self._offsets[i]:self._offsets[i + 1]])
+
+    def __getitem__(self, i: int) -> str:
+        return self._encoded(i).decode("utf-8")
+
+    def find(self, value: str) -> Optional[int]:
+        """value の位置（なければ None）"""
+        # UTF-8 のバイト列の順序はコードポイント順（str の比較）と一致する
+        key = value.encode("utf-8")
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._encoded(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < len(self) and self._encoded(lo) == key else None
+
+
+def csr(groups: Iterable[List[int]], typecode: str = "i") -> Tuple[array, array]:
+    """グループごとの値を (開始位置の配列, 値の配列) の平坦な形にする"""
+    ptr = array("i", [0])
+    values = array(typecode)
+    for group in groups:
+        values.extend(group)
+        ptr.append(len(values))
+    return ptr, values
+
+
+def open_index(path: Path, expected: Dict[str, Any]) -> Optional[IndexReader]:
+    """
+    保存済みインデックスを開く（ファイルがない・メタ情報が一致しない場合は None）
+
+    Args:
+        path: インデックスファイル
+        expected: 一致すべきメタ情報（コンテンツバージョン・アイテム構成・読み込み元のハッシュなど）
+    """
+    path = Path(path)
+    if not path.exists():
+        return None
+    try:
+        reader = IndexReader(path)
+    except (OSError, ValueError, IndexStoreError) as e:
+        logger.warning(f"Search index {path} ignored: {e}")
+        return None
+    for key, value in expected.items():
+        if reader.meta.get(key) != value:
+            logger.warning(
+                f"Search index {path} ignored: {key} mismatch "
+                f"(index {reader.meta.get(key)!r}, contents {value!r})"
+            )
+            return None
+    return reader
@@ -0,0 +1,248 @@
+# 入力補完（サジェスト）
+# タイトル・キーワード・シノニムの正規化語をソート済み配列に格納し、二分探索で前方一致する
+
+import heapq
+import logging
+from array import array
+from typing import Dict, List, Any, Callable, Optional, Sequence, Tuple
+
+from search_index import SearchDocument
+from search_store import IndexReader, IndexWriter, csr
+
+logger = logging.getLogger(__name__)
+
+# 短い接頭辞は候補範囲が広いため、上位候補を計算したら保持しておく
+PRECOMPUTED_PREFIX_LEN = 2
+# 事前計算する上位候補数（limit の上限）
+PRECOMPUTED_TOP_N = 20
+
+# 同じ語が複数の種別で登録された場合の優先順（小さいほど優先）
+SOURCE_RANK = {"title": 0, "keyword": 1, "synonym": 2}
+# 保存形式での種別の番号
+SOURCES = list(SOURCE_RANK)
+
+
+class _Entry:
+    """補完候補（正規化語ごとに1つ）"""
+    __slots__ = ("term", "text", "source", "priority", "item_id")
+
+    def __init__(self, term: str, text: str, source: str, priority: int, item_id: Optional[str]):
+        self.term = term
+        self.text = text
+        self.source = source
+        self.priority = priority
+        self.item_id = item_id
+
+    def rank_key(self) -> Tuple[int, int, int, str]:
+        """並び順（優先度降順 → 種別 → 短い語 → 辞書順）"""
+        return (-self.priority, SOURCE_RANK[self.source], len(self.term), self.term)
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {"text": self.text, "type": self.source, "priority": self.priority}
+        if self.item_id:
+            result["id"] = self.item_id
+        return result
+
+
+def _merge(entries: Dict[str, _Entry], entry: _Entry) -> None:
+    """同じ正規化語は優先度・種別の高いほうを残す"""
+    current = entries.get(entry.term)
+    if current is None or entry.rank_key() < current.rank_key():
+        entries[entry.term] = entry
+
+
+class _PrefixTable:
+    """1画面分の語配列（全候補の一覧への添字を語の辞書順に並べたもの）"""
+
+    def __init__(self, entries: List[_Entry], order: Sequence[int]):
+        self.entries = entries
+        self.order = order
+        # 接頭辞 → 上位候補（短い接頭辞のみ、初回の問い合わせ時に計算して保持）
+        self.top: Dict[str, List[_Entry]] = {}
+
+    def _bisect(self, key: str, lo: int = 0) -> int:
+        """語が key 以上になる最初の位置"""
+        entries, order = self.entries, self.order
+        hi = len(order)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if entries[order[mid]].term < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def complete(self, prefix: str, limit: int) -> List[_Entry]:
+        precomputed = len(prefix) <= PRECOMPUTED_PREFIX_LEN and limit <= PRECOMPUTED_TOP_N
+        if precomputed:
+            top = self.top.get(prefix)
+            if top is not None:
+                return top[:limit]
+        lo = self._bisect(prefix)
+        # 接頭辞に一致する範囲は prefix 以上 prefix + U+FFFF 未満
+        hi = self._bisect(prefix + "\uffff", lo)
+        entries = self.entries
+        matched = (entries[i] for i in self.order[lo:hi])
+        if not precomputed:
+            return heapq.nsmallest(limit, matched, key=_Entry.rank_key)
+        top = self.top[prefix] = heapq.nsmallest(PRECOMPUTED_TOP_N, matched, key=_Entry.rank_key)
+        return top[:limit]
+
+
+class SuggestIndex:
+    """画面ごとの前方一致補完インデックス"""
+
+    def __init__(self):
+        # 全画面の補完候補（画面ごとの表はこの一覧への添字を持つ）
+        self._entries: List[_Entry] = []
+        self._orders: tuple = ({}, [], [])
+        self._tables: Dict[str, _PrefixTable] = {}
+        # 画面指定なし・未登録の画面ID用（画面指定なしのコンテンツとシノニムのみ）
+        self._unscoped = _PrefixTable([], [])
+        # 画面を問わない全体用
+        self._all = _PrefixTable([], [])
+
+    def build(
+        self,
+        documents: List[SearchDocument],
+        items: Dict[str, Dict[str, Any]],
+        synonyms: Dict[str, List[str]],
+        normalize: Callable[[str], str]
+    ) -> None:
+        """
+        補完インデックスを構築（コンテンツ再ロード時も再実行する）
+
+        Args:
+            documents: 正規化済みドキュメント（アイテム番号順）
+            items: content_items（表示用の原文取得）
+            synonyms: search_config.synonyms
+            normalize: 正規化関数
+        """
+        scoped: Dict[str, Dict[str, _Entry]] = {}
+        unscoped: Dict[str, _Entry] = {}
+        everything: Dict[str, _Entry] = {}
+
+        # キーワード → 優先度の最大値（シノニムの並び順に使う）
+        keyword_priority: Dict[str, int] = {}
+
+        for doc in documents:
+            item = items[doc.item_id]
+            doc_entries = []
+            if doc.title:
+                doc_entries.append(_Entry(doc.title, item.get("title", ""), "title", doc.priority, doc.item_id))
+            for raw, kw in zip((k for k in item.get("keywords", []) if normalize(k)), doc.keywords):
+                doc_entries.append(_Entry(kw, raw, "keyword", doc.priority, None))
+                keyword_priority[kw] = max(keyword_priority.get(kw, 0), doc.priority)
+
+            targets = [scoped.setdefault(s, {}) for s in doc.screens] if doc.screens else [unscoped]
+            for entry in doc_entries:
+                _merge(everything, entry)
+                for target in targets:
+                    _merge(target, entry)
+
+        # シノニムは画面を問わず補完対象にする
+        for key, values in synonyms.items():
+            group = [key] + list(values)
+            terms = [normalize(t) for t in group]
+            priority = max((keyword_priority.get(t, 0) for t in terms), default=0)
+            for raw, term in zip(group, terms):
+                if term:
+                    entry = _Entry(term, raw, "synonym", priority, None)
+                    _merge(everything, entry)
+                    _merge(unscoped, entry)
+
+        # 各画面には画面指定なしの候補も含める
+        tables = {}
+        for screen_id, entries in scoped.items():
+            merged = dict(unscoped)
+            for entry in entries.values():
+                _merge(merged, entry)
+            tables[screen_id] = merged
+
+        # 全画面の候補を1つの一覧にまとめ、画面ごとの表はその添字で持つ
+        all_entries: List[_Entry] = []
+        positions: Dict[int, int] = {}
+
+        def order_of(table: Dict[str, _Entry]) -> array:
+            order = array("i")
+            for term in sorted(table):
+                entry = table[term]
+                position = positions.get(id(entry))
+                if position is None:
+                    position = positions[id(entry)] = len(all_entries)
+                    all_entries.append(entry)
+                order.append(position)
+            return order
+
+        self._set_tables(
+            all_entries,
+            {screen_id: order_of(table) for screen_id, table in tables.items()},
+            order_of(unscoped),
+            order_of(everything),
+        )
+        logger.info(f"Suggest index built: {len(everything)} terms, {len(tables)} screens")
+
+    def _set_tables(
+        self,
+        entries: List[_Entry],
+        screens: Dict[str, Sequence[int]],
+        unscoped: Sequence[int],
+        everything: Sequence[int]
+    ) -> None:
+        self._entries = entries
+        self._orders = (screens, unscoped, everything)
+        self._tables = {screen_id: _PrefixTable(entries, order) for screen_id, order in screens.items()}
+        self._unscoped = _PrefixTable(entries, unscoped)
+        self._all = _PrefixTable(entries, everything)
+
+    def save(self, writer: IndexWriter) -> None:
+        """補完候補と画面ごとの語配列を保存形式のセクションとして追加"""
+        entries = self._entries
+        screens, unscoped, everything = self._orders
+        writer.add_strings("suggest.terms", [e.term for e in entries])
+        writer.add_strings("suggest.texts", [e.text for e in entries])
+        writer.add_array("suggest.sources", [SOURCES.index(e.source) for e in entries], "B")
+        writer.add_array("suggest.priorities", [e.priority for e in entries])
+        writer.add_strings("suggest.item_ids", [e.item_id or "" for e in entries])
+        writer.add_strings("suggest.screens", list(screens))
+        ptr, orders = csr(screens.values())
+        writer.add_array("suggest.screen_ptr", ptr)
+        writer.add_array("suggest.screen_orders", orders)
+        writer.add_array("suggest.unscoped", unscoped)
+        writer.add_array("suggest.all", everything)
+
+    def load(self, reader: IndexReader) -> None:
+        """保存済みの補完インデックスを読み込む（画面ごとの語配列は mmap 上を参照）"""
+        entries = [
+            _Entry(term, text, SOURCES[source], priority, item_id or None)
+            for term, text, source, priority, item_id in zip(
+                reader.strings("suggest.terms"),
+                reader.strings("suggest.texts"),
+                reader.array("suggest.sources"),
+                reader.array("suggest.priorities"),
+                reader.strings("suggest.item_ids"),
+            )
+        ]
+        ptr, orders = reader.array("suggest.screen_ptr"), reader.array("suggest.screen_orders")
+        screens = {
+            screen_id: orders[ptr[i]:ptr[i + 1]]
+            for i, screen_id in enumerate(reader.strings("suggest.screens"))
+        }
+        self._set_tables(entries, screens, reader.array("suggest.unscoped"), reader.array("suggest.all"))
+
+    def suggest(self, prefix: str, screen_id: str = None, limit: int = 8) -> List[Dict[str, Any]]:
+        """
+        前方一致の補完候補
+
+        Args:
+            prefix: 正規化済みの入力途中文字列
+            screen_id: 画面ID（省略時は全画面）
+            limit: 最大件数
+        """
+        if not prefix or limit <= 0:
+            return []
+        if screen_id:
+            table = self._tables.get(screen_id, self._unscoped)
+        else:
+            table = self._all
+        return [entry.to_dict() for entry in table.complete(prefix, limit)]
@@ -0,0 +1,203 @@
+# NumPy ベクトル化スコアリング
+# 大規模コーパス・バッチクエリ向け（NumPy がない環境では使わない）
+
+import logging
+from typing import Dict, Iterator, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy は任意依存
+    np = None
+
+from search_index import (
+    SearchIndex, bits_to_bytes, FLAG_WEIGHTS, FIELD_TITLE, FIELD_KEYWORD, FIELD_BODY
+)
+
+logger = logging.getLogger(__name__)
+
+# 1回の行列積で扱うトークン数 × アイテム数、クエリ数 × アイテム数の上限（メモリ使用量の目安）
+BATCH_CELLS_MAX = 32_000_000
+
+# (トークンごとの語ID, トークンごとのキーワード一致) の形のクエリ表現
+QuerySpec = Tuple[List[List[int]], List[List[str]]]
+
+
+def numpy_available() -> bool:
+    return np is not None
+
+
+class VectorScorer:
+    """
+    語-アイテム行列（CSR）によるスコアリング
+
+    スコア規則は SearchEngine と同じ:
+    トークンごとにタイトル 3 / キーワード 2 / 本文 1（各フィールドは一致の有無のみ）、
+    一致したアイテムに優先度 / 100 を加算。
+    """
+
+    def __init__(self, index: SearchIndex):
+        if np is None:
+            raise RuntimeError("NumPy is not installed")
+        self._index = index
+        size = index.doc_count
+        self.size = size
+
+        # 語-アイテム行列（CSR: 語ID → アイテム番号・フィールドフラグ）
+        # インデックスの配列をコピーせずに参照する（保存済みインデックスは mmap 上）
+        indptr, docs, flags = index.postings_arrays()
+        self._indptr = np.frombuffer(indptr, dtype=np.int32).astype(np.int64)
+        self._docs = np.frombuffer(docs, dtype=np.int32)
+        self._flags = np.frombuffer(flags, dtype=np.uint8)
+
+        # フィールドフラグ → フィールド重み付きスコア
+        self._weights = np.array(FLAG_WEIGHTS, dtype=np.float32)
+
+        # 優先度事前分布
+        self._prior = np.array([doc.priority / 100.0 for doc in index.documents], dtype=np.float64)
+        # カテゴリ番号（ファセット集計用）
+        self._categories = list(index.category_bits)
+        category_codes = np.zeros(size, dtype=np.int32)
+        for code, category in enumerate(self._categories):
+            category_codes[self.to_mask(index.category_bits[category])] = code
+        self._category_codes = category_codes
+        self._category_masks = {
+            category: self.to_mask(bits) for category, bits in index.category_bits.items()
+        }
+        # 画面 → bool 配列（未登録の画面IDは画面指定なしのアイテムのみ）
+        self._screen_masks = {
+            screen_id: self.to_mask(index.screen_bits(screen_id)) for screen_id in index.screens
+        }
+        self._unscoped_mask = self.to_mask(index.unscoped_bits)
+
+        logger.info(f"Vector scorer built: {size} items, {len(self._docs)} postings")
+
+    def to_mask(self, bits: int) -> "np.ndarray":
+        """ビットセットを bool 配列に変換"""
+        raw = np.frombuffer(bits_to_bytes(bits, self.size), dtype=np.uint8)
+        return np.unpackbits(raw, bitorder="little")[:self.size].astype(bool)
+
+    def token_flags(self, term_ids: List[int], keywords: List[str]) -> "np.ndarray":
+        """1トークンのアイテムごとのフィールドフラグ（uint8 配列）"""
+        flags = np.zeros(self.size, dtype=np.uint8)
+        indptr = self._indptr
+        segments = [(indptr[t], indptr[t + 1]) for t in term_ids]
+        if segments:
+            docs = np.concatenate([self._docs[a:b] for a, b in segments])
+            seg_flags = np.concatenate([self._flags[a:b] for a, b in segments])
+            # 同じアイテムに複数の語が一致してもフィールドごとに1回だけ数える
+            for field in (FIELD_TITLE, FIELD_KEYWORD, FIELD_BODY):
+                flags[docs[(seg_flags & field) != 0]] |= field
+        for kw in keywords:
+            kw_docs = self._index.keyword_items(kw)
+            if kw_docs:
+                flags[np.asarray(kw_docs, dtype=np.int64)] |= FIELD_KEYWORD
+        return flags
+
+    def score(self, spec: QuerySpec) -> "np.ndarray":
+        """
+        1クエリのスコアをベクトル演算で計算
+
+        Returns:
+            アイテムごとのスコア（一致なしは 0）
+        """
+        token_terms, keyword_hits = spec
+        total = np.zeros(self.size, dtype=np.float32)
+        hit = np.zeros(self.size, dtype=bool)
+        for term_ids, keywords in zip(token_terms, keyword_hits):
+            flags = self.token_flags(term_ids, keywords)
+            total += self._weights[flags]
+            hit |= flags != 0
+        scores = total.astype(np.float64)
+        scores[hit] += self._prior[hit]
+        return scores
+
+    def score_blocks(self, specs: List[QuerySpec]) -> Iterator[Tuple[int, "np.ndarray"]]:
+        """
+        複数クエリのスコアを行列積でまとめて計算（クエリのブロックごと）
+
+        クエリ×トークンの係数行列 Q と、トークン×アイテムの重み付き一致行列 H から
+        S = Q @ H を求め、一致したアイテムに優先度を加える。
+        トークン数・クエリ数とも BATCH_CELLS_MAX に収まるようクエリを分割し、
+        ブロックは次のブロックの計算前に破棄する（呼び出し側は各行の上位k件だけを保持する）。
+
+        Yields:
+            (ブロック先頭のクエリ番号, (ブロックのクエリ数, アイテム数) のスコア行列)
+        """
+        max_rows = max(1, BATCH_CELLS_MAX // max(self.size, 1))
+        start = 0
+        while start < len(specs):
+            # 重複除去後のトークン数・クエリ数が上限に収まる範囲でクエリをまとめる
+            token_ids: Dict[tuple, int] = {}
+            columns: List[List[int]] = []
+            end = start
+            while end < len(specs) and end - start < max_rows:
+                token_terms, keyword_hits = specs[end]
+                keys = [
+                    (tuple(term_ids), tuple(keywords))
+                    for term_ids, keywords in zip(token_terms, keyword_hits)
+                ]
+                new_keys = {k for k in keys if k not in token_ids}
+                if end > start and len(token_ids) + len(new_keys) > max_rows:
+                    break
+                cols = []
+                for key in keys:
+                    if key not in token_ids:
+                        token_ids[key] = len(token_ids)
+                    cols.append(token_ids[key])
+                columns.append(cols)
+                end += 1
+
+            # トークン × アイテムの重み付き一致行列
+            hits = np.zeros((len(token_ids), self.size), dtype=np.float32)
+            for (term_ids, keywords), row in token_ids.items():
+                hits[row] = self._weights[self.token_flags(list(term_ids), list(keywords))]
+            # クエリ × トークンの係数行列
+            coeffs = np.zeros((end - start, len(token_ids)), dtype=np.float32)
+            for q, cols in enumerate(columns):
+                coeffs[q, cols] = 1.0
+
+            block = (coeffs @ hits).astype(np.float64)
+            del hits
+            matched = block > 0
+            block += np.where(matched, self._prior[np.newaxis, :], 0.0)
+            del matched
+            yield start, block
+            del block
+            start = end
+
+    def rank(
+        self,
+        scores: "np.ndarray",
+        screen_id: str = None,
+        category: str = None,
+        max_results: int = 5,
+        required: int = None
+    ) -> Tuple[List[Tuple[float, int]], Dict[str, int]]:
+        """
+        絞り込み・ファセット集計・上位抽出（required: 候補を限定するビットセット）
+
+        Returns:
+            ([(スコア, アイテム番号)] スコア降順・同点は定義順, {category: 件数})
+        """
+        selected = scores > 0
+        if required is not None:
+            selected &= self.to_mask(required)
+        if screen_id:
+            selected &= self._screen_masks.get(screen_id, self._unscoped_mask)
+        counts = np.bincount(self._category_codes[selected], minlength=len(self._categories))
+        facets = {self._categories[c]: int(n) for c, n in enumerate(counts) if n}
+        if category:
+            cat_mask = self._category_masks.get(category)
+            if cat_mask is None:
+                return [], facets
+            selected &= cat_mask
+
+        doc_ids = np.flatnonzero(selected)
+        doc_scores = scores[doc_ids]
+        if len(doc_ids) > max_results:
+            # 上位 max_results の境界スコア以上だけを残してから並べ替える
+            kth = np.partition(doc_scores, len(doc_scores) - max_results)[len(doc_scores) - max_results]
+            keep = doc_scores >= kth
+            doc_ids, doc_scores = doc_ids[keep], doc_scores[keep]
+        order = np.lexsort((doc_ids, -doc_scores))[:max_results]
+        return [(float(doc_scores[i]), int(doc_ids[i])) for i in order], facets
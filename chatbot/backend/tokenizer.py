@@ -0,0 +1,74 @@
+# トークナイザ
+# 日本語（CJK）を考慮したクエリ分割と文字 n-gram 生成
+
+from typing import List, Iterable
+
+# n-gram の文字数（bi-gram）
+NGRAM_SIZE = 2
+
+
+def is_hiragana(ch: str) -> bool:
+    return "ぁ" <= ch <= "ゟ"
+
+
+def is_cjk(ch: str) -> bool:
+    """ひらがな・カタカナ・漢字・全角記号か"""
+    code = ord(ch)
+    return (
+        0x3000 <= code <= 0x30ff      # CJK記号・ひらがな・カタカナ
+        or 0x3400 <= code <= 0x4dbf   # CJK拡張A
+        or 0x4e00 <= code <= 0x9fff   # CJK統合漢字
+        or 0xf900 <= code <= 0xfaff   # CJK互換漢字
+        or 0xff66 <= code <= 0xff9f   # 半角カタカナ
+    )
+
+
+def char_ngrams(text: str, n: int = NGRAM_SIZE) -> List[str]:
+    """
+    文字 n-gram に分割（重複除去・出現順）
+
+    n 文字未満の文字列はそれ自体を1つの n-gram とする。
+    """
+    if len(text) <= n:
+        return [text] if text else []
+    seen = {}
+    for i in range(len(text) - n + 1):
+        seen.setdefault(text[i:i + n], None)
+    return list(seen)
+
+
+def split_cjk(chunk: str, particles: Iterable[str]) -> List[str]:
+    """
+    分かち書きされていない日本語を助詞で分割
+
+    ひらがな1文字の助詞（ストップワード）の直後がひらがな以外の場合のみ区切る。
+    例: 「歩留まりが表示されない」→「歩留まり」「表示されない」
+        「表示されない」はそのまま（「さ」「れ」の後はひらがな）
+    """
+    particles = set(particles)
+    parts = []
+    start = 0
+    for i in range(1, len(chunk) - 1):
+        ch = chunk[i]
+        if ch in particles and is_hiragana(ch) and not is_hiragana(chunk[i + 1]):
+            if i > start:
+                parts.append(chunk[start:i])
+            start = i + 1
+    parts.append(chunk[start:])
+    return [p for p in parts if p]
+
+
+def tokenize_query(text: str, stopwords: set, min_len: int = 2) -> List[str]:
+    """
+    正規化済みクエリをトークンに分割
+
+    空白区切りに加え、CJK を含む塊は助詞位置でも分割する。
+    """
+    particles = [w for w in stopwords if len(w) == 1]
+    tokens = []
+    for chunk in text.split():
+        parts = split_cjk(chunk, particles) if any(is_cjk(ch) for ch in chunk) else [chunk]
+        for token in parts:
+            if token not in stopwords and len(token) >= min_len:
+                tokens.append(token)
+    return tokens
@@ -0,0 +1,97 @@
+# 検索スコアリングのベンチマーク
+# 実行: python benchmarks/bench_scoring.py [--items 10000]
+# 従来の全件スキャン（クエリ毎に正規化）と、正規化済みドキュメントストア + インデックスの
+# 1クエリあたり CPU 時間を比較する
+
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from corpus import generate_corpus
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR / "backend"))
+
+# 従来実装でも扱える語・複数語のクエリ（フレーズ・フィールド指定を含む共通ワークロードは使わない）
+QUERIES = ["歩留まり", "エクスポート", "表示されない", "グラフ 表示", "CSV 出力", "面接 設定", "ログイン エラー"]
+
+
+def legacy_search(items: dict, synonyms: dict, stopwords: set, query: str) -> list:
+    """従来実装（全件スキャン + クエリ毎の正規化）"""
+    def normalize(text):
+        return re.sub(r"\s+", " ", text.lower().strip())
+
+    tokens = [t for t in normalize(query).split() if t not in stopwords and len(t) >= 2]
+    expanded = set(tokens)
+    for t in tokens:
+        expanded.update(synonyms.get(t, []))
+    scored = []
+    for item_id, item in items.items():
+        title = normalize(item["title"])
+        body = normalize(item["body"])
+        keywords = [normalize(k) for k in item["keywords"]]
+        score = 0.0
+        for token in expanded:
+            if token in title:
+                score += 3.0
+            if any(token in kw or kw in token for kw in keywords):
+                score += 2.0
+            if token in body:
+                score += 1.0
+        scored.append((score + item["priority"] / 100.0, item_id))
+    scored.sort(reverse=True)
+    return scored[:5]
+
+
+def measure(fn, rounds: int) -> float:
+    """1クエリあたりの CPU 時間（ミリ秒）"""
+    start = time.process_time()
+    for _ in range(rounds):
+        for q in QUERIES:
+            fn(q)
+    return (time.process_time() - start) * 1000 / (rounds * len(QUERIES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="検索スコアリングのベンチマーク")
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.items)
+    with tempfile.TemporaryDirectory() as tmp:
+        content_path = Path(tmp) / "contents.json"
+        content_path.write_text(json.dumps(corpus, ensure_ascii=False), encoding="utf-8")
+        os.environ["CONTENT_PATH"] = str(content_path)
+        os.environ["CONTENT_SOURCE"] = "json"
+        # 結果キャッシュを無効化して毎回検索処理を計測する
+        os.environ["SEARCH_CACHE_SIZE"] = "0"
+
+        from content_repo import content_repo
+        from search import search_engine
+
+        content_repo.load()
+        start = time.process_time()
+        search_engine.initialize()
+        build_ms = (time.process_time() - start) * 1000
+
+    search_config = corpus["search_config"]
+    items = corpus["content_items"]
+    stopwords = set(search_config["stopwords"])
+    before = measure(lambda q: legacy_search(items, search_config["synonyms"], stopwords, q), args.rounds)
+    after = measure(lambda q: search_engine.search(q), args.rounds)
+
+    print(f"items: {args.items}")
+    print(f"index build:        {build_ms:8.1f} ms (once per load)")
+    print(f"before (full scan): {before:8.2f} ms/query")
+    print(f"after  (indexed):   {after:8.2f} ms/query")
+    print(f"speedup:            {before / after:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+# 検索のベンチマーク（合成コーパス + 固定クエリワークロード）
+# 実行: python benchmarks/bench_search.py [--sizes 1000,10000,100000] [--rounds 3]
+# 比較: python benchmarks/bench_search.py --compare results/search_<旧>.json results/search_<新>.json
+# コーパス件数ごとに別プロセスで計測し（メモリ使用量を分離するため）、
+# search() のレイテンシ分位点・QPS・メモリ使用量を JSON に保存する
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Any
+
+from corpus import generate_corpus, generate_queries
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# 結果に記録する検索設定（比較時に条件の違いが分かるように）
+SETTING_KEYS = [
+    "SEARCH_ENGINE", "SEARCH_TOPK_MODE", "SEARCH_MAX_RESULTS", "SEARCH_PROXIMITY_WEIGHT",
+    "SEARCH_CACHE_SIZE",
+]
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """最近接順位法による分位点（sorted_values は昇順）"""
+    rank = max(math.ceil(p / 100.0 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def peak_rss_mb() -> float:
+    """プロセスの最大常駐メモリ（MB）"""
+    # Linux の ru_maxrss は exec 前（親プロセス）の最大値を引き継ぐため、VmHWM を優先する
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux は KB、macOS はバイト単位
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def git_commit() -> Dict[str, Any]:
+    """計測対象のコミット（git がない場合は空）"""
+    def git(*args: str) -> str:
+        return subprocess.run(
+            ["git", *args], cwd=BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+    try:
+        return {"commit": git("rev-parse", "--short", "HEAD"), "dirty": bool(git("status", "--porcelain"))}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": "", "dirty": False}
+
+
+def run_worker(content_path: str, rounds: int, n_queries: int) -> Dict[str, Any]:
+    """1コーパス分の計測（子プロセスで実行）"""
+    sys.path.append(str(BASE_DIR / "backend"))
+    from config import config
+    from content_repo import content_repo
+    from search import search_engine
+
+    queries = generate_queries(n_queries)
+    rss_start = peak_rss_mb()
+
+    start = time.perf_counter()
+    content_repo.load()
+    load_ms = (time.perf_counter() - start) * 1000
+    rss_loaded = peak_rss_mb()
+
+    start = time.perf_counter()
+    search_engine.initialize()
+    build_ms = (time.perf_counter() - start) * 1000
+    rss_built = peak_rss_mb()
+
+    # 1周目はウォームアップ（計測に含めない）
+    for query in queries:
+        search_engine.search(query)
+
+    latencies = []
+    hits = 0
+    clock = time.perf_counter
+    started = clock()
+    for _ in range(rounds):
+        for query in queries:
+            t0 = clock()
+            results = search_engine.search(query)
+            latencies.append((clock() - t0) * 1000)
+            hits += bool(results)
+    elapsed = clock() - started
+    latencies.sort()
+
+    return {
+        "items": len(content_repo.get_all_contents()),
+        "load_ms": round(load_ms, 1),
+        "build_ms": round(build_ms, 1),
+        "memory_mb": {
+            "contents": round(rss_loaded - rss_start, 1),
+            "index": round(rss_built - rss_loaded, 1),
+            "peak_rss": round(peak_rss_mb(), 1),
+        },
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "mean": round(sum(latencies) / len(latencies), 3),
+            "max": round(latencies[-1], 3),
+        },
+        "qps": round(len(latencies) / elapsed, 1),
+        "hit_rate": round(hits / len(latencies), 3),
+        "settings": {key: str(getattr(config, key)) for key in SETTING_KEYS},
+    }
+
+
+def run_size(n_items: int, args: argparse.Namespace) -> Dict[str, Any]:
+    """コーパスを生成し、子プロセスで計測"""
+    corpus = generate_corpus(n_items, args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        content_path = Path(tmp) / "contents.json"
+        content_path.write_text(json.dumps(corpus, ensure_ascii=False), encoding="utf-8")
+        del corpus
+
+        env = dict(os.environ)
+        env["CONTENT_PATH"] = str(content_path)
+        env["CONTENT_SOURCE"] = "json"
+        env["LOG_LEVEL"] = "WARNING"
+        if not args.cache:
+            # 結果キャッシュを無効化して毎回検索処理を計測する
+            env["SEARCH_CACHE_SIZE"] = "0"
+        completed = subprocess.run(
+            [sys.executable, __file__, "--worker", str(content_path),
+             "--rounds", str(args.rounds), "--queries", str(args.queries)],
+            env=env, capture_output=True, text=True
+        )
+    if completed.returncode != 0:
+        sys.stderr.write(completed.stderr)
+        raise SystemExit(f"Benchmark failed for {n_items} items")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def print_run(run: Dict[str, Any]) -> None:
+    latency = run["latency_ms"]
+    memory = run["memory_mb"]
+    print(
+        f"{run['items']:>7} items | build {run['build_ms']:9.1f} ms | "
+        f"p50 {latency['p50']:8.3f} p95 {latency['p95']:8.3f} p99 {latency['p99']:8.3f} ms | "
+        f"{run['qps']:8.1f} qps | index {memory['index']:7.1f} MB (peak {memory['peak_rss']:.1f} MB)"
+    )
+
+
+def compare(old_path: Path, new_path: Path) -> None:
+    """2回分の結果を件数ごとに比較（正の変化率は悪化、QPS のみ逆）"""
+    old = json.loads(old_path.read_text(encoding="utf-8"))
+    new = json.loads(new_path.read_text(encoding="utf-8"))
+    print(f"old: {old['commit'] or old_path.name}  new: {new['commit'] or new_path.name}")
+    old_runs = {run["items"]: run for run in old["runs"]}
+
+    def change(before: float, after: float) -> str:
+        return f"{(after - before) / before * 100:+6.1f}%" if before else "   n/a"
+
+    for run in new["runs"]:
+        base = old_runs.get(run["items"])
+        if base is None:
+            continue
+        parts = [f"{run['items']:>7} items"]
+        for key in ("p50", "p95", "p99"):
+            before, after = base["latency_ms"][key], run["latency_ms"][key]
+            parts.append(f"{key} {before:.3f}->{after:.3f} ({change(before, after)})")
+        parts.append(f"qps {base['qps']:.0f}->{run['qps']:.0f} ({change(base['qps'], run['qps'])})")
+        before, after = base["memory_mb"]["index"], run["memory_mb"]["index"]
+        parts.append(f"index {before:.1f}->{after:.1f} MB")
+        print(" | ".join(parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="検索のベンチマーク")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="コーパス件数（カンマ区切り）")
+    parser.add_argument("--rounds", type=int, default=3, help="クエリワークロードの繰り返し回数")
+    parser.add_argument("--queries", type=int, default=200, help="ワークロードのクエリ数")
+    parser.add_argument("--seed", type=int, default=42, help="コーパス生成のシード")
+    parser.add_argument("--cache", action="store_true", help="結果キャッシュを有効にしたまま計測")
+    parser.add_argument("--output", type=Path, help="結果 JSON（省略時は results/search_<commit>.json）")
+    parser.add_argument("--compare", nargs=2, type=Path, metavar=("OLD", "NEW"), help="結果 JSON を比較")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.rounds, args.queries)))
+        return
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    revision = git_commit()
+    runs = []
+    for n_items in (int(s) for s in args.sizes.split(",")):
+        run = run_size(n_items, args)
+        print_run(run)
+        runs.append(run)
+
+    report = {
+        **revision,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "workload": {"queries": args.queries, "rounds": args.rounds, "seed": args.seed, "cache": args.cache},
+        "runs": runs,
+    }
+    output = args.output
+    if output is None:
+        suffix = revision["commit"] + ("-dirty" if revision["dirty"] else "") or "local"
+        output = RESULTS_DIR / f"search_{suffix}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
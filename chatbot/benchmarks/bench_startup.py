@@ -0,0 +1,151 @@
+# 起動時のコンテンツ読み込みのベンチマーク（JSON / CSV / コンパイル済みスナップショット）
+# 実行: python benchmarks/bench_startup.py [--sizes 1000,10000,100000] [--rounds 3]
+# 合成コーパス（メニュー・リンク・関連コンテンツ付き）を JSON・CSV・スナップショットに書き出し、
+# 読み込み方式ごとに別プロセスで ContentRepository.build_snapshot()（読み込み + 検証 + 画面別一覧）の
+# 所要時間とメモリ使用量を計測する
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Any
+
+from corpus import generate_corpus, add_navigation
+from bench_search import peak_rss_mb, git_commit
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+MODES = ["json", "csv", "snapshot_json", "snapshot_csv"]
+
+
+def run_worker(mode: str, rounds: int) -> Dict[str, Any]:
+    """1方式分の計測（子プロセスで実行、環境変数で読み込み元を指定済み）"""
+    sys.path.append(str(BASE_DIR / "backend"))
+    from content_repo import ContentRepository
+
+    rss_start = peak_rss_mb()
+    timings = []
+    items = 0
+    for _ in range(rounds):
+        repo = ContentRepository()
+        start = time.perf_counter()
+        snapshot = repo.build_snapshot()
+        timings.append((time.perf_counter() - start) * 1000)
+        items = len(snapshot.data["content_items"])
+        del repo, snapshot
+    return {
+        "mode": mode,
+        "items": items,
+        "load_ms": round(min(timings), 1),
+        "load_ms_max": round(max(timings), 1),
+        "memory_mb": round(peak_rss_mb() - rss_start, 1),
+    }
+
+
+def prepare(tmp: Path, n_items: int, seed: int) -> Dict[str, Dict[str, str]]:
+    """コーパスを JSON・CSV に書き出し、それぞれのスナップショットを作成（方式ごとの環境変数）"""
+    sys.path.append(str(BASE_DIR / "contents"))
+    import export_json_to_csv
+
+    content_path = tmp / "contents.json"
+    csv_dir = tmp / "csv"
+    corpus = add_navigation(generate_corpus(n_items, seed), seed)
+    content_path.write_text(json.dumps(corpus, ensure_ascii=False), encoding="utf-8")
+    export_json_to_csv.CONTENT_JSON = content_path
+    export_json_to_csv.OUTPUT_DIR = csv_dir
+    with contextlib.redirect_stdout(io.StringIO()):
+        export_json_to_csv.main()
+
+    base = {"CONTENT_PATH": str(content_path), "CONTENT_CSV_DIR": str(csv_dir), "LOG_LEVEL": "WARNING"}
+    envs = {
+        "json": {**base, "CONTENT_SOURCE": "json", "CONTENT_SNAPSHOT_MODE": "off"},
+        "csv": {**base, "CONTENT_SOURCE": "csv", "CONTENT_SNAPSHOT_MODE": "off"},
+    }
+    for source in ("json", "csv"):
+        snapshot_path = tmp / f"contents_{source}.snapshot"
+        env = {**envs[source], "CONTENT_SNAPSHOT_PATH": str(snapshot_path)}
+        subprocess.run(
+            [sys.executable, str(BASE_DIR / "contents" / "compile_snapshot.py"), "--source", source,
+             "--output", str(snapshot_path)],
+            env={**os.environ, **env}, check=True, capture_output=True
+        )
+        envs[f"snapshot_{source}"] = {**env, "CONTENT_SNAPSHOT_MODE": "auto"}
+    return envs
+
+
+def run_size(n_items: int, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """コーパスを生成し、方式ごとに子プロセスで計測"""
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        envs = prepare(Path(tmp), n_items, args.seed)
+        for mode in MODES:
+            completed = subprocess.run(
+                [sys.executable, __file__, "--worker", mode, "--rounds", str(args.rounds)],
+                env={**os.environ, **envs[mode]}, capture_output=True, text=True
+            )
+            if completed.returncode != 0:
+                sys.stderr.write(completed.stderr)
+                raise SystemExit(f"Benchmark failed for {n_items} items ({mode})")
+            runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return runs
+
+
+def print_runs(runs: List[Dict[str, Any]]) -> None:
+    baseline = {run["mode"]: run["load_ms"] for run in runs}
+    for run in runs:
+        source = run["mode"].replace("snapshot_", "")
+        speedup = baseline[source] / run["load_ms"] if run["load_ms"] else 0.0
+        print(
+            f"{run['items']:>7} items | {run['mode']:<13} | load {run['load_ms']:9.1f} ms "
+            f"(max {run['load_ms_max']:9.1f}) | x{speedup:5.1f} | +{run['memory_mb']:7.1f} MB"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="起動時のコンテンツ読み込みのベンチマーク")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="コーパス件数（カンマ区切り）")
+    parser.add_argument("--rounds", type=int, default=3, help="方式ごとの読み込み回数（最小値を記録）")
+    parser.add_argument("--seed", type=int, default=42, help="コーパス生成のシード")
+    parser.add_argument("--output", type=Path, help="結果 JSON（省略時は results/startup_<commit>.json）")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_worker(args.worker, args.rounds)))
+        return
+
+    revision = git_commit()
+    runs = []
+    for n_items in (int(s) for s in args.sizes.split(",")):
+        size_runs = run_size(n_items, args)
+        print_runs(size_runs)
+        runs.extend(size_runs)
+
+    report = {
+        **revision,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "workload": {"rounds": args.rounds, "seed": args.seed},
+        "runs": runs,
+    }
+    output = args.output
+    if output is None:
+        suffix = revision["commit"] + ("-dirty" if revision["dirty"] else "") or "local"
+        output = RESULTS_DIR / f"startup_{suffix}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+# ベンチマーク用の合成コーパス・クエリ生成
+# 実行: python benchmarks/corpus.py --items 10000 --output /tmp/contents.json
+# contents.json 互換（画面・カテゴリ・キーワード・シノニム付き）の日本語コーパスを
+# シード固定で生成する。クエリは件数に依存しない固定ワークロード
+
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import Dict, List, Any
+
+# 業務用語（画面・機能名）
+NOUNS = [
+    "歩留まり", "通過率", "グラフ", "エクスポート", "CSV", "ダウンロード", "面接", "書類選考",
+    "内定", "期間", "フィルター", "設定", "ログイン", "パスワード", "架電", "候補者",
+    "求人", "データ", "集計", "エラー", "権限", "管理者", "画面", "レポート",
+    "ダッシュボード", "通知", "メール", "テンプレート", "応募", "選考", "ステータス", "担当者",
+    "企業", "部署", "アカウント", "履歴", "検索", "一覧", "詳細", "インポート",
+    "カレンダー", "スケジュール", "日程", "リマインド", "アンケート", "スコア", "ランキング", "目標",
+    "実績", "売上", "契約", "請求", "ファイル", "添付", "コメント", "タグ",
+    "ユーザー", "グループ", "ロール", "セキュリティ", "二段階認証", "セッション", "API", "連携",
+]
+# 状態・動作
+STATES = [
+    "表示されない", "更新されない", "反映されない", "保存できない", "消えた", "重複している",
+    "遅い", "文字化けする", "送信できない", "見つからない", "ずれている", "開けない",
+]
+VERBS = ["変更する", "追加する", "削除する", "確認する", "出力する", "設定する", "共有する", "絞り込む"]
+
+TITLE_TEMPLATES = [
+    "{a}が{state}",
+    "{a}の{b}を{verb}方法",
+    "{a}とは？",
+    "{a}を{verb}には？",
+    "{a}の{b}について",
+    "{a}{b}の見方",
+]
+BODY_TEMPLATES = [
+    "{a}が{state}場合は、{b}の{c}を確認してください。",
+    "{a}画面の「{b}」から{c}を{verb}ことができます。",
+    "{a}の{b}は毎日深夜に{c}されます。",
+    "管理者権限がない場合、{a}の{b}は{state}ことがあります。",
+    "{a}を{verb}と、{b}にも反映されます。",
+    "詳しくは{a}の{b}マニュアルを参照してください。",
+]
+
+# シノニム（表記ゆれ・言い換え）
+SYNONYM_GROUPS = {
+    "エクスポート": ["出力", "ダウンロード", "CSV"],
+    "歩留まり": ["通過率", "歩留"],
+    "ログイン": ["サインイン", "ログオン"],
+    "パスワード": ["PW", "パス"],
+    "表示されない": ["見えない", "出ない"],
+    "面接": ["面談"],
+    "候補者": ["応募者", "求職者"],
+    "ダッシュボード": ["ホーム", "トップ"],
+    "スケジュール": ["日程", "予定"],
+    "ユーザー": ["利用者", "アカウント"],
+}
+STOPWORDS = ["の", "は", "が", "を", "に", "で", "と", "も", "から", "まで"]
+
+CATEGORIES = ["faq", "howto", "glossary", "error", "general"]
+SCREEN_GROUPS = ["yield", "recruit", "teleapo", "report", "settings"]
+
+
+def screen_ids(n_items: int) -> List[str]:
+    """画面ID（件数に応じて増やす: 6〜200画面）"""
+    count = min(max(6, n_items // 500), 200)
+    return [f"{SCREEN_GROUPS[i % len(SCREEN_GROUPS)]}_{i:03d}" for i in range(count)]
+
+
+def generate_corpus(n_items: int, seed: int = 42) -> Dict[str, Any]:
+    """contents.json 互換の合成コーパスを生成"""
+    rnd = random.Random(seed)
+    screens = screen_ids(n_items)
+
+    def fill(template: str, topic: List[str]) -> str:
+        # 半分はアイテムの主題語、残りは全体からランダムに選ぶ（語の出現頻度に偏りを付ける）
+        a, b, c = (rnd.choice(topic) if rnd.random() < 0.5 else rnd.choice(NOUNS) for _ in range(3))
+        return template.format(a=a, b=b, c=c, state=rnd.choice(STATES), verb=rnd.choice(VERBS))
+
+    items = {}
+    for i in range(n_items):
+        topic = rnd.sample(NOUNS, 3)
+        sentences = [fill(rnd.choice(BODY_TEMPLATES), topic) for _ in range(rnd.randint(2, 8))]
+        items[f"item_{i:06d}"] = {
+            "title": fill(rnd.choice(TITLE_TEMPLATES), topic),
+            "body": "\n".join(sentences),
+            "category": rnd.choice(CATEGORIES),
+            "screens": rnd.sample(screens, rnd.choice([0, 1, 1, 2, 3])),
+            "keywords": topic + rnd.sample(STATES, rnd.randint(0, 2)),
+            "links": [],
+            "related": [],
+            "priority": rnd.randint(0, 100),
+        }
+    return {
+        "meta": {"version": "1.0.0"},
+        "screen_registry": {
+            s: {"name": s, "routes": [f"/{s.replace('_', '/')}"], "group": s.split("_")[0]}
+            for s in screens
+        },
+        "system_messages": {"welcome": "", "error": ""},
+        "menus": {},
+        "content_items": items,
+        "search_config": {
+            "synonyms": SYNONYM_GROUPS,
+            "stopwords": STOPWORDS,
+        },
+    }
+
+
+def add_navigation(corpus: Dict[str, Any], seed: int = 42) -> Dict[str, Any]:
+    """
+    コーパスにメニュー・リンク・関連コンテンツを追加する（読み込み・検証のベンチマーク用）
+
+    画面ごとのホームメニュー（カテゴリ一覧 + 上位コンテンツ）とカテゴリ別メニュー（先頭 10 件）、
+    アイテムごとに 0〜3 件のリンク・関連コンテンツを付ける。
+    """
+    rnd = random.Random(seed)
+    items = corpus["content_items"]
+    item_ids = list(items)
+    categories: Dict[str, List[str]] = {}
+    for item_id, item in items.items():
+        for screen_id in item["screens"] or ["global"]:
+            category_items = categories.setdefault(f"cat:{item['category']}:{screen_id}", [])
+            if len(category_items) < 10:
+                category_items.append(item_id)
+
+    menus = {}
+    for screen_id in list(corpus["screen_registry"]) + ["global"]:
+        options = [
+            {"label": c, "next_state": f"cat:{c}:{screen_id}"} for c in CATEGORIES
+            if f"cat:{c}:{screen_id}" in categories
+        ]
+        options += [{"label": items[i]["title"], "next_state": f"ans:{i}"} for i in rnd.sample(item_ids, 3)]
+        menus[f"home:{screen_id}"] = {"message": f"{screen_id} のヘルプです。", "options": options}
+    for menu_id, category_items in categories.items():
+        menus[menu_id] = {
+            "message": f"{menu_id.split(':')[1]} の一覧です。",
+            "options": [{"label": items[i]["title"], "next_state": f"ans:{i}"} for i in category_items],
+        }
+    corpus["menus"] = menus
+
+    for item_id, item in items.items():
+        item["links"] = [
+            {"label": f"{rnd.choice(NOUNS)}マニュアル", "url": f"https://help.example.com/{item_id}/{n}"}
+            for n in range(rnd.randint(0, 3))
+        ]
+        item["related"] = [r for r in rnd.sample(item_ids, rnd.randint(0, 3)) if r != item_id]
+    return corpus
+
+
+def generate_queries(n_queries: int = 200, seed: int = 7) -> List[str]:
+    """
+    固定クエリワークロード（コーパス件数に依存しない）
+
+    単語・複数語・シノニム・フレーズ・フィールド指定・該当なしを一定の比率で含む。
+    """
+    rnd = random.Random(seed)
+    makers = [
+        (30, lambda: rnd.choice(NOUNS)),
+        (25, lambda: f"{rnd.choice(NOUNS)} {rnd.choice(NOUNS)}"),
+        (10, lambda: f"{rnd.choice(NOUNS)} {rnd.choice(STATES)}"),
+        (10, lambda: rnd.choice([s for group in SYNONYM_GROUPS.values() for s in group])),
+        (5, lambda: f'"{rnd.choice(NOUNS)}の{rnd.choice(NOUNS)}"'),
+        (5, lambda: f"{rnd.choice(NOUNS)}の{rnd.choice(NOUNS)}を{rnd.choice(VERBS)}方法"),
+        (5, lambda: f"category:{rnd.choice(CATEGORIES)} {rnd.choice(NOUNS)}"),
+        (5, lambda: f"{rnd.choice(NOUNS)} priority:>={rnd.choice([50, 80])}"),
+        (5, lambda: f"存在しない{rnd.randint(100, 999)}"),
+    ]
+    weights = [w for w, _ in makers]
+    return [rnd.choices(makers, weights)[0][1]() for _ in range(n_queries)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ベンチマーク用の合成コーパスを生成")
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, required=True)
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.items, args.seed)
+    args.output.write_text(json.dumps(corpus, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"Wrote {args.items} items to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
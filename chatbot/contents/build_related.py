@@ -0,0 +1,206 @@
+# 関連コンテンツの自動算出（TF-IDF コサイン類似度）
+# 実行: python contents/build_related.py [--input contents/contents.json] [--top-n 5]
+# タイトル・キーワード・本文の文字 bi-gram を TF-IDF で重み付けし、
+# アイテム間のコサイン類似度の上位を related_auto に書き込む（NumPy が必要）。
+# 手動で設定した related は変更しない（表示時は related が常に優先される）
+
+import argparse
+import json
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Any
+
+import numpy as np
+
+# フィールドごとの語の重み（検索スコアと同じ タイトル 3 / キーワード 2 / 本文 1）
+FIELD_WEIGHTS = {"title": 3.0, "keywords": 2.0, "body": 1.0}
+# 類似度の計算に使う語（bi-gram）の上限（計算量は アイテム数 × 2つの積 に比例する）
+# アイテムごとに重みの大きい FEATURES_PER_ITEM 語を使い、
+# 各語の転置リストは重みの大きい POSTINGS_PER_FEATURE アイテムまでに切り詰める
+FEATURES_PER_ITEM = 12
+POSTINGS_PER_FEATURE = 24
+# この類似度未満のアイテムは関連としない
+MIN_SCORE = 0.1
+# 1ブロックで展開する（アイテム, 関連候補）の組の上限（メモリ使用量の目安）
+BLOCK_PAIRS_MAX = 4_000_000
+
+# テキストの区切り（正規化で変化せず、空白にもならない文字）
+_SEPARATOR = "\x00"
+# bi-gram の符号化（2文字のコードポイントを 21 ビットずつ詰める）とアイテム番号の位置
+_CHAR_BITS = np.uint64(21)
+_DOC_SHIFT = np.uint64(42)
+# カタカナ（ァ〜ヶ）→ ひらがな（normalizer.fold_kana と同じ範囲）
+_KATAKANA_FIRST, _KATAKANA_LAST, _KANA_OFFSET = 0x30A1, 0x30F6, 0x60
+
+
+def _bigrams(texts: List[str]) -> tuple:
+    """
+    テキストごとの文字 bi-gram を (アイテム番号, bi-gram 符号) の配列で返す
+
+    全テキストを区切り文字で連結して一度に正規化し（NFKC・小文字化・カタカナ→ひらがな。
+    検索の正規化と同じ表記の統一）、コードポイントの配列上で bi-gram を作る。
+    空白・制御文字・区切りをまたぐ bi-gram は含めない。
+    """
+    joined = unicodedata.normalize("NFKC", _SEPARATOR.join(texts)).lower()
+    chars = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32).copy()
+    katakana = (chars >= _KATAKANA_FIRST) & (chars <= _KATAKANA_LAST)
+    chars[katakana] -= _KANA_OFFSET
+    owner = np.cumsum(chars == 0)
+    left, right = chars[:-1], chars[1:]
+    valid = (left > 0x20) & (right > 0x20)
+    codes = (left[valid].astype(np.uint64) << _CHAR_BITS) | right[valid]
+    return owner[:-1][valid], codes
+
+
+def _weighted_features(fields: Dict[str, List[str]], size: int) -> tuple:
+    """
+    アイテム × bi-gram の TF-IDF（行ごとに L2 正規化）
+
+    Returns:
+        (アイテム番号, 語番号, 重み, 語ごとの出現アイテム数) の配列（アイテム番号の昇順）
+    """
+    # フィールドごとに (アイテム番号, bi-gram) の出現回数を数え、フィールドの重みを掛けて合算
+    counted = []
+    for name, texts in fields.items():
+        owner, codes = _bigrams(texts)
+        keys, counts = np.unique((owner.astype(np.uint64) << _DOC_SHIFT) | codes, return_counts=True)
+        counted.append((keys, counts * FIELD_WEIGHTS[name]))
+    # 各フィールドの配列は整列済みのため安定ソート（マージ）で併合する
+    merged = np.sort(np.concatenate([keys for keys, _ in counted]), kind="stable")
+    unique_keys = merged[np.concatenate(([True], merged[1:] != merged[:-1]))]
+    tf = np.zeros(len(unique_keys))
+    for keys, counts in counted:
+        tf[np.searchsorted(unique_keys, keys)] += counts
+
+    docs = (unique_keys >> _DOC_SHIFT).astype(np.int64)
+    codes = unique_keys & ((np.uint64(1) << _DOC_SHIFT) - np.uint64(1))
+    features = np.searchsorted(np.unique(codes), codes)
+    df = np.bincount(features)
+    idf = np.log((1.0 + size) / (1.0 + df)) + 1.0
+    weight = (1.0 + np.log(tf)) * idf[features]
+    norm = np.sqrt(np.bincount(docs, weights=weight * weight, minlength=size))
+    weight /= norm[docs]
+    return docs, features, weight, df
+
+
+def _rank_in_group(groups: np.ndarray) -> np.ndarray:
+    """整列済みのグループ番号の配列で、各要素がグループ内で何番目か"""
+    if not len(groups):
+        return groups
+    starts = np.flatnonzero(np.concatenate(([True], groups[1:] != groups[:-1])))
+    sizes = np.diff(np.append(starts, len(groups)))
+    return np.arange(len(groups)) - np.repeat(starts, sizes)
+
+
+def _top_per_group(groups: np.ndarray, weight: np.ndarray, limit: int) -> np.ndarray:
+    """グループごとに重み（0〜1）の上位 limit 件の位置（グループの昇順）"""
+    order = np.argsort(groups * 2.0 - weight)
+    return order[_rank_in_group(groups[order]) < limit]
+
+
+def compute_related(items: Dict[str, Dict[str, Any]], top_n: int = 5) -> Dict[str, List[str]]:
+    """
+    アイテムごとに類似度の高いアイテム（自身を除く、類似度の降順に最大 top_n 件）を求める
+
+    Args:
+        items: content_items（item_id → アイテム）
+        top_n: アイテムごとの件数
+
+    Returns:
+        item_id → 関連アイテムID の一覧（該当なしのアイテムは含まない）
+    """
+    item_ids = list(items)
+    size = len(item_ids)
+    if size < 2:
+        return {}
+    values = items.values()
+    fields = {
+        "title": [item.get("title", "") for item in values],
+        "keywords": [" ".join(item.get("keywords", [])) for item in values],
+        "body": [item.get("body", "") for item in values],
+    }
+    docs, features, weight, df = _weighted_features(fields, size)
+    # 1アイテムにしかない語は類似度に寄与しない
+    shared = df[features] >= 2
+    docs, features, weight = docs[shared], features[shared], weight[shared]
+
+    # 候補側: 語番号 → 重みの大きいアイテム（転置リスト）
+    postings = _top_per_group(features, weight, POSTINGS_PER_FEATURE)
+    posting_docs, posting_weight = docs[postings], weight[postings]
+    posting_len = np.bincount(features[postings], minlength=int(features.max(initial=-1)) + 1)
+    posting_start = np.concatenate(([0], np.cumsum(posting_len)[:-1]))
+    # 類似度を求める側: アイテムごとに重みの上位の語（アイテム番号の昇順）
+    selected = np.sort(_top_per_group(docs, weight, FEATURES_PER_ITEM))
+    docs, features, weight = docs[selected], features[selected], weight[selected]
+
+    # アイテムごとの展開数（語ごとの転置リスト長の和）からブロックの境界を決める
+    doc_start = np.searchsorted(docs, np.arange(size + 1))
+    cost = np.concatenate(([0], np.cumsum(posting_len[features])))[doc_start]
+    bounds = np.searchsorted(cost, np.arange(0, cost[-1], BLOCK_PAIRS_MAX), side="right") - 1
+    bounds = np.unique(np.concatenate((bounds, [0, size])))
+
+    related: Dict[str, List[str]] = {}
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        entries = slice(doc_start[lo], doc_start[hi])
+        lengths = posting_len[features[entries]]
+        total = int(lengths.sum())
+        if not total:
+            continue
+        # 各語の転置リストを展開: (アイテム, 候補, 重みの積)
+        offsets = np.repeat(posting_start[features[entries]] - np.cumsum(lengths) + lengths, lengths)
+        index = offsets + np.arange(total)
+        rows = np.repeat(docs[entries], lengths)
+        others = posting_docs[index]
+        products = np.repeat(weight[entries], lengths) * posting_weight[index]
+
+        pairs, inverse = np.unique(rows * size + others, return_inverse=True)
+        scores = np.bincount(inverse, weights=products)
+        rows, others = pairs // size, pairs % size
+        keep = (rows != others) & (scores >= MIN_SCORE)
+        rows, others, scores = rows[keep], others[keep], scores[keep]
+        # アイテムごとに類似度の降順（同点はアイテム番号順）で上位 top_n 件
+        order = np.argsort(rows * 2.0 - scores, kind="stable")
+        rows, others = rows[order], others[order]
+        top = _rank_in_group(rows) < top_n
+        for row, other in zip(rows[top].tolist(), others[top].tolist()):
+            related.setdefault(item_ids[row], []).append(item_ids[other])
+    return related
+
+
+def fill_related(data: Dict[str, Any], top_n: int = 5) -> int:
+    """
+    content_items の related_auto を算出した関連アイテムで置き換える
+
+    Returns:
+        related_auto を設定したアイテム数
+    """
+    items = data.get("content_items", {})
+    related = compute_related(items, top_n)
+    for item_id, item in items.items():
+        item.pop("related_auto", None)
+        if item_id in related:
+            item["related_auto"] = related[item_id]
+    return len(related)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="関連コンテンツを算出して contents.json に書き込む")
+    parser.add_argument("--input", type=Path, default=Path(__file__).parent / "contents.json")
+    parser.add_argument("--output", type=Path, help="出力先（省略時は --input を上書き）")
+    parser.add_argument("--top-n", type=int, default=5, help="アイテムごとの関連アイテム数")
+    args = parser.parse_args()
+
+    data = json.loads(args.input.read_text(encoding="utf-8"))
+    start = time.perf_counter()
+    count = fill_related(data, args.top_n)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    output = args.output or args.input
+    output.write_text(json.dumps(data, ensure_ascii=False, indent=4) + "\n", encoding="utf-8")
+    print(f"Generated related items: {output}")
+    print(f"  {count}/{len(data.get('content_items', {}))} items, {elapsed_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
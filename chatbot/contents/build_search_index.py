@@ -0,0 +1,46 @@
+# 検索インデックスの事前構築
+# 実行: python contents/build_search_index.py [--output contents/contents.idx]
+# コンテンツ（CONTENT_SOURCE の設定に従い JSON または CSV）から検索インデックスを構築し、
+# contents.json と同じ場所に書き出す。サーバーは起動時にこのファイルを mmap で読み込む
+# （meta.version・アイテム構成・読み込み元ファイルの内容が一致しない場合は読み込まずに起動時に構築する）
+# SEARCH_ENGINE=fts5 の場合は何もしない（FTS5 のインデックスは build_sqlite.py で作成する）
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR / "backend"))
+
+from config import config  # noqa: E402
+from content_repo import content_repo  # noqa: E402
+from search import search_engine  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="検索インデックスを事前構築")
+    parser.add_argument("--output", type=Path, default=Path(config.SEARCH_INDEX_PATH))
+    args = parser.parse_args()
+
+    if config.SEARCH_ENGINE.lower() == "fts5":
+        # FTS5 はデータベース上のインデックスを直接検索する（保存するインデックスはない）
+        print(f"SEARCH_ENGINE=fts5 searches the FTS5 tables in {config.CONTENT_SQLITE_PATH}, skipping.")
+        print("Build them with: python contents/build_sqlite.py")
+        return
+
+    # 既存のインデックスは読み込まずに構築し直す
+    config.SEARCH_INDEX_MODE = "off"
+    content_repo.load()
+    start = time.perf_counter()
+    search_engine.initialize()
+    build_ms = (time.perf_counter() - start) * 1000
+    info = search_engine.save_index(str(args.output))
+
+    print(f"Generated search index: {info['path']}")
+    print(f"  version {info['content_version']}, {info['items']} items, {info['bytes']:,} bytes")
+    print(f"  build {build_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# SQLite コンテンツ DB の作成
+# 実行: python contents/build_sqlite.py [--source json|csv] [--output contents/contents.db]
+# contents.json（または CSV）を検証し、画面・メニュー・コンテンツ・リンク・関連と
+# FTS5 の検索用テーブルを1つの SQLite ファイルに書き出す（CONTENT_SOURCE=sqlite / SEARCH_ENGINE=fts5 用）。
+# 一時ファイルに書き込んでから置き換えるため、稼働中のサーバーがあっても実行できる
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR / "backend"))
+
+from config import config  # noqa: E402
+from content_repo import ContentRepository  # noqa: E402
+from content_sqlite import write_database  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite コンテンツ DB を作成")
+    parser.add_argument("--source", choices=["json", "csv"], default="json", help="読み込むコンテンツ")
+    parser.add_argument("--input", type=Path, default=Path(config.CONTENT_PATH), help="--source json の入力")
+    parser.add_argument("--output", type=Path, default=Path(config.CONTENT_SQLITE_PATH))
+    args = parser.parse_args()
+
+    config.CONTENT_SOURCE = args.source
+    repo = ContentRepository(str(args.input))
+    repo.load()
+    start = time.perf_counter()
+    info = write_database(repo.snapshot().data, args.output)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    print(f"Generated content database: {args.output}")
+    print(f"  version {repo.get_version()}, {info['items']} items, {info['bytes']:,} bytes")
+    print(f"  build {build_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# コンテンツの状態グラフの検証（コンテンツ更新時・CI 用）
+# 実行: python contents/check_graph.py [--source json|csv] [--input contents/contents.json] [--strict] [--json]
+# メニューの遷移先・関連コンテンツをたどり、参照切れ・到達できないメニュー・行き止まり・循環をすべて表示する。
+# 参照切れがあれば（--strict の場合はその他の指摘があっても）終了コード 1 で終了する
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR / "backend"))
+
+from config import config  # noqa: E402
+from content_graph import analyze_graph  # noqa: E402
+from content_repo import ContentRepository, ContentValidationError  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="コンテンツの状態グラフを検証")
+    parser.add_argument("--source", choices=["json", "csv"], default=None,
+                        help="読み込むコンテンツ（省略時は CONTENT_SOURCE、sqlite の場合は json）")
+    parser.add_argument("--input", type=Path, default=Path(config.CONTENT_PATH), help="--source json の入力")
+    parser.add_argument("--strict", action="store_true", help="参照切れ以外の指摘でも失敗にする")
+    parser.add_argument("--json", action="store_true", help="結果を JSON で出力")
+    args = parser.parse_args()
+
+    source = args.source or config.CONTENT_SOURCE.lower()
+    try:
+        if source == "csv":
+            data = ContentRepository()._load_from_csv()
+        else:
+            with open(args.input, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        report = analyze_graph(data)
+    except (OSError, ValueError, KeyError, ContentValidationError) as e:
+        print(f"Failed to read contents: {e!r}", file=sys.stderr)
+        sys.exit(2)
+
+    failed = bool(report.errors or (args.strict and report.warnings))
+    if args.json:
+        print(json.dumps(
+            {"errors": report.errors, "warnings": report.warnings, "stats": report.stats},
+            ensure_ascii=False, indent=2
+        ))
+    else:
+        for error in report.errors:
+            print(f"ERROR   {error}")
+        for warning in report.warnings:
+            print(f"WARNING {warning}")
+        stats = report.stats
+        print(
+            f"{stats['states']} states, {stats['edges']} edges | "
+            f"menus reachable {stats['reachable_menus']}/{stats['menus']} | "
+            f"contents reachable from menus {stats['reachable_contents']}/{stats['contents']} | "
+            f"{len(report.errors)} errors, {len(report.warnings)} warnings ({stats['elapsed_ms']} ms)"
+        )
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
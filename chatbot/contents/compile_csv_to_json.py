@@ -3,14 +3,24 @@ import sys
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[1]
-sys.path.append(str(BASE_DIR))
+sys.path.append(str(BASE_DIR / "backend"))
 
-from backend.content_repo import ContentRepository  # noqa: E402
+from content_repo import ContentRepository  # noqa: E402
 
 
 def main():
     repo = ContentRepository()
     data = repo._load_from_csv()
+
+    # 関連コンテンツの自動算出（NumPy がない環境では related_auto を付けない）
+    try:
+        from build_related import fill_related
+    except ImportError:
+        print("Skipped related items: NumPy is not installed")
+    else:
+        count = fill_related(data)
+        print(f"Computed related items for {count} contents")
+
     output = Path(__file__).parent / "contents.json"
     output.write_text(json.dumps(data, ensure_ascii=False, indent=4) + "\n", encoding="utf-8")
     print(f"Generated JSON: {output}")
@@ -0,0 +1,51 @@
+# コンテンツのコンパイル（検証済みスナップショットの作成）
+# 実行: python contents/compile_snapshot.py [--source json|csv] [--input contents/contents.json] [--output contents/contents.snapshot]
+# コンテンツ（JSON または CSV）を読み込んで検証し、画面別の一覧と合わせて1ファイルに書き出す。
+# サーバーは起動時に読み込み元のハッシュがスナップショットと一致すれば、解析・検証を省いてこれを読み込む
+# （コンテンツを更新したら作り直す。作り直すまでは読み込み元を解析して起動する）
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BASE_DIR / "backend"))
+
+from config import config  # noqa: E402
+from content_repo import ContentRepository  # noqa: E402
+from content_snapshot import write_snapshot  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="検証済みのコンテンツスナップショットを作成")
+    parser.add_argument("--source", choices=["json", "csv"], default=None,
+                        help="読み込むコンテンツ（省略時は CONTENT_SOURCE、sqlite の場合は json）")
+    parser.add_argument("--input", type=Path, default=Path(config.CONTENT_PATH), help="--source json の入力")
+    parser.add_argument("--output", type=Path, default=Path(config.CONTENT_SNAPSHOT_PATH))
+    args = parser.parse_args()
+
+    source = args.source or config.CONTENT_SOURCE.lower()
+    config.CONTENT_SOURCE = source if source in ("json", "csv") else "json"
+    # 既存のスナップショットは読み込まずに検証し直す
+    config.CONTENT_SNAPSHOT_MODE = "off"
+    repo = ContentRepository(str(args.input))
+    start = time.perf_counter()
+    snapshot = repo.build_snapshot()
+    build_ms = (time.perf_counter() - start) * 1000
+
+    data = snapshot.data
+    meta = {
+        **repo.snapshot_meta(),
+        "version": data.get("meta", {}).get("version", "unknown"),
+        "items": len(data["content_items"]),
+    }
+    size = write_snapshot(args.output, (data, snapshot.screen_contents, snapshot.unscoped_contents), meta)
+
+    print(f"Generated content snapshot: {args.output}")
+    print(f"  {meta['source']} {meta['source_hash'][:12]}, version {meta['version']}, {meta['items']} items, {size:,} bytes")
+    print(f"  load + validate {build_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
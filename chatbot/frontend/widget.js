@@ -49,6 +49,8 @@
     const RESIZE_MIN_WIDTH = 280;
     const RESIZE_MIN_HEIGHT = 260;
     const RESIZE_MARGIN = 10;
+    const SUGGEST_DEBOUNCE_MS = 120;
+    let suggestTimer = null;
 
     // === DOM要素 ===
     let elements = {};
@@ -103,6 +105,12 @@
             }
         });
 
+        // 入力補完
+        elements.input.addEventListener('input', () => {
+            clearTimeout(suggestTimer);
+            suggestTimer = setTimeout(fetchSuggestions, SUGGEST_DEBOUNCE_MS);
+        });
+
         // ESCで閉じる
         document.addEventListener('keydown', (e) => {
             if (e.key === 'Escape' && isOpen) {
@@ -564,6 +572,44 @@
         step('search', '', query);
     }
 
+    // === 入力補完 ===
+    async function fetchSuggestions() {
+        const prefix = elements.input.value.trim();
+        if (!isFreeTextEnabled || !prefix) {
+            renderSuggestions([]);
+            return;
+        }
+
+        try {
+            const params = new URLSearchParams({ q: prefix });
+            if (currentScreenId) params.set('screen_id', currentScreenId);
+            const res = await fetch(`${config.apiBase}/suggest?${params}`);
+            const data = await res.json();
+            // 応答待ちの間に入力が変わった場合は破棄
+            if (data.success && elements.input.value.trim() === prefix) {
+                renderSuggestions(data.suggestions);
+            }
+        } catch (err) {
+            console.error('[HelpChat] Suggest error:', err);
+        }
+    }
+
+    function renderSuggestions(suggestions) {
+        let list = document.getElementById('helpchat-suggest');
+        if (!list) {
+            list = document.createElement('datalist');
+            list.id = 'helpchat-suggest';
+            elements.inputArea.appendChild(list);
+            elements.input.setAttribute('list', list.id);
+        }
+        list.innerHTML = '';
+        suggestions.forEach((s) => {
+            const opt = document.createElement('option');
+            opt.value = s.text;
+            list.appendChild(opt);
+        });
+    }
+
     // === 描画 ===
     function renderMessage(text, type) {
         if (!text) return;